@@ -12,8 +12,10 @@ file.
 """
 
 import satstress as ss
+import os
 import re
 import time
+import itertools
 import netCDF3
 import physcon as pc
 import numpy
@@ -28,6 +30,22 @@ def main():
     usage = "usage: %prog [options] satfile gridfile outfile" 
     description = __doc__
     op = OptionParser(usage)
+    op.add_option("--love-tol", dest="love_tol", type="float", default=None,\
+                  help="interpolate the NSR Love numbers from a table with this relative error, instead of solving for each NSR period")
+    op.add_option("--processes", dest="processes", type="int", default=1,\
+                  help="number of processes to calculate the time slices and NSR periods with, 0 for one per CPU [default: %default]")
+    op.add_option("--resume", dest="resume", action="store_true", default=False,\
+                  help="if outfile exists, finish the interrupted calculation it holds")
+    op.add_option("--netcdf4", dest="format", action="store_const", const="NETCDF4", default="NETCDF3",\
+                  help="write a chunked, compressed netCDF4 (HDF5) file, instead of a classic netCDF3 file")
+    op.add_option("--chunk-slices", dest="chunk_slices", type="int", default=1,\
+                  help="number of time slices or NSR periods in each chunk of a netCDF4 file [default: %default]")
+    op.add_option("--complevel", dest="complevel", type="int", default=4,\
+                  help="zlib compression level (0-9) for a netCDF4 file, 0 for none [default: %default]")
+    op.add_option("--pack", dest="pack", type="choice", choices=["quantize", "i2", "i4"], default=None,\
+                  help="store the stresses in a netCDF4 file as rounded floats (quantize) or as scaled 16 or 32 bit integers (i2, i4), with the error given by --pack-error")
+    op.add_option("--pack-error", dest="pack_error", type="float", default=None,\
+                  help="the largest error allowed in packing the stresses [Pa]")
 
     (options, args) = op.parse_args()
 
@@ -51,9 +69,11 @@ def main():
     the_grid = Grid(gridfile, satellite=the_sat)
     gridfile.close()
 
-    the_stresscalc = ss.StressCalc([ss.NSR(the_sat), ss.Diurnal(the_sat)])
+    the_stresscalc = ss.StressCalc([ss.NSR(the_sat, love_tol=options.love_tol), ss.Diurnal(the_sat)])
     the_gridcalc = GridCalc(the_grid, the_stresscalc)
-    the_gridcalc.write_netcdf(args[2])
+    the_output = NetCDFOutput(format=options.format, chunk_slices=options.chunk_slices,\
+                              complevel=options.complevel, pack=options.pack, pack_error=options.pack_error)
+    the_gridcalc.write_netcdf(args[2], output=the_output, processes=(options.processes or None), resume=options.resume)
 
 class Grid(object): # {{{
     """
@@ -283,7 +303,112 @@ class GridCalc(object): # {{{
         myStr += str(self.grid)
         return myStr
 
-    def write_netcdf(self, outfile):
+    def coordinates(self):
+        """
+        The coordinates of the points in the grid, as a dictionary of (values,
+        units, long_name) tuples, keyed by the names of the latitude,
+        longitude, nsr_period and time dimensions.
+
+        The values are single precision, as they are stored in netCDF files,
+        and the stresses are calculated at exactly those locations.
+
+        """
+        coords = {}
+        coords['latitude'] = (numpy.linspace(self.grid.lat_min, self.grid.lat_max, int(self.grid.lat_num)),\
+                              "degrees_north", "latitude")
+        coords['longitude'] = (numpy.linspace(self.grid.lon_min, self.grid.lon_max, int(self.grid.lon_num)),\
+                               "degrees_east", "longitude")
+        coords['nsr_period'] = (numpy.logspace(numpy.log10(self.grid.nsr_period_min), numpy.log10(self.grid.nsr_period_max), int(self.grid.nsr_period_num)),\
+                                "seconds", "NSR period")
+
+        # Check to see what kind of units we're using for time, and name the
+        # variables and their units appropriately
+        if self.grid.orbit_min is None:
+            coords['time'] = (numpy.linspace(self.grid.time_min, self.grid.time_max, int(self.grid.time_num)),\
+                              "seconds", "time after periapse")
+        else:
+            coords['time'] = (numpy.linspace(self.grid.orbit_min, self.grid.orbit_max, int(self.grid.orbit_num)),\
+                              "degrees", "degrees after periapse")
+
+        for dim_name in coords:
+            values, units, long_name = coords[dim_name]
+            coords[dim_name] = (values.astype(numpy.float32), units, long_name)
+
+        return(coords)
+
+    def slab_job(self, coords):
+        """
+        Prepare to calculate the grid one lat-lon slab at a time (see
+        L{calc_slab}), given its coordinates (see L{coordinates}).
+
+        Returns the job shared by all of the slabs, and a list of the slabs,
+        the Diurnal time slices first, followed by the NSR periods.
+
+        """
+        # Get the StressDef objects corresponding to Diurnal and NSR stresses:
+        for stress in self.stresscalc.stresses:
+            if stress.__name__ is 'Diurnal':
+                diurnal_stress = ss.StressCalc([stress,])
+            if stress.__name__ is 'NSR':
+                nsr_stress = ss.StressCalc([stress,])
+
+        grid_thetas = scipy.radians(90.0-coords['latitude'][0])
+        grid_phis   = scipy.radians(coords['longitude'][0])
+        grid_times  = coords['time'][0]
+        grid_nsr_periods = coords['nsr_period'][0]
+
+        # The Diurnal stresses at any time are just a linear combination of
+        # their complex amplitudes, which depend only on location, so we
+        # calculate those once, over the whole lat-lon grid, and then only
+        # have to deal with the time dependence for each time slice.  Only the
+        # points which aren't made redundant by the symmetry of the stresses
+        # (e.g. the southern hemisphere mirroring the northern) are
+        # calculated, and copied out to the whole grid slab by slab:
+        diurnal_symmetry = diurnal_stress.grid_symmetry(grid_thetas, grid_phis)
+        diurnal_harmonics = diurnal_stress.harmonics(theta = diurnal_symmetry.thetas[:,numpy.newaxis],\
+                                                       phi = diurnal_symmetry.phis[numpy.newaxis,:])
+
+        # Set the eccentricity to zero to exclude the Diurnal stresses for the
+        # purposes of calculating the NSR stresses.  This is done to a
+        # snapshot, so the satellite shared with the other stresses is left
+        # alone:
+        nsr_sat = nsr_stress.stresses[0].satellite.snapshot().replace(orbit_eccentricity=0.0)
+        nsr_love_tol = nsr_stress.stresses[0].love_tol
+
+        # We need to make sure that we have a representation of the time
+        # coordinate in seconds, because that's what the satstress library
+        # expects - even if we're ultimately communicating time to the user in
+        # terms of "degrees after periapse"
+        job = (diurnal_stress.snapshot(), diurnal_symmetry, diurnal_harmonics,\
+               nsr_sat, nsr_love_tol, grid_thetas, grid_phis)
+        slabs = []
+        for t in range(len(grid_times)):
+            if self.grid.orbit_min is None:
+                time_sec = grid_times[t]
+            else:
+                time_sec = diurnal_stress.stresses[0].satellite.orbit_period()*(grid_times[t]/360.0)
+            slabs.append(('Diurnal', t, time_sec))
+        for p_nsr in range(len(grid_nsr_periods)):
+            slabs.append(('NSR', p_nsr, float(grid_nsr_periods[p_nsr])))
+
+        return(job, slabs)
+
+    def compute(self):
+        """
+        Perform the calculation in memory, returning a L{GridCube} holding
+        the same coordinates and stress variables as the netCDF file written
+        by L{write_netcdf}.
+
+        Nothing is calculated until the stresses are asked for, and then
+        only the time slices or NSR periods which are needed, each of which
+        is kept for re-use.
+
+        @rtype: L{GridCube}
+
+        """
+        return(GridCube(self))
+
+    def write_netcdf(self, outfile, output=None, processes=1, resume=False):
         """
         Output a netCDF file containing the results of the calculation
         specified by the GridCalc object.
@@ -294,13 +419,118 @@ class GridCalc(object): # {{{
         the name of the L{StressDef} object (e.g. L{Diurnal} or L{NSR}).
 
         Writing out the calculation results causes the calculation to take
-        place.  No mechanism for performing the calculation and retaining it
-        in memory for manipulation is currently provided.
+        place.  To perform the calculation and retain it in memory instead,
+        see L{compute}.
+
+        Each time slice or NSR period is flushed to disk as soon as it's
+        written, and marked as complete within the file (see
+        L{create_netcdf}), so if the calculation is interrupted, it can be
+        resumed later, with only the missing slabs being calculated.
+
+        @param outfile: the name of the netCDF file to create.
+        @type outfile: str
+        @param output: how the results should be laid out in the file.  If
+        None, an uncompressed netCDF3 file is written.
+        @type output: L{NetCDFOutput}
+        @param processes: the number of processes to calculate the time
+        slices and NSR periods with.  If None, one for each CPU.  Only this
+        process writes to the file.
+        @type processes: int
+        @param resume: if outfile already exists, finish the calculation it
+        holds, rather than starting again.
+        @type resume: bool
+
+        @raise ResumeMismatchError: if resuming, and the existing file holds a
+        calculation with different parameters.
+
+        """
+
+        if output is None:
+            output = NetCDFOutput()
+
+        # Each lat-lon slab of the results, i.e. the Diurnal stresses at one
+        # time, or the NSR stresses for one NSR period, is calculated
+        # independently of the others by L{calc_slab}:
+        coords = self.coordinates()
+        job, slabs = self.slab_job(coords)
+        nsr_sat, nsr_love_tol = job[3:5]
+        param_hash = self.parameter_hash(coords, output)
+
+        # Either pick up where a previous run of the same calculation left
+        # off, or create a netCDF file object to stick the calculation results
+        # in:
+        if resume and os.path.exists(outfile):
+            nc_out = output.dataset(outfile, mode='a')
+            if getattr(nc_out, 'parameter_hash', None) != param_hash:
+                nc_out.close()
+                raise ResumeMismatchError(outfile)
+        else:
+            nc_out = self.create_netcdf(outfile, output, coords, param_hash)
+
+        # Leave out the slabs which have already been written:
+        num_slabs = len(slabs)
+        slabs = [ slab for slab in slabs if not nc_out.variables[slab[0]+'_complete'][slab[1]] ]
+        num_slabs_done = num_slabs - len(slabs)
+
+        # If there's more than one process, the slabs are farmed out to a pool
+        # of workers, but they are all written to the file here, in order, as
+        # they come back.  The workers are forked from this process, so if the
+        # NSR Love numbers are being interpolated from a table, building it
+        # first means they can all use it, instead of each building their own:
+        if processes == 1:
+            pool = None
+            results = itertools.imap(calc_slab, itertools.repeat(job), slabs)
+        else:
+            import multiprocessing
+            if nsr_love_tol is not None and len(coords['nsr_period'][0]) > 0:
+                ss.NSR(nsr_sat.replace(nsr_period=float(coords['nsr_period'][0][0])), love_tol=nsr_love_tol)
+            pool = multiprocessing.Pool(processes, initializer=_sweep_init, initargs=(job,))
+            results = pool.imap(_sweep_slab, slabs)
+
+        try:
+            for (stress_name, n, x), (Ttt, Tpt, Tpp) in itertools.izip(slabs, results):
+                num_slabs_done += 1
+                if stress_name == 'Diurnal':
+                    print "Calculated Diurnal stresses at", coords['time'][0][n], coords['time'][2],
+                else:
+                    print "Calculated NSR stresses for Pnsr = %g %s" % (x, coords['nsr_period'][1],),
+                print "(%d of %d)" % (num_slabs_done, num_slabs)
+
+                for name, slab in zip(('Ttt_', 'Tpt_', 'Tpp_'), (Ttt, Tpt, Tpp)):
+                    output.write_slab(nc_out.variables[name+stress_name], n, slab)
+
+                # Only mark the slab as complete once it's safely on disk:
+                nc_out.sync()
+                nc_out.variables[stress_name+'_complete'][n] = 1
+                nc_out.sync()
+            if pool is not None:
+                pool.close()
+        except:
+            if pool is not None:
+                pool.terminate()
+            raise
+        finally:
+            if pool is not None:
+                pool.join()
+
+        # Make sure everything gets written out to the file.
+        nc_out.close()
+
+    def create_netcdf(self, outfile, output, coords, param_hash):
+        """
+        Create the netCDF file for L{write_netcdf}, with all of its metadata,
+        dimensions and variables, but no stresses yet.
+
+        Besides the stress variables, there is a variable alongside each of
+        the Diurnal time and NSR period dimensions (C{Diurnal_complete} and
+        C{NSR_complete}), recording which slabs of the stresses have been
+        written, and the hash of the parameters of the calculation (see
+        L{parameter_hash}) is stored in the C{parameter_hash} attribute.
 
         """
 
         # Create a netCDF file object to stick the calculation results in:
-        nc_out = netCDF3.Dataset(outfile, 'w')
+        nc_out = output.dataset(outfile)
 
         # Set metadata fields of nc_out appropriate to the calculation at hand.
 
@@ -388,42 +618,14 @@ class GridCalc(object): # {{{
         # Specify the size and shape of the output datacube.
         ########################################################################
 
-        # LATITUDE:
-        nc_out.createDimension('latitude', self.grid.lat_num)
-        lats = nc_out.createVariable('latitude',  'f4', ('latitude',))
-        lats.units = "degrees_north"
-        lats.long_name = "latitude"
-        lats[:] = numpy.linspace(self.grid.lat_min, self.grid.lat_max, self.grid.lat_num)
-
-        # LONGITUDE:
-        nc_out.createDimension('longitude', self.grid.lon_num)
-        lons = nc_out.createVariable('longitude',  'f4', ('longitude',))
-        lons.units = "degrees_east"
-        lons.long_name = "longitude"
-        lons[:] = numpy.linspace(self.grid.lon_min, self.grid.lon_max, self.grid.lon_num)
-
-        # NSR_PERIOD
-        nc_out.createDimension('nsr_period', self.grid.nsr_period_num)
-        nsr_periods = nc_out.createVariable('nsr_period', 'f4', ('nsr_period',))
-        nsr_periods.units = "seconds"
-        nsr_periods.long_name = "NSR period"
-        nsr_periods[:] = numpy.logspace(numpy.log10(self.grid.nsr_period_min), numpy.log10(self.grid.nsr_period_max), self.grid.nsr_period_num)
-
-        # TIME:
-        # Check to see what kind of units we're using for time, and name the
-        # variables and their units appropriately
-        if self.grid.orbit_min is None:
-            nc_out.createDimension('time', self.grid.time_num)
-            times = nc_out.createVariable('time', 'f4', ('time',))
-            times.units = "seconds"
-            times.long_name = "time after periapse"
-            times[:] = numpy.linspace(self.grid.time_min, self.grid.time_max, self.grid.time_num)
-        else:
-            nc_out.createDimension('time', self.grid.orbit_num)
-            times = nc_out.createVariable('time', 'f4', ('time',))
-            times.units = "degrees"
-            times.long_name = "degrees after periapse"
-            times[:] = numpy.linspace(self.grid.orbit_min, self.grid.orbit_max, self.grid.orbit_num)
+        # The dimensions and their corresponding coordinate variables:
+        for dim_name in ('latitude', 'longitude', 'nsr_period', 'time'):
+            values, units, long_name = coords[dim_name]
+            nc_out.createDimension(dim_name, len(values))
+            coord_var = nc_out.createVariable(dim_name, 'f4', (dim_name,))
+            coord_var.units = units
+            coord_var.long_name = long_name
+            coord_var[:] = values
 
         # At this point, we should have all the netCDF dimensions and their
         # corresponding coordinate variables created (latitutde, longitude,
@@ -433,92 +635,415 @@ class GridCalc(object): # {{{
 
 
         # DIURNAL:
-        Ttt_Diurnal = nc_out.createVariable('Ttt_Diurnal', 'f4', ('time', 'latitude', 'longitude',))
-        Ttt_Diurnal.units = "Pa"
-        Ttt_Diurnal.long_name = "north-south component of Diurnal eccentricity stresses"
+        diurnal_shape = (len(coords['time'][0]), len(coords['latitude'][0]), len(coords['longitude'][0]))
+        Ttt_Diurnal = output.stress_variable(nc_out, 'Ttt_Diurnal', ('time', 'latitude', 'longitude',), diurnal_shape,\
+                                             "north-south component of Diurnal eccentricity stresses")
+        Tpt_Diurnal = output.stress_variable(nc_out, 'Tpt_Diurnal', ('time', 'latitude', 'longitude',), diurnal_shape,\
+                                             "shear component of Diurnal eccentricity stresses")
+        Tpp_Diurnal = output.stress_variable(nc_out, 'Tpp_Diurnal', ('time', 'latitude', 'longitude',), diurnal_shape,\
+                                             "east-west component of Diurnal eccentricity stresses")
 
-        Tpt_Diurnal = nc_out.createVariable('Tpt_Diurnal', 'f4', ('time', 'latitude', 'longitude',))
-        Tpt_Diurnal.units = "Pa"
-        Tpt_Diurnal.long_name = "shear component of Diurnal eccentricity stresses"
+        # NSR:
+        nsr_shape = (len(coords['nsr_period'][0]), len(coords['latitude'][0]), len(coords['longitude'][0]))
+        Ttt_NSR = output.stress_variable(nc_out, 'Ttt_NSR', ('nsr_period', 'latitude', 'longitude',), nsr_shape,\
+                                         "north-south component of NSR stresses")
+        Tpt_NSR = output.stress_variable(nc_out, 'Tpt_NSR', ('nsr_period', 'latitude', 'longitude',), nsr_shape,\
+                                         "shear component of NSR stresses")
+        Tpp_NSR = output.stress_variable(nc_out, 'Tpp_NSR', ('nsr_period', 'latitude', 'longitude',), nsr_shape,\
+                                         "east-west component of NSR stresses")
+
+        # PROGRESS:
+        for stress_name, record_dim in (('Diurnal', 'time'), ('NSR', 'nsr_period')):
+            complete = nc_out.createVariable(stress_name+'_complete', 'i1', (record_dim,))
+            complete.long_name = "whether the %s stresses have been written" % (stress_name,)
+            complete[:] = numpy.zeros(len(coords[record_dim][0]), dtype=numpy.int8)
+        nc_out.parameter_hash = param_hash
+
+        return(nc_out)
+
+    def parameter_hash(self, coords, output):
+        """
+        A hash of everything which determines the contents of the netCDF file
+        written by L{write_netcdf}: the satellites and stresses, the grid
+        coordinates (see L{coordinates}), and the layout of the file (see
+        L{NetCDFOutput}).  If a run is interrupted, it can only be resumed
+        with the same parameters.
 
-        Tpp_Diurnal = nc_out.createVariable('Tpp_Diurnal', 'f4', ('time', 'latitude', 'longitude',))
-        Tpp_Diurnal.units = "Pa"
-        Tpp_Diurnal.long_name = "east-west component of Diurnal eccentricity stresses"
+        """
+        import hashlib
+
+        param_hash = hashlib.sha1()
+        for dim_name in sorted(coords):
+            values, units, long_name = coords[dim_name]
+            param_hash.update(dim_name)
+            param_hash.update(units)
+            param_hash.update(values.tostring())
+        for stress in self.stresscalc.stresses:
+            param_hash.update(repr((stress.__name__, stress.satellite.snapshot(), stress.love_tol)))
+        param_hash.update(repr(ss.love_solver))
+        param_hash.update(repr(sorted(vars(output).items())))
 
-        # NSR:
-        Ttt_NSR = nc_out.createVariable('Ttt_NSR', 'f4', ('nsr_period', 'latitude', 'longitude',))
-        Ttt_NSR.units = "Pa"
-        Ttt_NSR.long_name = "north-south component of NSR stresses"
+        return(param_hash.hexdigest())
+
+# }}}
 
-        Tpt_NSR = nc_out.createVariable('Tpt_NSR', 'f4', ('nsr_period', 'latitude', 'longitude',))
-        Tpt_NSR.units = "Pa"
-        Tpt_NSR.long_name = "shear component of NSR stresses"
+def calc_slab(job, slab): #{{{
+    """
+    Calculate one lat-lon slab of a L{GridCalc}, for L{GridCalc.write_netcdf}.
 
-        Tpp_NSR = nc_out.createVariable('Tpp_NSR', 'f4', ('nsr_period', 'latitude', 'longitude',))
-        Tpp_NSR.units = "Pa"
-        Tpp_NSR.long_name = "east-west component of NSR stresses"
+    job is made up of the L{Diurnal} stresses, the symmetry of the lat-lon
+    grid and the Diurnal harmonics at the distinct points of the grid, the
+    satellite (without eccentricity) and Love number tolerance to construct
+    the L{NSR} stresses from, and the co-latitudes and longitudes of the grid.
 
-        # Get the StressDef objects corresponding to Diurnal and NSR stresses:
-        for stress in self.stresscalc.stresses:
-            if stress.__name__ is 'Diurnal':
-                diurnal_stress = ss.StressCalc([stress,])
-            if stress.__name__ is 'NSR':
-                nsr_stress = ss.StressCalc([stress,])
+    slab is either ('Diurnal', n, time), for the Diurnal stresses at the given
+    time in seconds, or ('NSR', n, nsr_period), for the NSR stresses with the
+    given NSR period.
 
-        # Loop over the time variable, doing diurnal calculations over an orbit  
-        for t in range(len(times[:])):
-            # We need some kind of progress update, and we need to make sure that
-            # we have a representation of the time coordinate in seconds, because
-            # that's what the satstress library expects - even if we're ultimately
-            # communicating time to the user in terms of "degrees after periapse"
-            if self.grid.orbit_min is None:
-                time_sec = times[t]
+    Returns the three components of the stress tensor, each with the shape of
+    the lat-lon grid.
+
+    Raises ValueError if the slab is of any other stress.
+
+    """
+    diurnal_stress, diurnal_symmetry, diurnal_harmonics, nsr_sat, nsr_love_tol, thetas, phis = job
+    stress_name, n, x = slab
+
+    if stress_name == 'Diurnal':
+        Ttt, Tpt, Tpp = diurnal_stress.tensor_from_harmonics(diurnal_harmonics, x)
+        return(diurnal_symmetry.expand(Ttt), diurnal_symmetry.expand(Tpt, parity=-1), diurnal_symmetry.expand(Tpp))
+
+    # Construct the NSR stresses for the nsr_period being considered.  If the
+    # original NSR stress was given a Love number tolerance, the Love numbers
+    # are interpolated from a table built once for the whole sweep.  The NSR
+    # stresses are calculated over the whole lat-lon grid at once (see
+    # L{satstress.StressCalc.tensor_grid}):
+    if stress_name != 'NSR':
+        raise ValueError("GridCalc can only calculate slabs of the Diurnal and NSR stresses, not %r" % (stress_name,))
+    nsr_stress = ss.StressCalc([ss.NSR(nsr_sat.replace(nsr_period=x), love_tol=nsr_love_tol),])
+    Ttt, Tpt, Tpp = nsr_stress.tensor_grid(thetas, phis, 0.0)
+    return(Ttt[0], Tpt[0], Tpp[0])
+#}}}
+
+# The work shared by the worker processes of L{GridCalc.write_netcdf}, set by
+# L{_sweep_init}:
+_sweep_job = None
+
+def _sweep_init(job): #{{{
+    """
+    Set up a worker process for L{GridCalc.write_netcdf}.
+    """
+    global _sweep_job
+    _sweep_job = job
+#}}}
+
+def _sweep_slab(slab): #{{{
+    """
+    Calculate one slab of a L{GridCalc} in a worker process (see
+    L{calc_slab}).
+    """
+    return(calc_slab(_sweep_job, slab))
+#}}}
+
+class GridCube(object): # {{{
+    """
+    The results of a L{GridCalc}, held in memory (see L{GridCalc.compute}).
+
+    A C{GridCube} looks like the netCDF C{Dataset} which L{GridCalc.write_netcdf}
+    would create, with the same C{dimensions} (though here they are simply
+    lengths) and coordinate and stress C{variables}, so that code written to
+    read gridcalc output can be given either.  The coordinate variables (C{latitude}, C{longitude}, C{time} and
+    C{nsr_period}) are calculated up front.  The stress variables
+    (C{Ttt_Diurnal}, C{Tpt_NSR}, etc.) are L{GridCubeVariable} objects, which
+    calculate the stresses only when they are indexed, one whole lat-lon
+    slab (i.e. one time slice, or one NSR period) at a time.  Each slab is
+    cached once it has been calculated, so asking for it again, or for
+    another of its tensor components, costs nothing.  Unlike the netCDF
+    file, the stresses are kept in double precision.
+
+    @ivar dimensions: the length of each of the dimensions of the grid.
+    @type dimensions: dict
+    @ivar variables: the coordinate and stress variables, keyed by name.
+    @type variables: dict
+
+    """
+
+    def __init__(self, gridcalc):
+        """
+        Set up the (lazy) calculation of the stresses on gridcalc's grid.
+
+        """
+        self.gridcalc = gridcalc
+        self.grid_id = gridcalc.grid.grid_id
+        self.system_id = gridcalc.grid.satellite.system_id
+
+        coords = gridcalc.coordinates()
+        self.job, slabs = gridcalc.slab_job(coords)
+        self.slabs = {}
+        for slab in slabs:
+            self.slabs[slab[:2]] = slab
+        self.cache = {}
+
+        self.dimensions = {}
+        self.variables = {}
+        for dim_name in coords:
+            values, units, long_name = coords[dim_name]
+            self.dimensions[dim_name] = len(values)
+            self.variables[dim_name] = GridCubeVariable(self, dim_name, (dim_name,), units, long_name, data=values)
+
+        for stress_name, record_dim, description in (('Diurnal', 'time', "Diurnal eccentricity stresses"),\
+                                                     ('NSR', 'nsr_period', "NSR stresses")):
+            for component, (prefix, direction) in enumerate((('Ttt', "north-south"), ('Tpt', "shear"), ('Tpp', "east-west"))):
+                name = "%s_%s" % (prefix, stress_name)
+                self.variables[name] = GridCubeVariable(self, name, (record_dim, 'latitude', 'longitude'), "Pa",\
+                                                        "%s component of %s" % (direction, description),\
+                                                        stress_name=stress_name, component=component)
+
+    def tensor(self, stress_name, n):
+        """
+        The three components (Ttt, Tpt, Tpp) of the stresses named stress_name
+        ('Diurnal' or 'NSR') at index n of the time or NSR period dimension,
+        each with the shape of the lat-lon grid.  They're calculated if they
+        haven't been already.
+
+        """
+        key = (stress_name, n)
+        if key not in self.cache:
+            self.cache[key] = calc_slab(self.job, self.slabs[key])
+        return(self.cache[key])
+
+# }}}
+
+class GridCubeVariable(object): # {{{
+    """
+    One of the variables of a L{GridCube}, which can be indexed like a
+    numpy array, or a netCDF variable.
+
+    @ivar dimensions: the names of the dimensions of the variable.
+    @type dimensions: tuple
+    @ivar shape: the lengths of the dimensions of the variable.
+    @type shape: tuple
+
+    """
+
+    def __init__(self, cube, name, dimensions, units, long_name, data=None, stress_name=None, component=None):
+        """
+        Either data holds the values of the variable, or they are component
+        (0, 1, or 2 for Ttt, Tpt, Tpp) of the stresses named stress_name,
+        which the cube calculates.
+
+        """
+        self.cube = cube
+        self.name = name
+        self.dimensions = dimensions
+        self.shape = tuple([ cube.dimensions[dim_name] for dim_name in dimensions ])
+        self.units = units
+        self.long_name = long_name
+        self.data = data
+        self.stress_name = stress_name
+        self.component = component
+
+    def __len__(self):
+        return(self.shape[0])
+
+    def __getitem__(self, key):
+        """
+        Return the values of the variable at key, calculating whichever
+        slabs of the stresses are needed.
+
+        """
+        if self.data is not None:
+            return(self.data[key])
+
+        if not isinstance(key, tuple):
+            key = (key,)
+
+        # Work out which slabs are wanted along the first dimension, and
+        # index the rest of the way into each of them:
+        slab_n = numpy.arange(self.shape[0])[key[0]]
+        if slab_n.ndim == 0:
+            return(self.cube.tensor(self.stress_name, int(slab_n))[self.component][key[1:]])
+
+        return(numpy.array([ self.cube.tensor(self.stress_name, int(n))[self.component][key[1:]] for n in slab_n ]))
+
+# }}}
+
+class NetCDFOutput(object): # {{{
+    """
+    Describes how the results of a L{GridCalc} are laid out in a netCDF file.
+
+    By default, the stresses are written to a classic netCDF3 file as
+    uncompressed single precision floating point values.  Writing a netCDF4
+    (HDF5) file instead allows the stress variables to be chunked, compressed
+    and packed:
+
+      - Each chunk holds C{chunk_slices} whole lat-lon slabs, i.e. time slices
+        of the L{Diurnal} stresses, or NSR periods of the L{NSR} stresses, so
+        that reading back one slice only means decompressing that slice.
+
+      - The chunks are compressed with zlib (deflate) at the given
+        C{complevel} (0 for no compression), after shuffling the bytes of the
+        values, which puts their slowly varying high order bytes together.
+
+      - If C{pack} is set, the stresses are stored with only as much precision
+        as C{pack_error} (in Pa) requires, and the largest error that can
+        result is recorded in the C{packing_error} attribute of each stress
+        variable.  With C{pack='quantize'} they remain single precision
+        floats, but are rounded to a multiple of the largest power of two no
+        bigger than twice C{pack_error}.  The low order bits of the mantissas
+        are then zero, and compress away, much as if they'd been stored at
+        half precision, which netCDF doesn't provide, but without the limited
+        range.  Single precision floats only hold multiples of that step
+        exactly up to 2**24 times it, beyond which rounding them would add to
+        the packing error, so larger stresses can't be quantized.  With
+        C{pack='i2'} or C{pack='i4'}, the stresses are stored as 16 or 32 bit
+        integers, with a double precision C{scale_factor} of twice
+        C{pack_error} (as in the CF conventions), and so 16 bit integers can
+        only hold stresses up to 32767 times that scale factor.
+
+    @ivar format: either 'NETCDF3' or 'NETCDF4'
+    @type format: str
+    @ivar chunk_slices: the number of slices along the time or NSR period
+    axis in each chunk of the stress variables.
+    @type chunk_slices: int
+    @ivar complevel: the zlib compression level, between 0 and 9.
+    @type complevel: int
+    @ivar shuffle: whether to shuffle the bytes of the values before
+    compressing them.
+    @type shuffle: bool
+    @ivar pack: None, 'quantize', 'i2' or 'i4'
+    @type pack: str
+    @ivar pack_error: the largest error allowed in packing the stresses [Pa]
+    @type pack_error: float
+
+    """
+
+    def __init__(self, format='NETCDF3', chunk_slices=1, complevel=4, shuffle=True, pack=None, pack_error=None):
+        """
+        Check that the requested layout makes sense, and store it.
+
+        @raise OutputFormatError: if the format or packing is unknown, if
+        packing is requested without a packing error, or if chunking,
+        compression or packing are requested in a netCDF3 file.
+
+        """
+
+        if format not in ('NETCDF3', 'NETCDF4'):
+            raise OutputFormatError("unknown netCDF format %s" % (format,))
+        if pack not in (None, 'quantize', 'i2', 'i4'):
+            raise OutputFormatError("unknown packing %s" % (pack,))
+        if pack is not None and (pack_error is None or pack_error <= 0):
+            raise OutputFormatError("packing the stresses requires a positive packing error")
+        if format == 'NETCDF3' and (pack is not None or chunk_slices != 1):
+            raise OutputFormatError("netCDF3 files can't be chunked or packed")
+        if chunk_slices < 1 or not 0 <= complevel <= 9:
+            raise OutputFormatError("chunk_slices must be at least 1, and complevel between 0 and 9")
+
+        self.format       = format
+        self.chunk_slices = chunk_slices
+        self.complevel    = complevel
+        self.shuffle      = shuffle
+        self.pack         = pack
+        self.pack_error   = pack_error
+
+    def dataset(self, outfile, mode='w'):
+        """
+        Create the netCDF file named outfile, replacing any existing file, or
+        if mode is 'a' or 'r', open it to be added to or read, and return the
+        C{Dataset} object representing it.
+
+        """
+        if self.format == 'NETCDF3':
+            return(netCDF3.Dataset(outfile, mode))
+
+        import netCDF4
+        if mode == 'w':
+            return(netCDF4.Dataset(outfile, mode, format='NETCDF4'))
+
+        # Reopening the file turns automatic scaling back on for the stress
+        # variables, which would scale the integers we've already packed (see
+        # L{write_slab}) a second time:
+        nc_out = netCDF4.Dataset(outfile, mode)
+        if mode == 'a' and self.pack in ('i2', 'i4'):
+            for var in nc_out.variables.values():
+                if 'scale_factor' in var.ncattrs():
+                    var.set_auto_maskandscale(False)
+        return(nc_out)
+
+    def stress_variable(self, nc_out, name, dims, shape, long_name):
+        """
+        Create the variable called name within nc_out, which will hold one of
+        the components of a stress tensor, having the given dimensions, with
+        lengths shape.
+
+        """
+        if self.format == 'NETCDF3':
+            var = nc_out.createVariable(name, 'f4', dims)
+        else:
+            if self.pack in ('i2', 'i4'):
+                datatype = self.pack
             else:
-                time_sec = diurnal_stress.stresses[0].satellite.orbit_period()*(times[t]/360.0)
+                datatype = 'f4'
+            var = nc_out.createVariable(name, datatype, dims,\
+                                        zlib = self.complevel > 0,\
+                                        complevel = self.complevel,\
+                                        shuffle = self.shuffle,\
+                                        chunksizes = (min(self.chunk_slices, shape[0]),) + tuple(shape[1:]))
+
+            if self.pack == 'quantize':
+                var.packing_error = self.quantum()/2.0
+            elif self.pack is not None:
+                # We pack the values ourselves (see L{write_slab}), but readers
+                # will unpack them according to the scale factor:
+                var.set_auto_maskandscale(False)
+                # In double precision, so that unpacking adds no error of its
+                # own:
+                var.scale_factor = numpy.float64(2.0*self.pack_error)
+                var.add_offset = numpy.float64(0.0)
+                var.packing_error = self.pack_error
+
+        var.units = "Pa"
+        var.long_name = long_name
+        return(var)
+
+    def quantum(self):
+        """
+        The step to which the stresses are rounded when packing them.
 
-            print "Calculating Diurnal stresses at", times[t], times.long_name
+        """
+        if self.pack == 'quantize':
+            return(2.0**numpy.floor(numpy.log2(2.0*self.pack_error)))
+        else:
+            return(2.0*self.pack_error)
 
-            for lon in range(len(lons[:])):
-                for lat in range(len(lats[:])):
+    def write_slab(self, var, n, slab):
+        """
+        Write the lat-lon slab of stresses into the stress variable var (see
+        L{stress_variable}) at index n along its first dimension, packing
+        them if necessary.
 
-                    Tau_D = diurnal_stress.tensor(theta = scipy.radians(90.0-lats[lat]),\
-                                                    phi = scipy.radians(lons[lon]),\
-                                                      t = time_sec )
+        @raise PackingRangeError: if the stresses are too large to be packed
+        into the integers of var, or to be quantized without single precision
+        rounding adding to the packing error.
 
-                    nc_out.variables['Ttt_Diurnal'][t,lat,lon] = Tau_D[0,0]
-                    nc_out.variables['Tpt_Diurnal'][t,lat,lon] = Tau_D[1,0]
-                    nc_out.variables['Tpp_Diurnal'][t,lat,lon] = Tau_D[1,1] 
+        """
+        if self.pack is not None:
+            slab = numpy.around(slab/self.quantum())
+            if self.pack == 'quantize':
+                # The largest multiple of the quantum a single precision float
+                # holds exactly:
+                limit = 2**(numpy.finfo(numpy.float32).nmant+1)
+            else:
+                limit = numpy.iinfo(self.pack).max
+            if numpy.abs(slab).max() > limit:
+                raise PackingRangeError(var.long_name, numpy.abs(slab).max()*self.quantum(), limit*self.quantum())
 
-        # Make sure everything gets written out to the file.
-        nc_out.sync()
-
-        # Change the satellite's eccentricity to zero to exclude the Diurnal
-        # stresses for the purposes of calculating the NSR stresses:
-        nsr_stress.stresses[0].satellite.orbit_eccentricity = 0.0
-
-        # Loop over all the prescribed values of NSR_PERIOD, and do the NSR stress calculation
-        # at each point on the surface.
-        for p_nsr in range(len(nsr_periods[:])):
-        
-            # Adjust the properties of the Satellite and StressDef objects
-            # for the nsr_period being considered:
-            new_sat = nsr_stress.stresses[0].satellite
-            new_sat.nsr_period = nsr_periods[p_nsr]
-            nsr_stress = ss.StressCalc([ss.NSR(new_sat),])
-
-            print "Calculating NSR stresses for Pnsr = %g %s" % (nsr_periods[p_nsr], nsr_periods.units,)
-            for lon in range(len(lons[:])):
-                for lat in range(len(lats[:])):
-                    Tau_N = nsr_stress.tensor(theta = scipy.radians(90-lats[lat]),\
-                                                phi = scipy.radians(lons[lon]),\
-                                                  t = 0 )
-
-                    nc_out.variables['Ttt_NSR'][p_nsr,lat,lon] = Tau_N[0,0]
-                    nc_out.variables['Tpt_NSR'][p_nsr,lat,lon] = Tau_N[1,0]
-                    nc_out.variables['Tpp_NSR'][p_nsr,lat,lon] = Tau_N[1,1] 
+            if self.pack == 'quantize':
+                slab = slab*self.quantum()
+            else:
+                slab = slab.astype(self.pack)
 
-        # Make sure everything gets written out to the file.
-        nc_out.sync()
+        var[n,:,:] = slab
 
 # }}}
 
@@ -530,6 +1055,53 @@ class GridParamError(Error):
     """Base class for errors in L{Grid} object specifications."""
     pass
 
+class OutputFormatError(Error):
+    """Indicates that a L{NetCDFOutput} was given an impossible layout."""
+
+    def __init__(self, problem):
+        """Stores a description of what's wrong with the layout."""
+        self.problem = problem
+
+    def __str__(self):
+        return("Bad netCDF output format: %s" % (self.problem,))
+
+class PackingRangeError(Error):
+    """Indicates that stresses were too large to be packed into integers of
+    the requested size, or to be quantized to the requested precision."""
+
+    def __init__(self, long_name, stress, limit):
+        """Stores the variable, the offending stress and the largest stress
+        which could be packed."""
+        self.long_name = long_name
+        self.stress = stress
+        self.limit = limit
+
+    def __str__(self):
+        return("""
+The %s reach %g Pa, but with the requested packing error, no stresses larger
+than %g Pa can be stored.  Use a larger packing error, or if packing into 16
+bit integers, 32 bit ones.
+""" % (self.long_name, self.stress, self.limit))
+
+class ResumeMismatchError(Error):
+    """Indicates that an interrupted calculation can't be resumed, because it
+    was started with different parameters."""
+
+    def __init__(self, outfile):
+        """Stores the name of the file holding the interrupted calculation."""
+        self.outfile = outfile
+
+    def __str__(self):
+        return("""
+The calculation in the file:
+
+%s
+
+was started with a different satellite, grid, or output format, and can't be
+resumed with these ones.  Either use the original parameters, or start again
+with a new file.
+""" % (self.outfile,))
+
 class MissingDimensionError(GridParamError):
     """Indicates that no time or orbital location dimension was specified in
     the file defining the calculation grid."""
@@ -461,10 +461,11 @@ class Lineament(object): #{{{1
         calc_phis = repeat(self.bs,nsegs) + tile(mp_lons,nb)
 
         # use SatStress to perform the stress calculations at those locations
-        tens_mag, tens_az, comp_mag, comp_az = stresscalc.principal_components(calc_thetas, calc_phis, 0.0)
+        # (only the difference between the principal stresses is needed)
+        stress_diff = stresscalc.principal_components(calc_thetas, calc_phis, 0.0, 'stress_diff')
 
         # Create an (nsegs*nb) length array of w_stress values
-        w_stress = (tens_mag - comp_mag)/stresscalc.mean_global_stressdiff()
+        w_stress = stress_diff/stresscalc.mean_global_stressdiff()
 
         self.nsrstresswts = ((tile(w_length,nb)*w_stress)).reshape(nb,nsegs).sum(axis=1)
 
@@ -612,7 +613,7 @@ class Lineament(object): #{{{1
 ################################################################################
 # Helpers having to do with fit metrics or lineament generation.
 ################################################################################
-def lingen_nsr(stresscalc, init_lon=None, init_lat=None, max_length=2*pi, prop_dir="both", seg_len=0.01, num_subsegs=10): # {{{
+def lingen_nsr(stresscalc, init_lon=None, init_lat=None, max_length=2*pi, prop_dir="both", seg_len=0.01, num_subsegs=10, step_tol=None): # {{{
     """
     Generate a synthetic NSR feature, given a starting location, maximum
     length, propagation direction, and a step size on the surface.
@@ -620,6 +621,12 @@ def lingen_nsr(stresscalc, init_lon=None, init_lat=None, max_length=2*pi, prop_d
     Assumes tensile fracture, perpendictular to the most tensile principal
     component of the stresses.
 
+    If step_tol is given, the steps are no longer all seg_len long.  Instead,
+    seg_len is the longest step taken, and each step is short enough that
+    the feature strays no further than step_tol (in radians) from the true
+    fracture trajectory over its length, judging by how fast the fracture is
+    turning (see L{nsr_step}).
+
     """
 
 
@@ -633,11 +640,14 @@ def lingen_nsr(stresscalc, init_lon=None, init_lat=None, max_length=2*pi, prop_d
 
     lons = array([init_lon,])
     lats = array([init_lat,])
-    # Calculate the stresses at the given time and initial location
-    (tens_mag, tens_az, comp_mag, comp_az) = stresscalc.principal_components(theta=(pi/2.0)-lats[0], phi=lons[0], t=0.0)
+    # Calculate the stresses at the given time and initial location.  We only
+    # need the tensile magnitude (to see if we fracture) and the compressive
+    # azimuth (the direction in which the fracture propagates), and we visit
+    # the points one at a time, so the single point calculation is used:
+    (tens_mag, tens_az, comp_mag, comp_az) = stresscalc.point_principal_components(theta=(pi/2.0)-lats[0], phi=lons[0], t=0.0)
 
     lin_length = 0.0
-    ice_strength = stresscalc.stresses[0].satellite.layers[-1].tensile_str
+    ice_strength = stresscalc.surface_tensile_str()
 
     # This can't be vectorized because we don't know where we'll end up until
     # we get there.
@@ -655,7 +665,11 @@ def lingen_nsr(stresscalc, init_lon=None, init_lat=None, max_length=2*pi, prop_d
         # feature, the great-circle segment making up the feature is broken down into many
         # pieces.  This is done by passing in a list of distances to spherical reckon, instead
         # of just a single distance, with the linspace(0,seg_len,num_subsegs).
-        newlons, newlats = spherical_reckon(lons[-1], lats[-1], prop_az, linspace(0,seg_len,num_subsegs))
+        if step_tol is None:
+            step = seg_len
+        else:
+            step = nsr_step(stresscalc, lons[-1], lats[-1], prop_az, seg_len, step_tol)
+        newlons, newlats = spherical_reckon(lons[-1], lats[-1], prop_az, linspace(0,step,num_subsegs))
 
         # Make sure that our new longitude is within 2*pi in longitude of the
         # previous point in the feature, i.e. don't allow any big
@@ -668,10 +682,10 @@ def lingen_nsr(stresscalc, init_lon=None, init_lat=None, max_length=2*pi, prop_d
         lons = concatenate([lons,newlons])
         lats = concatenate([lats,newlats])
 
-        lin_length += seg_len
+        lin_length += step
 
         # Calculate the stresses at the new location
-        (tens_mag, tens_az, comp_mag, comp_az) = stresscalc.principal_components(theta=(pi/2.0)-lats[-1], phi=lons[-1], t=0.0)
+        (tens_mag, tens_az, comp_mag, comp_az) = stresscalc.point_principal_components(theta=(pi/2.0)-lats[-1], phi=lons[-1], t=0.0)
 
     # if we only got a single point, then we failed to initiate a fracture, and
     # should not even try to make the second part.
@@ -684,15 +698,21 @@ def lingen_nsr(stresscalc, init_lon=None, init_lat=None, max_length=2*pi, prop_d
         first_part = Lineament(lons=lons, lats=lats, stresscalc=stresscalc)
         length_to_trim = first_part.length - max_length
 
-        if length_to_trim > 0:
+        if length_to_trim > 0 and step_tol is None:
             subseg_len = seg_len/num_subsegs
             nv2t = np.int(length_to_trim/subseg_len)
             if nv2t > 0:
                 lons = first_part.lons[:-nv2t]
                 lats = first_part.lats[:-nv2t]
+        elif length_to_trim > 0:
+            # The vertices aren't evenly spaced, so keep the shortest part of
+            # the feature that is at least max_length long:
+            nv2k = searchsorted(cumsum(first_part.seg_lengths()), max_length) + 2
+            lons = first_part.lons[:nv2k]
+            lats = first_part.lats[:nv2k]
 
         if not done:
-            second_part = lingen_nsr(stresscalc, init_lon=init_lon, init_lat=init_lat, max_length=max_length, prop_dir="west", seg_len=seg_len, num_subsegs=num_subsegs)
+            second_part = lingen_nsr(stresscalc, init_lon=init_lon, init_lat=init_lat, max_length=max_length, prop_dir="west", seg_len=seg_len, num_subsegs=num_subsegs, step_tol=step_tol)
             # the second_part lat/lon arrays are in reversed order here to preserve
             # the overall directionality of the vertices (see Numpy fancy slicing).
             # also, we don't want to include the midpoint twice, so we only use up through the
@@ -704,6 +724,33 @@ def lingen_nsr(stresscalc, init_lon=None, init_lat=None, max_length=2*pi, prop_d
 
 #}}} end lingen_nsr
 
+def nsr_step(stresscalc, lon, lat, prop_az, max_step, step_tol): #{{{
+    """
+    Choose how far a synthetic NSR feature may go in a straight (great
+    circle) line, setting out from (lon, lat) with the heading prop_az, such
+    that it strays no further than step_tol from the fracture trajectory it
+    is following.
+
+    The fracture turns away from the great circle at a rate which follows
+    from the gradient of the principal stress azimuth (see
+    L{satstress.StressCalc.point_principal_gradients}), less the turning of
+    the great circle's own heading, and so after a step of length ds has
+    strayed by about half that rate times ds squared.  The step is never
+    longer than max_step, or shorter than one hundredth of it.
+
+    """
+    (dtens, dtens_az, dcomp, (daz_dtheta, daz_dphi)) = stresscalc.point_principal_gradients(theta=(pi/2.0)-lat, phi=lon, t=0.0)
+
+    # How fast the fracture turns, relative to a great circle, per unit
+    # distance along it:
+    turn_rate = -cos(prop_az)*daz_dtheta + sin(prop_az)*daz_dphi/cos(lat) - sin(prop_az)*tan(lat)
+    if turn_rate == 0.0:
+        return(max_step)
+
+    return(min(max_step, max(sqrt(2.0*step_tol/abs(turn_rate)), max_step/100.0)))
+
+#}}} end nsr_step
+
 def lingen_nsr_library(nlats=36): #{{{
     """
     Create a regularaly spaced "grid" of synthetic NSR lineaments, for use in
@@ -844,7 +891,112 @@ def mhd_by_lat(init_lat, init_lon, stresscalc, seg_len, num_subsegs, lin, max_le
 
 #}}} end mhd_by_lat()
 
-def best_nsr_init_points(lin, stresscalc=None, seg_len=0.01, num_subsegs=10): #{{{
+def mhd_by_lat_gradient(init_lat, init_lon, stresscalc, seg_len, num_subsegs, lin, max_length, lonshift): #{{{
+    """
+    Like L{mhd_by_lat}, but also returns the derivative of the MHD with
+    respect to init_lat, for use with gradient based optimizers.
+
+    The derivative is a central difference of L{mhd_by_lat}, taken over one
+    vertex spacing (seg_len/num_subsegs) to either side of init_lat.  The MHD
+    is jagged on scales smaller than that, because the features are made of
+    discrete points, so a narrower difference would follow the jaggedness
+    rather than the slope.  Where no fracture forms, the MHD is still the
+    distance from the lineament to the initiation point, and so still has a
+    slope to follow.
+
+    """
+    init_lat = float(atleast_1d(init_lat)[0])
+    h = seg_len/num_subsegs
+
+    value = mhd_by_lat(init_lat, init_lon, stresscalc, seg_len, num_subsegs, lin, max_length, lonshift)
+    value_n = mhd_by_lat(init_lat+h, init_lon, stresscalc, seg_len, num_subsegs, lin, max_length, lonshift)
+    value_s = mhd_by_lat(init_lat-h, init_lon, stresscalc, seg_len, num_subsegs, lin, max_length, lonshift)
+
+    return(value, array([(value_n - value_s)/(2.0*h),]))
+
+#}}} end mhd_by_lat_gradient()
+
+def vertex_search(func, x0, args=(), lo=-pi/2.0, hi=pi/2.0, xtol=1e-6, maxiter=50): #{{{
+    """
+    Find the minimum of a function of one variable which, like the MHD as a
+    function of initiation latitude, comes to a sharp point rather than a
+    smooth bottom, starting the search at x0, and staying within [lo, hi].
+
+    func(x, *args) must return both the value of the function and its
+    derivative, as L{mhd_by_lat_gradient} does.  Going downhill from x0, the
+    search first finds a point beyond the minimum, where the derivative has
+    changed sign, and then repeatedly takes the point where the tangent lines
+    at either side of the minimum cross, which is exactly where the minimum
+    is, if the function is made of two straight lines.  Gradient based
+    optimizers which expect a smooth minimum have trouble with such
+    functions.
+
+    """
+    f0, g0 = func(x0, *args)
+    g0 = atleast_1d(g0)[0]
+
+    # A derivative of exactly zero says nothing about which way the minimum
+    # lies, so look a little way to either side, and only stop if neither
+    # is any lower:
+    if g0 == 0.0:
+        f_lo = func(max(x0 - 10*xtol, lo), *args)[0]
+        f_hi = func(min(x0 + 10*xtol, hi), *args)[0]
+        if min(f_lo, f_hi) >= f0:
+            return(x0)
+        elif f_lo < f_hi:
+            g0 = 1.0
+        else:
+            g0 = -1.0
+
+    # Head downhill, at first as far as the tangent line says we'd need to go
+    # to reach zero, doubling the step until we get past the minimum:
+    step = max(abs(f0/g0), 10*xtol)
+    while True:
+        x1 = clip(x0 - sign(g0)*step, lo, hi)
+        f1, g1 = func(x1, *args)
+        g1 = atleast_1d(g1)[0]
+        if sign(g1) != sign(g0):
+            break
+        if x1 == lo or x1 == hi:
+            return(x1)
+        x0, f0, g0 = x1, f1, g1
+        step = 2*step
+
+    if g0 < 0:
+        (a, fa, ga), (b, fb, gb) = (x0, f0, g0), (x1, f1, g1)
+    else:
+        (a, fa, ga), (b, fb, gb) = (x1, f1, g1), (x0, f0, g0)
+
+    # Where the function isn't quite made of straight lines, the crossing
+    # points can keep landing on the same side of the minimum, so if that
+    # happens twice running, we bisect instead:
+    last_side = 0
+    for N in range(maxiter):
+        if b - a < xtol:
+            break
+        x = (fb - fa + ga*a - gb*b)/(ga - gb)
+        if last_side == 2 or last_side == -2 or not a < x < b:
+            x = (a + b)/2.0
+        fx, gx = func(x, *args)
+        gx = atleast_1d(gx)[0]
+        if gx == 0.0:
+            return(x)
+        elif gx < 0:
+            a, fa, ga = x, fx, gx
+            last_side = min(last_side, 0) - 1
+        else:
+            b, fb, gb = x, fx, gx
+            last_side = max(last_side, 0) + 1
+
+    # Return whichever end of the bracket is lower:
+    if fa < fb:
+        return(a)
+    else:
+        return(b)
+
+#}}} end vertex_search()
+
+def best_nsr_init_points(lin, stresscalc=None, seg_len=0.01, num_subsegs=10, method="brent"): #{{{
     """
     Given a lineament and a stresscalc object, find the best latitude at which
     to initiate tensile cracking when generating NSR doppelgangers.  Find one
@@ -854,9 +1006,19 @@ def best_nsr_init_points(lin, stresscalc=None, seg_len=0.01, num_subsegs=10): #{
     Also returns max_length, which is the target length for the doppelgangers,
     based on the length of the best fit great circle segment representing lin.
 
+    By default (method="brent") the latitude is found with Brent's
+    derivative-free search.  With method="gradient" the search instead
+    starts from the midpoint of the best fit great circle, and follows the
+    derivative of the MHD with respect to latitude (see
+    L{mhd_by_lat_gradient} and L{vertex_search}).  Any other method raises
+    ValueError.
+
     """
     from scipy.optimize import brent
 
+    if method not in ("brent", "gradient"):
+        raise ValueError("method must be \"brent\" or \"gradient\", not %r" % (method,))
+
     if stresscalc is None:
         stresscalc=lin.stresscalc
 
@@ -879,11 +1041,17 @@ def best_nsr_init_points(lin, stresscalc=None, seg_len=0.01, num_subsegs=10): #{
     # different latitudes, choosing the one which generates the best
     # doppelganger.
     
-    # Now we use the Brent scalar function optimizer to search to find the
-    # right latitude for each of those longitudes.
+    # Now we use an optimizer to search to find the right latitude for each
+    # of those longitudes.
     init_lats = []
     for b in lin.bs:
-        init_lats.append(brent(mhd_by_lat, args=(mp_lon, stresscalc, seg_len, num_subsegs, lin, max_length, b), full_output=1)[0])
+        args = (mp_lon, stresscalc, seg_len, num_subsegs, lin, max_length, b)
+        if method == "brent":
+            init_lats.append(brent(mhd_by_lat, args=args, full_output=1)[0])
+        else:
+            # The MHD is jagged on scales smaller than the spacing of the
+            # vertices, so there's no point looking much closer than that:
+            init_lats.append(vertex_search(mhd_by_lat_gradient, mp_lat, args=args, xtol=0.1*seg_len/num_subsegs))
 
     return(lin.bs+mp_lon, init_lats, max_length)
 #}}} end best_nsr_init_points
@@ -0,0 +1,711 @@
+"""
+Calculate the complex, frequency dependent Love numbers h2, k2 and l2 of a
+4-layer Maxwell satellite, in pure Python.
+
+This module is a translation of John Wahr's Love number code (itself built on
+Dahlen's program for computing Earth tides), which lives in
+C{satstress/love/john_wahr/love.f}, into vectorized NumPy.  The model is the
+same: a uniform elastic rocky core, a global liquid ocean, and an ice shell
+made of two Maxwell viscoelastic layers, which share their elastic properties
+and density, but not their viscosity.  The equations of motion are integrated
+outward from the center of the satellite on the same radial grid, using the
+same power series starting solution and the same Runge-Kutta-Shanks
+integration scheme, so the results agree with those of the Fortran code built
+in double precision to a few parts in a million.  The Fortran program as
+shipped works in single precision, and differs from both by its rounding
+error: about 2e-4 in the Diurnal Love numbers, but up to 1.4% in the NSR ones.
+
+Unlike the Fortran code, which reads a single parameter set from the file
+C{in.love}, L{love_numbers} accepts arrays of parameters, and calculates the
+Love numbers for all of them at once, without having to start another
+process, or write anything to disk.  This makes it practical to sweep through
+thousands of forcing periods (e.g. for NSR).
+
+The physical constants and unit conversions of the Fortran code (including
+its approximation of S{pi} when converting the forcing period to a
+frequency) are retained, so that the two can be compared directly.
+
+"""
+
+import numpy
+
+# Constants used by the Fortran code.  Note that the forcing frequency is
+# calculated with 3.14159, and the gravitational constant with a different
+# value of pi:
+__LOVE_PI__ = 3.1415926536
+__LOVE_G__  = 6.67e-11
+__FREQ_PI__ = 3.14159
+
+# Tolerance used in choosing the integration step sizes, and in truncating
+# the power series starting solution:
+__LOVE_EPS__ = 1.0e-8
+
+# The only spherical harmonic degree we care about:
+__L__ = 2
+
+# The largest number of (batch member, radial interval) pairs to integrate at
+# once:
+__BLOCK__ = 4096
+
+def love_numbers(rhobar, period, visc_upper, visc_lower,\
+                 E_core, nu_core, rho_core, E_ice, nu_ice, rho_ice,\
+                 thick_ocean, rho_ocean, vp_ocean, radius,\
+                 thick_upper, thick_lower, npts=165, kdis=(154,161,163)): #{{{
+    """
+    Calculate the degree 2 complex Love numbers of a 4-layer Maxwell satellite.
+
+    The parameters are the same, and in the same units, as those read by the
+    Fortran code from C{in.love} (see L{satstress.StressDef.love_input}).
+    Any of them may be arrays, in which case they are broadcast against each
+    other, and the Love numbers are calculated for every resulting parameter
+    set at once.  As in the Fortran code, the density of the rocky core is
+    only used to find its seismic velocities: the density actually assigned
+    to the core is whatever it takes to give the satellite the mean density
+    rhobar.
+
+    @param rhobar: mean density of the satellite [g/cm^3]
+    @param period: forcing period [days of 86400 s]
+    @param visc_upper: viscosity of the upper ice layer [Pa s]
+    @param visc_lower: viscosity of the lower ice layer [Pa s]
+    @param E_core: Young's modulus of the rocky core [Pa]
+    @param nu_core: Poisson's ratio of the rocky core
+    @param rho_core: density of the rocky core [g/cm^3]
+    @param E_ice: Young's modulus of the ice [Pa]
+    @param nu_ice: Poisson's ratio of the ice
+    @param rho_ice: density of the ice [g/cm^3]
+    @param thick_ocean: thickness of the ocean [km]
+    @param rho_ocean: density of the ocean [g/cm^3]
+    @param vp_ocean: P-wave velocity in the ocean [km/s]
+    @param radius: radius of the satellite [km]
+    @param thick_upper: thickness of the upper ice layer [km]
+    @param thick_lower: thickness of the lower ice layer [km]
+    @param npts: total number of radial nodes in the model.
+    @type npts: int
+    @param kdis: node numbers (counting from 1, as in the Fortran code) of the
+    core-ocean, ocean-ice, and lower-upper ice boundaries.
+    @type kdis: tuple
+
+    @return: the Love numbers (h2, k2, l2), each a complex array having the
+    broadcast shape of the input parameters.
+    @rtype: tuple
+    """
+
+    params = numpy.broadcast_arrays(*[ numpy.asarray(p, dtype=float) for p in\
+                (rhobar, period, visc_upper, visc_lower, E_core, nu_core,\
+                 rho_core, E_ice, nu_ice, rho_ice, thick_ocean, rho_ocean,\
+                 vp_ocean, radius, thick_upper, thick_lower) ])
+    shape = params[0].shape
+    params = [ p.ravel() for p in params ]
+
+    r, rho, vp, vs = _model(*(params+[npts, kdis]))
+    h2, k2, l2 = _loveno(r, rho, vp, vs, params[0]*1000.0, kdis)
+
+    return(h2.reshape(shape)[()], k2.reshape(shape)[()], l2.reshape(shape)[()])
+
+#}}} end love_numbers
+
+def _model(rhobar, period, visc_upper, visc_lower, E_core, nu_core, rho_core,\
+           E_ice, nu_ice, rho_ice, thick_ocean, rho_ocean, vp_ocean, radius,\
+           thick_upper, thick_lower, npts, kdis): #{{{
+    """
+    Construct the radial structure of the satellite on the calculation nodes.
+
+    The units are converted in the same way as the Fortran code does, and the
+    (complex) Maxwell seismic velocities of the ice layers are calculated at
+    the forcing frequency.
+
+    @return: radius [m], density [kg/m^3], and P- and S-wave velocities
+    [m/s] at each node, each an array of shape (nbatch, npts).
+    @rtype: tuple
+    """
+    k1, k2, k3 = kdis
+    nbatch = len(rhobar)
+
+    freq = 2.0*__FREQ_PI__/(period*86400.0)
+
+    # Elastic seismic velocities [cm/s]:
+    mu_core  = E_core/(2.0*(1.0+nu_core))
+    lam_core = (nu_core*E_core)/((1.0+nu_core)*(1.0-2.0*nu_core))
+    vp_c = 100.0*numpy.sqrt((2.0*mu_core+lam_core)/(1000.0*rho_core))
+    vs_c = 100.0*numpy.sqrt(mu_core/(1000.0*rho_core))
+
+    mu_ice  = E_ice/(2.0*(1.0+nu_ice))
+    lam_ice = (nu_ice*E_ice)/((1.0+nu_ice)*(1.0-2.0*nu_ice))
+    vp_i = 100.0*numpy.sqrt((2.0*mu_ice+lam_ice)/(1000.0*rho_ice))
+    vs_i = 100.0*numpy.sqrt(mu_ice/(1000.0*rho_ice))
+
+    # Maxwell solid: complex seismic velocities in each ice layer.  The
+    # viscosities are converted to cgs units:
+    def maxwell(visc):
+        tau = 10.0*visc/vs_i**2/rho_ice
+        iw = 1.0j*freq
+        return(vp_i*numpy.sqrt(1.0/(iw+1.0/tau))*numpy.sqrt(iw+1.0/tau*(1.0-4.0/3.0*(vs_i/vp_i)**2)),\
+               vs_i*numpy.sqrt(iw/(iw+1.0/tau)))
+
+    vp_upper, vs_upper = maxwell(visc_upper)
+    vp_lower, vs_lower = maxwell(visc_lower)
+
+    # Radii of the layer boundaries [cm], and the core density it takes to
+    # get the mean density right [g/cm^3]:
+    R      = radius*1.0e5
+    radc   = R - (thick_ocean + thick_upper + thick_lower)*1.0e5
+    radf   = radc + thick_ocean*1.0e5
+    radi   = radf + thick_lower*1.0e5
+    rho_c  = (rhobar*R**3 - rho_ocean*(radf**3-radc**3) - rho_ice*(R**3-radf**3))/radc**3
+
+    r   = numpy.zeros((nbatch, npts))
+    rho = numpy.zeros((nbatch, npts))
+    vp  = numpy.zeros((nbatch, npts), dtype=complex)
+    vs  = numpy.zeros((nbatch, npts), dtype=complex)
+
+    # Each layer's nodes are evenly spaced, and the first node of each layer
+    # above the core sits on the boundary below it, at the same radius as the
+    # last node of the layer underneath.
+    layers = ((0,  k1,   numpy.zeros(nbatch), radc, rho_c,     vp_c,     vs_c),\
+              (k1, k2,   radc,                radf, rho_ocean, vp_ocean*1.0e5, 0.0),\
+              (k2, k3,   radf,                radi, rho_ice,   vp_lower, vs_lower),\
+              (k3, npts, radi,                R,    rho_ice,   vp_upper, vs_upper))
+
+    for (n0, n1, r0, r1, rho_n, vp_n, vs_n) in layers:
+        if n0 == 0:
+            frac = numpy.arange(1, n1+1)/float(n1)
+        else:
+            frac = numpy.arange(n1-n0)/float(n1-n0-1)
+        r[:,n0:n1]   = r0[:,numpy.newaxis] + (r1-r0)[:,numpy.newaxis]*frac
+        rho[:,n0:n1] = numpy.reshape(rho_n, (-1,1))
+        vp[:,n0:n1]  = numpy.reshape(vp_n, (-1,1))
+        vs[:,n0:n1]  = numpy.reshape(vs_n, (-1,1))
+
+    # Convert to SI units:
+    return(r/100.0, rho*1000.0, vp/100.0, vs/100.0)
+
+#}}} end _model
+
+def _gravity(r, rho): #{{{
+    """
+    Calculate the gravitational acceleration at each node, integrating the
+    density (linearly interpolated between nodes) with Simpson's 3/8 rule, as
+    Dahlen's DG subroutine does.
+    """
+    dr  = numpy.diff(r, axis=1)
+    lo  = r[:,:-1]
+    rlo = rho[:,:-1]
+    drho = numpy.diff(rho, axis=1)
+
+    # Intervals of zero width (at layer boundaries) contribute nothing, and
+    # their density gradients are irrelevant:
+    safe_dr = numpy.where(dr > 0, dr, 1.0)
+    x = [ lo, lo+dr/3.0, lo+2.0*dr/3.0, lo+dr ]
+    y = [ (rlo + drho*(xk-lo)/safe_dr)*xk*xk for xk in x ]
+    dF = numpy.where(dr > 0, 0.125*dr*(y[0]+y[3]+3.0*(y[1]+y[2])), 0.0)
+
+    F = numpy.zeros(r.shape)
+    F[:,1:] = numpy.cumsum(dF, axis=1)
+    return(4.0*__LOVE_PI__*__LOVE_G__*F/(r*r))
+
+#}}} end _gravity
+
+def _steps(eps): #{{{
+    """
+    Calculate the maximum dimensionless step sizes for each order of
+    Runge-Kutta-Shanks integration which will achieve an accuracy of eps.
+    """
+    ps = numpy.log(eps)
+    step = numpy.zeros(8)
+    fac = 1.0
+    for n in range(1, 9):
+        fn = n+1.0
+        fac = fac*fn
+        x = numpy.exp((numpy.log(fac)+ps)/fn)
+        s = x
+        for i in range(n):
+            s = x*numpy.exp(-s/fn)
+        step[n-1] = s
+    return(step)
+
+#}}} end _steps
+
+__STEP__ = _steps(__LOVE_EPS__)
+
+# The Runge-Kutta-Shanks integration schemes of orders 1 through 8 (see Dahlen's
+# SHANKS subroutine).  For each order, the first list gives the positions of
+# the stages within the step, and the second the weights with which the
+# derivatives at each of the stages so far are combined to get the solution at
+# the next stage (or, for the last stage, at the end of the step), all as
+# fractions of the step size.
+_SHANKS = [
+    # order 1, 1 stage:
+    ([0.0],
+     [[1.0]]),
+    # order 2, 2 stages:
+    ([0.0, 1.0],
+     [[1.0],
+      [0.5, 0.5]]),
+    # order 3, 3 stages:
+    ([0.0, 0.5, 1.0],
+     [[0.5],
+      [-1.0, 2.0],
+      [0.1666666667, 0.6666666667, 0.1666666667]]),
+    # order 4, 4 stages:
+    ([0.0, 0.01, 0.6, 1.0],
+     [[0.01],
+      [-17.46122448979, 18.06122448979],
+      [59.69127516778, -60.53065635308, 1.839381185303],
+      [-2.5555555556, 2.853392683901, 0.5767419962335, 0.1254208754209]]),
+    # order 5, 6 stages:
+    ([0.0, 0.25, 0.25, 0.5, 0.75, 1.0],
+     [[0.25],
+      [0.125, 0.125],
+      [0.0, -0.5, 1.0],
+      [0.1875, 0.0, 0.0, 0.5625],
+      [-0.42857142857, 0.285714285714, 1.7142857143, -1.7142857143, 1.14285714286],
+      [0.077777777778, 0.0, 0.355555555556, 0.13333333333, 0.355555555556, 0.077777777778]]),
+    # order 6, 8 stages:
+    ([0.0, 0.1111111111, 0.1666666667, 0.3333333333, 0.5, 0.6666666667, 0.8333333333, 1.0],
+     [[0.1111111111],
+      [0.04166666667, 0.125],
+      [0.1666666667, -0.5, 0.6666666667],
+      [-0.625, 3.375, -3.0, 0.75],
+      [24.55555556, -109.0, 96.33333333, -11.33333333, 0.1111111111],
+      [-3.8125, 14.125, -9.833333333, -1.375, 1.666666667, 0.0625],
+      [8.731707317, -25.35365854, 12.21951219, 10.17073171, -5.536585366, -0.1097560976, 0.8780487805],
+      [0.04880952381, 0.0, 0.2571428571, 0.03214285714, 0.3238095238, 0.03214285714, 0.2571428571, 0.04880952381]]),
+    # order 7, 9 stages:
+    ([0.0, 0.2222222222, 0.3333333333, 0.5, 0.1666666667, 0.8888888889, 0.1111111111, 0.8333333333, 1.0],
+     [[0.2222222222],
+      [0.08333333333, 0.25],
+      [0.125, 0.0, 0.375],
+      [0.1064814814, 0.0, 0.09722222222, -0.03703703704],
+      [-5.673525377, 0.0, -18.63374486, 7.22085048, 17.97530864],
+      [0.693329904, 0.0, 1.991769547, -0.7105624143, -1.874643875, 0.01121794872],
+      [-0.5634259259, 0.0, -2.013888889, 1.261073318, 1.851282051, 0.05951726845, 0.2387755102],
+      [0.09356936416, 0.0, -0.4855491329, -0.08092485549, 2.761227212, -0.3964976497, -1.852251794, 0.9604268564],
+      [0.05148809524, 0.0, 0.0, 0.3587949466, 0.2967032967, -0.02758886522, -0.02758886522, 0.2967032967, 0.05148809524]]),
+    # order 8, 12 stages:
+    ([0.0, 0.11111111111, 0.16666666667, 0.25, 0.1, 0.16666666667, 0.5, 0.666666666667, 0.33333333333, 0.83333333333, 0.83333333333, 1.0],
+     [[0.11111111111],
+      [0.041666666667, 0.125],
+      [0.0625, 0.0, 0.1875],
+      [0.058, 0.0, 0.066, -0.024],
+      [0.033950617284, 0.0, 0.0, 0.0041152263374, 0.12860082305],
+      [-0.58333333333, 0.0, 0.0, 2.1111111111, 3.4722222222, -4.5],
+      [-0.12345678901, 0.0, 0.0, -0.1316872428, 0.51440329218, 0.0, 0.40740740741],
+      [3.6265432099, 0.0, 0.0, -10.666666667, -19.290123457, 26.0, 0.74691358025, -0.083333333333],
+      [0.90432098765, 0.0, 0.0, -2.6296296296, -4.2438271605, 5.6666666667, -0.36419753086, 0.5, 1.0],
+      [0.80432098765, 0.0, 0.0, -2.6296296296, -4.2438271605, 6.1666666667, 0.63580246914, 0.0, 0.0, 0.1],
+      [-1.9410569106, 0.0, 0.0, 6.9376693767, 11.009485095, -14.926829268, 0.085365853659, -0.16463414634, -0.43902439024, -0.29268292683, 0.73170731707],
+      [0.04880952381, 0.0, 0.0, 0.0, 0.0, 0.25714285714, 0.32380952381, 0.032142857143, 0.032142857143, 0.042857142857, 0.21428571429, 0.04880952381]]),
+]
+
+def _integrate(coef, q, x, y, f): #{{{
+    """
+    Integrate the linear system df/dx = A(x) f from x to y, using the
+    Runge-Kutta-Shanks method, choosing the step size and the order of the
+    method for each member of the batch as Dahlen's SMTR and CMTR subroutines
+    do.
+
+    @param coef: function returning A(x) for the members k of the batch, with
+    shape (len(k), m, m), when called as coef(x, k).
+    @param q: function returning the local wavenumber, which determines the
+    step size, for the members k of the batch, when called as q(x, k).
+    @param x: starting radius of each member of the batch.
+    @param y: ending radius of each member of the batch.
+    @param f: the solution at x, with shape (nbatch, m, ncol).
+    @return: the solution at y.
+    """
+    x = x.copy()
+    f = f.copy()
+    active = numpy.arange(len(x))[x < y]
+
+    while len(active) > 0:
+        xa = x[active]
+        ya = y[active]
+        Q  = q(xa, active)
+        dx = numpy.minimum(__STEP__[7]/Q, ya-xa)
+        order = numpy.searchsorted(__STEP__[:7], Q*dx)
+
+        # Members of the batch requiring the same order of integration are
+        # stepped forward together:
+        for o in numpy.unique(order):
+            sel = (order == o)
+            k   = active[sel]
+            dk  = dx[sel]
+            stage_c, stage_b = _SHANKS[o]
+
+            s = fk = f[k]
+            h = []
+            for ni in range(len(stage_c)):
+                h.append(numpy.einsum('nij,njk->nik', coef(xa[sel]+stage_c[ni]*dk, k), fk))
+                fk = s + sum([ b*h[m] for m, b in enumerate(stage_b[ni]) if b != 0.0 ])*dk[:,numpy.newaxis,numpy.newaxis]
+            f[k] = fk
+
+        x[active] = numpy.where(__STEP__[7]/Q >= ya-xa, ya, xa+dx)
+        active = active[x[active] < ya]
+
+    return(f)
+
+#}}} end _integrate
+
+def _nodes(a, n):
+    """Gather the values of a at the nodes n of every member of the batch, and
+    flatten them into a single array."""
+    return(a[:,n].ravel())
+
+def _solid_coef(r, rho, fmu, flam, g, j, i): #{{{
+    """
+    Return a function calculating the coefficient matrix of the 6x6 system of
+    equations governing the deformation of a solid layer between nodes j and
+    i (see Dahlen's SCOEF subroutine).  The node indices j and i may be
+    arrays, in which case the intervals between each pair of nodes are
+    treated as separate members of the batch.
+    """
+    fl, fl1, fl3 = float(__L__), __L__+1.0, __L__*(__L__+1.0)
+
+    rj, dr    = _nodes(r, j),    _nodes(r, i)-_nodes(r, j)
+    roj, dro  = _nodes(rho, j),  _nodes(rho, i)-_nodes(rho, j)
+    fuj, dfu  = _nodes(fmu, j),  _nodes(fmu, i)-_nodes(fmu, j)
+    flj, dfl  = _nodes(flam, j), _nodes(flam, i)-_nodes(flam, j)
+    gj, dg    = _nodes(g, j),    _nodes(g, i)-_nodes(g, j)
+
+    def coef(x, k):
+        delta = (x-rj[k])/dr[k]
+        ro  = roj[k] + delta*dro[k]
+        fu  = fuj[k] + delta*dfu[k]
+        flu = flj[k] + delta*dfl[k]
+        gr  = gj[k]  + delta*dg[k]
+
+        d    = 1.0/(flu+fu+fu)
+        e    = (3.0*flu+fu+fu)*d*fu
+        zeta = 4.0*ro
+        z    = 1.0/x
+        zsq  = z*z
+
+        A = numpy.zeros((len(x), 6, 6), dtype=complex)
+        A[:,0,0] = -2.0*flu*d*z
+        A[:,0,1] = flu*d*fl3*z
+        A[:,0,2] = d
+        A[:,1,0] = -z
+        A[:,1,1] = z
+        A[:,1,3] = 1.0/fu
+        A[:,2,0] = 4.0*e*zsq - 4.0*ro*gr*z
+        A[:,2,1] = -2.0*e*fl3*zsq + ro*gr*fl3*z
+        A[:,2,2] = -4.0*fu*d*z
+        A[:,2,3] = fl3*z
+        A[:,2,4] = -ro*fl1*z
+        A[:,2,5] = ro
+        A[:,3,0] = -2.0*e*zsq + ro*gr*z
+        A[:,3,1] = 2.0*fu*(2.0*(flu+fu)*fl3*d-1.0)*zsq
+        A[:,3,2] = -flu*d*z
+        A[:,3,3] = -3.0*z
+        A[:,3,4] = ro*z
+        A[:,4,0] = -zeta
+        A[:,4,4] = -fl1*z
+        A[:,4,5] = 1.0
+        A[:,5,0] = -zeta*fl1*z
+        A[:,5,1] = zeta*fl3*z
+        A[:,5,5] = (fl-1.0)*z
+        return(A)
+
+    return(coef)
+
+#}}} end _solid_coef
+
+def _solid_q(r, rho, vp, vs, g, i): #{{{
+    """
+    Return a function calculating the local wavenumber in a solid layer, which
+    is used to choose the integration step size (see Dahlen's SMTR).  The
+    material properties are taken from the node(s) i.
+    """
+    fl3   = __L__*(__L__+1.0)
+    vpsq  = _nodes(vp, i)**2
+    vssq  = _nodes(vs, i)**2
+    zeta  = 4.0*_nodes(rho, i)
+    xi    = _nodes(g, i)/_nodes(r, i)
+    alfsq = (zeta+xi)/vpsq
+    gamsq = 4.0*fl3*xi*xi/(vssq*vpsq)
+    delsq = numpy.sqrt(alfsq*alfsq+gamsq)
+    fksq  = 0.5*(alfsq+delsq)
+    qsq   = fksq-delsq
+
+    def q(x, k):
+        qs = numpy.sqrt(numpy.abs(fksq[k]-fl3/(x*x)))+1.0/x
+        qf = numpy.sqrt(numpy.abs(qsq[k]-fl3/(x*x)))+1.0/x
+        return(numpy.maximum(numpy.sqrt(fl3)/x, numpy.maximum(qf, qs)))
+
+    return(q)
+
+#}}} end _solid_q
+
+def _fluid_coef(r, rho, g, j, i): #{{{
+    """
+    Return a function calculating the coefficient matrix of the 2x2 system of
+    equations governing the gravitational potential in a fluid layer between
+    nodes j and i (see Dahlen's CCOEF subroutine).
+    """
+    fl3  = __L__*(__L__+1.0)
+    rj, dr = _nodes(r, j), _nodes(r, i)-_nodes(r, j)
+    gj, dg = _nodes(g, j), _nodes(g, i)-_nodes(g, j)
+    ropr   = (_nodes(rho, i)-_nodes(rho, j))/dr
+
+    def coef(x, k):
+        gr = gj[k] + dg[k]*(x-rj[k])/dr[k]
+        z  = 1.0/x
+
+        A = numpy.zeros((len(x), 2, 2), dtype=complex)
+        A[:,0,1] = 1.0
+        A[:,1,0] = fl3*z*z + 4.0*ropr[k]/gr
+        A[:,1,1] = -2.0*z
+        return(A)
+
+    return(coef)
+
+#}}} end _fluid_coef
+
+def _fluid_q(rho, flam, i): #{{{
+    """
+    Return a function calculating the local wavenumber in a fluid layer (see
+    Dahlen's CMTR subroutine).
+    """
+    fl3 = __L__*(__L__+1.0)
+    ro  = _nodes(rho, i)
+    lam = _nodes(flam, i)
+
+    def q(x, k):
+        return(numpy.sqrt(numpy.abs(4.0*ro[k]*ro[k]/lam[k]-fl3/(x*x)))+1.0/x)
+
+    return(q)
+
+#}}} end _fluid_q
+
+def _propagate(f, r, coef, q, n0, n1): #{{{
+    """
+    Carry the solution f through the nodes n0 to n1-1 of a layer.
+
+    The equations are linear, so rather than integrating from one node to the
+    next in turn (as the Fortran code does), we find the matrix which
+    propagates the solution across each interval between nodes, all at once,
+    by integrating the identity matrix, and then multiply them together.
+
+    @param f: the solution at node n0, with shape (nbatch, m, ncol)
+    @param r: the radii of the nodes.
+    @param coef: a function like L{_solid_coef} or L{_fluid_coef}.
+    @param q: a function like L{_solid_q} or L{_fluid_q}.
+    @return: the solution at node n1-1.
+    """
+    nbatch, m = f.shape[0], f.shape[1]
+
+    # Intervals of zero width are layer boundaries, and are skipped:
+    i = numpy.array([ n for n in range(n0+1, n1) if (r[:,n] > r[:,n-1]).all() ])
+    if len(i) == 0:
+        return(f)
+    j = i-1
+
+    # Work on as many intervals at once as we can without the arrays
+    # getting too big:
+    nblock = max(1, __BLOCK__//nbatch)
+    for b0 in range(0, len(i), nblock):
+        ib, jb = i[b0:b0+nblock], j[b0:b0+nblock]
+        P = numpy.zeros((nbatch*len(ib), m, m), dtype=complex)
+        P[:] = numpy.eye(m)
+        P = _integrate(coef(jb, ib), q(ib), _nodes(r, jb), _nodes(r, ib), P)
+        P = P.reshape(nbatch, len(ib), m, m)
+
+        for k in range(len(ib)):
+            f = numpy.einsum('nij,njk->nik', P[:,k], f)
+
+    return(f)
+
+#}}} end _propagate
+
+def _start(r, rho, vp, vs, g, i): #{{{
+    """
+    Calculate the three independent solutions regular at the center of the
+    satellite, at node i within the homogeneous core, using a power series
+    expansion (see Dahlen's SPSJFG subroutine).
+
+    @return: the starting solutions, with shape (nbatch, 6, 3)
+    """
+    fl  = float(__L__)
+    fl1 = fl+1.0
+    fl2 = fl+fl1
+    fl3 = fl*fl1
+    sfl3 = numpy.sqrt(fl3)
+
+    x    = r[:,i]
+    ro   = rho[:,i]
+    gr   = g[:,i]
+    vpsq = vp[:,i]**2
+    vssq = vs[:,i]**2
+
+    zeta  = 4.0*ro
+    xi    = gr/x
+    xsq   = x*x
+    alfsq = (zeta+xi)/vpsq
+
+    xl   = x**__L__
+    xlp1 = xl*x
+    xlp2 = xlp1*x
+    xlm1 = xl/x
+    flu  = ro*vpsq
+    fu   = ro*vssq
+
+    A = numpy.zeros((len(x), 6, 3), dtype=complex)
+
+    for k, (d0, h0) in enumerate(((numpy.ones(len(x)), -vpsq/(fl1*vssq)),\
+                                  (numpy.zeros(len(x)), -numpy.ones(len(x))))):
+        c, b, f = 2.0, fl2+2.0, 2.0
+        c2 = 1.0/(c*b)
+        d1 = c2*(fl3*xi*h0/vpsq-alfsq*d0)*xsq
+        h1 = c2*(xi*d0/vssq)*xsq
+        u = c2*(fl3*h0+(fl+f)*d0)
+        v = c2*(d0+(fl1+f)*h0)
+        p = c2*d0
+        s = (fl2+f)*p-u
+        h = h0+h1
+        d = d0+d1
+
+        # Add terms to the series until every member of the batch has
+        # converged:
+        while True:
+            c, b, f = c+2.0, b+2.0, f+2.0
+            c2 = 1.0/(c*b)
+            un = c2*(fl3*h1+(fl+f)*d1)
+            vn = c2*(d1+(fl1+f)*h1)
+            pn = c2*d1
+            sn = (fl2+f)*pn-un
+            d2 = -c2*(d1*alfsq-h1*fl3*xi/vpsq)*xsq
+            h2 = c2*(d1*xi/vssq)*xsq
+            d, h = d+d2, h+h2
+            d1, h1 = d2, h2
+            u, v, p, s = u+un, v+vn, p+pn, s+sn
+            if (numpy.abs(d2/d) < __LOVE_EPS__).all() and (numpy.abs(h2/h) < __LOVE_EPS__).all():
+                break
+
+        c, b, f = c+2.0, b+2.0, f+2.0
+        c2 = 1.0/(c*b)
+        un = c2*(fl3*h1+(fl+f)*d1)
+        vn = c2*(d1+(fl1+f)*h1)
+        pn = c2*d1
+        sn = (fl2+f)*pn-un
+
+        A[:,0,k] = (u+un)*xlp1
+        A[:,1,k] = (v+vn)*xlp1
+        A[:,2,k] = flu*d*xl+2.0*fu*(fl3*A[:,1,k]-2.0*A[:,0,k])/x
+        A[:,3,k] = fu*(h*xl+2.0*(A[:,0,k]-A[:,1,k])/x)
+        A[:,4,k] = zeta*(p+pn)*xlp2
+        A[:,5,k] = zeta*(s+sn)*xlp1
+
+    A[:,0,2] = xlm1*fl
+    A[:,1,2] = xlm1
+    A[:,2,2] = 2.0*fu*(fl3*A[:,1,2]-2.0*A[:,0,2])/x
+    A[:,3,2] = 2.0*fu*(A[:,0,2]-A[:,1,2])/x
+    A[:,4,2] = xi*fl*xl
+    A[:,5,2] = (fl2*xi*fl-zeta*fl)*xlm1
+    A[:,4,1] += fl1*vssq*xl
+    A[:,5,1] += fl2*fl1*vssq*xlm1
+
+    A[:,1,0::2] *= sfl3
+    A[:,3,0::2] *= sfl3
+    A[:,0::2,1] /= sfl3
+    A[:,5,1]    /= sfl3
+
+    return(A)
+
+#}}} end _start
+
+def _loveno(r, rho, vp, vs, rhobar, kdis): #{{{
+    """
+    Integrate the equations of motion from the center of the satellite to its
+    surface, and find the body tide Love numbers (see Dahlen's LOVENO
+    subroutine).
+
+    @param r: radii of the nodes [m]
+    @param rho: density at the nodes [kg/m^3]
+    @param vp: P-wave velocity at the nodes [m/s]
+    @param vs: S-wave velocity at the nodes [m/s]
+    @param rhobar: mean density of the satellite [kg/m^3]
+    @param kdis: node numbers of the layer boundaries, counting from 1.
+    """
+    fl1 = __L__+1.0
+    fl2 = 2.0*__L__+1.0
+    sfl3 = numpy.sqrt(__L__*(__L__+1.0))
+    npts = r.shape[1]
+
+    g = _gravity(r, rho)
+
+    # Switch to dimensionless variables:
+    rn = r[:,-1:]
+    gn = __LOVE_PI__*__LOVE_G__*rhobar[:,numpy.newaxis]*rn
+    v  = numpy.sqrt(gn*rn)
+    r   = r/rn
+    vp  = vp/v
+    vs  = vs/v
+    rho = rho/rhobar[:,numpy.newaxis]
+    g   = g/gn
+    fmu  = rho*vs*vs
+    flam = rho*vp*vp-2.0*fmu
+
+    def solid_coef(j, i):
+        return(_solid_coef(r, rho, fmu, flam, g, j, i))
+    def solid_q(i):
+        return(_solid_q(r, rho, vp, vs, g, i))
+    def fluid_coef(j, i):
+        return(_fluid_coef(r, rho, g, j, i))
+    def fluid_q(i):
+        return(_fluid_q(rho, flam, i))
+
+    # Python node indices of the top of the core, and of the ocean:
+    nic  = kdis[0]-1
+    noc  = kdis[1]-1
+
+    # Through the core:
+    AS = _start(r, rho, vp, vs, g, 1)
+    AS[:,1,:] /= sfl3
+    AS[:,4,:] *= -1.0
+    AS[:,5,:] *= -1.0
+    AS = _propagate(AS, r, solid_coef, solid_q, 1, nic+1)
+
+    # At the core-ocean boundary, find the combination of the three
+    # solutions having no shear stress, and the right normal stress:
+    ro = rho[:,nic+1]
+    F = AS[:,2,:] - ro[:,numpy.newaxis]*AS[:,4,:] - (ro*g[:,nic])[:,numpy.newaxis]*AS[:,0,:]
+    Q = AS[:,3,:]
+    biga = -(F[:,2]/F[:,1]-Q[:,2]/Q[:,1])/(F[:,0]/F[:,1]-Q[:,0]/Q[:,1])
+    bigb = -(F[:,2]/F[:,0]-Q[:,2]/Q[:,0])/(F[:,1]/F[:,0]-Q[:,1]/Q[:,0])
+    wts = numpy.array([biga, bigb, numpy.ones(len(biga))]).T
+
+    fpr = AS[:,5,:] - (fl1/r[:,nic])[:,numpy.newaxis]*AS[:,4,:] - 4.0*ro[:,numpy.newaxis]*AS[:,0,:]
+    phi = numpy.zeros((len(ro), 2, 1), dtype=complex)
+    phi[:,0,0] = (wts*AS[:,4,:]).sum(axis=1)
+    phi[:,1,0] = (wts*fpr).sum(axis=1)
+
+    # Through the ocean:
+    phi = _propagate(phi, r, fluid_coef, fluid_q, nic+1, noc+1)
+
+    # Starting solutions at the base of the ice shell:
+    roc = rho[:,noc]
+    AS = numpy.zeros((len(roc), 6, 3), dtype=complex)
+    AS[:,0,0] = 1.0
+    AS[:,2,0] = roc*g[:,noc]
+    AS[:,5,0] = 4.0*roc
+    AS[:,1,1] = 1.0
+    AS[:,4,2] = 1.0
+    AS[:,2,2] = roc
+    AS[:,5,2] = phi[:,1,0]/phi[:,0,0] + fl1/r[:,noc]
+
+    # Through the ice:
+    AS = _propagate(AS, r, solid_coef, solid_q, noc+1, npts)
+
+    # Apply the surface boundary conditions for a body tide:
+    B  = AS[:,(2,3,5),:]
+    ar = -4.0*numpy.linalg.inv(B)[:,:,2]
+    asa = numpy.einsum('njk,nk->nj', AS, ar)
+
+    fac = fl2/(4.0*r[:,-1])
+    h2 = g[:,-1]*fac*asa[:,0]
+    k2 = -1.0-fac*asa[:,4]
+    l2 = g[:,-1]*fac*asa[:,1]
+
+    return(h2, k2, l2)
+
+#}}} end _loveno
@@ -108,11 +108,15 @@ def fromscratch(satfile="input/ConvectingEuropa_GlobalDiurnalNSR.ssrun",\
 
 def deltasynth(satfile="input/ConvectingEuropa_GlobalDiurnalNSR.ssrun",\
                linfile="input/GlobalLineaments", nb=180, nlins=500,\
-               init_doppel_res=0.0, doppel_res=0.1, num_subsegs=10): #{{{
+               init_doppel_res=0.0, doppel_res=0.1, num_subsegs=10, love_tol=None): #{{{
     """
     Read in the mapped features and calculate their fits for a variety of
     different values of NSR Delta.  Save the results.
 
+    The Love numbers for each NSR period are solved for exactly, unless
+    love_tol is given, in which case they are interpolated from a
+    L{satstress.LoveTable} with that relative tolerance.
+
     """
 
     europa = satstress.Satellite(open(satfile,'r'))
@@ -124,8 +128,8 @@ def deltasynth(satfile="input/ConvectingEuropa_GlobalDiurnalNSR.ssrun",\
     lins_list = []
     for P_nsr in nsr_periods:
         europa.nsr_period = P_nsr
-        NSR = satstress.NSR(europa)
-        nsr_stresscalc = satstress.StressCalc([satstress.NSR(europa),])
+        NSR = satstress.NSR(europa, love_tol=love_tol)
+        nsr_stresscalc = satstress.StressCalc([NSR,])
         label = "synth_Delta_%.3g" % (NSR.Delta(),)
         labels.append(label)
 
@@ -148,11 +152,15 @@ def deltasynth(satfile="input/ConvectingEuropa_GlobalDiurnalNSR.ssrun",\
 
 def deltafits(satfile="input/ConvectingEuropa_GlobalDiurnalNSR.ssrun",\
               linfile="input/GlobalLineaments", nb=180, nlins=0,\
-              init_doppel_res=0.0, doppel_res=0.1, num_subsegs=10): #{{{
+              init_doppel_res=0.0, doppel_res=0.1, num_subsegs=10, love_tol=None): #{{{
     """
     Read in the mapped features and calculate their fits for a variety of
     different values of NSR Delta.  Save the results.
 
+    The Love numbers for each NSR period are solved for exactly, unless
+    love_tol is given, in which case they are interpolated from a
+    L{satstress.LoveTable} with that relative tolerance.
+
     """
 
     europa = satstress.Satellite(open(satfile,'r'))
@@ -162,8 +170,8 @@ def deltafits(satfile="input/ConvectingEuropa_GlobalDiurnalNSR.ssrun",\
     lins_list = []
     for P_nsr in nsr_periods:
         europa.nsr_period = P_nsr
-        NSR = satstress.NSR(europa)
-        nsr_stresscalc = satstress.StressCalc([satstress.NSR(europa),])
+        NSR = satstress.NSR(europa, love_tol=love_tol)
+        nsr_stresscalc = satstress.StressCalc([NSR,])
 
         label = "Delta_%.3g" % (NSR.Delta(),)
         lins = lineament.shp2lins(linfile, stresscalc=nsr_stresscalc)
@@ -161,16 +161,53 @@ import re
 # required for command line parsing
 import sys
 
+# for finding the Love number cache in the environment
+import os
+
+# for numbering revisions of Satellite objects
+import itertools
+
+# for immutable snapshots of Satellite objects
+import collections
+
 # Scientific functions... like complex exponentials
 import scipy
 import numpy
 
+# ...and their plain scalar equivalents, for single point calculations
+import math
+import cmath
+
 # Physical constants, like the Newton's Gravitational Constant Big G
 import physcon as pc
 
+# NumPy translation of John Wahr's Love number code
+import lovenum
+
 ##############################
 #      HELPER FUNCTIONS      #
 ##############################
+def derived(method): #{{{
+    """
+    Decorator for the methods of L{Satellite} which calculate a derived
+    quantity from its data attributes, remembering the result until the
+    satellite next changes (see L{Satellite.changed}).
+    """
+    name = method.__name__
+    def memoized(self):
+        try:
+            return(self._derived[name])
+        except KeyError:
+            value = self._derived[name] = method(self)
+            return(value)
+    memoized.__name__ = name
+    memoized.__doc__  = method.__doc__
+    return(memoized)
+#}}}
+
+# Every change to any Satellite is given a unique revision number:
+__REVISIONS__ = itertools.count()
+
 def nvf2dict(nvf, comment='#'):
     """
     Reads from a file object listing name value pairs, creating and returning a
@@ -271,6 +308,34 @@ def eigen2(a, b, c):
 
     return(numpy.array([lambda1, eig1theta, eig1phi, lambda2, eig2theta, eig2phi]))
 
+def trig_terms(theta, phi):
+    """
+    Calculate the trigonometric functions of co-latitude and longitude which
+    appear in the expressions for the L{NSR} and L{Diurnal} stress fields.
+
+    These are shared by all of the stress fields, and all of the tensor
+    components, so L{StressCalc} evaluates them only once per calculation, and
+    hands them to the L{StressDef.amplitudes} method of each stress field.
+
+    @param theta: the co-latitude(s) of the point(s) at which to calculate the
+    stress [rad].
+    @type theta: float or numpy.ndarray
+    @param phi: the east-positive longitude(s) of the point(s) at which to
+    calculate the stress [rad].
+    @type phi: float or numpy.ndarray
+    @return: a dictionary containing theta and phi, along with cos(theta)
+    (C{costheta}), cos(2*theta) (C{cos2theta}), cos(2*phi) (C{cos2phi}) and
+    sin(2*phi) (C{sin2phi}).
+    @rtype: dict
+    """
+
+    return(dict(theta     = theta,\
+                phi       = phi,\
+                costheta  = numpy.cos(theta),\
+                cos2theta = numpy.cos(2.0*theta),\
+                cos2phi   = numpy.cos(2.0*phi),\
+                sin2phi   = numpy.sin(2.0*phi)))
+
 ##############################
 #          CLASSES           #
 ##############################
@@ -310,6 +375,11 @@ class Satellite(object):
     up the satellite.  The layers are ordered from the center of the satellite
     outward, with layers[0] corresponding to the core.
     @type layers: list
+    @ivar revision: a number which changes every time any attribute of the
+    satellite or of its layers is assigned to, and which is never shared with
+    another satellite.  Anything calculated from the satellite can be
+    re-used for as long as the revision stays the same.
+    @type revision: int
     """
 
     def __init__(self, satFile=None): #
@@ -451,7 +521,39 @@ class Satellite(object):
 
     # end __init__
 
-    # Methods defining derived quantities: 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        self.changed()
+
+    def changed(self):
+        """
+        Note that the satellite has changed, giving it a new L{revision}, and
+        forgetting its derived quantities.
+
+        This happens automatically whenever an attribute of the satellite or
+        of one of its layers is assigned to, but not when the list of
+        L{layers} is altered in place, e.g. by replacing one of its elements,
+        after which this method should be called explicitly.
+        """
+        self.__dict__['_derived'] = {}
+        self.__dict__['revision'] = __REVISIONS__.next()
+
+    @derived
+    def snapshot(self):
+        """
+        Return an immutable, hashable copy of the satellite's current
+        parameters (see L{SatelliteSnapshot}).
+
+        @rtype: L{SatelliteSnapshot}
+        """
+        return(SatelliteSnapshot(self.system_id, self.planet_mass, self.orbit_eccentricity,\
+                                 self.orbit_semimajor_axis, self.nsr_period,\
+                                 [ layer.snapshot() for layer in self.layers ],\
+                                 sourcefilename=self.sourcefilename))
+
+    # Methods defining derived quantities (remembered until the satellite
+    # changes, see L{derived}):
+    @derived
     def mass(self):
         """Calculate the mass of the satellite. (the sum of the layer masses)"""
         mass   = 0.0
@@ -461,6 +563,7 @@ class Satellite(object):
             radius += layer.thickness
         return(mass)
 
+    @derived
     def radius(self):
         """Calculate the radius of the satellite (the sum of the layer thicknesses)."""
         radius = 0.0
@@ -468,18 +571,22 @@ class Satellite(object):
             radius += layer.thickness
         return(radius)
 
+    @derived
     def density(self):
         """Calculate the mean density of the satellite in [kg m^-3]."""
         return(self.mass() / ((4.0/3.0)*scipy.pi*(self.radius()**3)))
 
+    @derived
     def surface_gravity(self):
         """Calculate the satellite's surface gravitational acceleration in [m s^-2]."""
         return(pc.G*self.mass() / (self.radius()**2))
 
+    @derived
     def orbit_period(self):
         """Calculate the satellite's Keplerian orbital period in seconds."""
         return(2.0*scipy.pi*scipy.sqrt( (self.orbit_semimajor_axis**3) / (pc.G*self.planet_mass) ))
 
+    @derived
     def mean_motion(self):
         """Calculate the orbital mean motion of the satellite [rad s^-1]."""
         return(2.0*scipy.pi / (self.orbit_period()))
@@ -570,6 +677,9 @@ class SatLayer(object): #
     @type viscosity: float
     @ivar tensile_str: the tensile failure strength of the layer [Pa].
     @type tensile_str: float
+    @ivar satellite: the L{Satellite} the layer belongs to, which is notified
+    whenever any of the layer's attributes change.
+    @type satellite: L{Satellite}
     """
 
 
@@ -642,6 +752,8 @@ class SatLayer(object): #
 
         """
 
+        self.satellite = sat
+
         # Assign all of the SatLayer's data attributes, converting those
         # that should be numbers into floats, and making sure that if we
         # didn't get a required parameter, an exception is raised.
@@ -715,6 +827,21 @@ class SatLayer(object): #
     
     # end __init__()
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if 'satellite' in self.__dict__:
+            self.satellite.changed()
+
+    def snapshot(self):
+        """
+        Return an immutable, hashable copy of the layer's parameters (see
+        L{SatLayerSnapshot}).
+
+        @rtype: L{SatLayerSnapshot}
+        """
+        return(SatLayerSnapshot(self.layer_id, self.density, self.lame_mu, self.lame_lambda,\
+                                self.thickness, self.viscosity, self.tensile_str))
+
     def __str__(self):
         """
         Output a human and machine readable text description of the layer.
@@ -806,6 +933,124 @@ TENSILE_STR%s = %g
 
 # end class SatLayer
 
+class SatLayerSnapshot(collections.namedtuple('SatLayerSnapshot',\
+        'layer_id density lame_mu lame_lambda thickness viscosity tensile_str')): #{{{
+    """
+    An immutable, hashable copy of the parameters of a L{SatLayer}, as
+    returned by L{SatLayer.snapshot}.
+
+    It has the same data attributes, and calculates the same derived
+    quantities, as a L{SatLayer}.  New snapshots with some parameters changed
+    may be made using C{_replace()}.
+    """
+    __slots__ = ()
+
+    ordered_str     = SatLayer.ordered_str.im_func
+    __str__         = SatLayer.__str__.im_func
+    maxwell_time    = SatLayer.maxwell_time.im_func
+    bulk_modulus    = SatLayer.bulk_modulus.im_func
+    youngs_modulus  = SatLayer.youngs_modulus.im_func
+    poissons_ratio  = SatLayer.poissons_ratio.im_func
+    p_wave_velocity = SatLayer.p_wave_velocity.im_func
+
+# end class SatLayerSnapshot }}}
+
+class SatelliteSnapshot(collections.namedtuple('SatelliteSnapshot',\
+        'system_id planet_mass orbit_eccentricity orbit_semimajor_axis nsr_period layers')): #{{{
+    """
+    An immutable, hashable copy of the parameters of a L{Satellite}, as
+    returned by L{Satellite.snapshot}.
+
+    A snapshot has the same data attributes, and calculates the same derived
+    quantities, as a L{Satellite}, and may be used in its place by a
+    L{StressDef}.  Because it can't change, it can be shared safely between
+    threads or processes, and because two snapshots are equal (and hash
+    equally) exactly when all their parameters are equal, it can be used as
+    the key to a cache of anything calculated from the satellite.
+
+    Rather than altering a snapshot, new snapshots may be derived from it
+    using L{replace} and L{replace_layer}.
+
+    @ivar layers: a tuple of L{SatLayerSnapshot} objects, from the core
+    outward.
+    @type layers: tuple
+    """
+    def __new__(cls, system_id, planet_mass, orbit_eccentricity, orbit_semimajor_axis,\
+                nsr_period, layers, sourcefilename=None):
+        """
+        The sourcefilename, naming the file the satellite was originally read
+        from, is kept only for use in error messages, and plays no part in
+        comparing snapshots.
+        """
+        self = super(SatelliteSnapshot, cls).__new__(cls, system_id, planet_mass, orbit_eccentricity,\
+                                                     orbit_semimajor_axis, nsr_period, tuple(layers))
+        self.__dict__['sourcefilename'] = sourcefilename
+        self.__dict__['_derived'] = {}
+        return(self)
+
+    @classmethod
+    def _make(cls, iterable):
+        return(cls(*iterable))
+
+    def __reduce__(self):
+        return(SatelliteSnapshot, tuple(self) + (self.sourcefilename,))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SatelliteSnapshot objects are immutable")
+
+    @property
+    def num_layers(self):
+        """The number of layers making up the satellite."""
+        return(len(self.layers))
+
+    @property
+    def revision(self):
+        """A snapshot never changes, so it can serve as its own revision (see
+        L{Satellite.revision})."""
+        return(self)
+
+    def snapshot(self):
+        """A snapshot is its own snapshot."""
+        return(self)
+
+    def replace(self, **params):
+        """
+        Return a new snapshot, with the given parameters changed.
+
+        @param params: new values of any of the satellite's data attributes,
+        e.g. C{orbit_eccentricity=0.0}.
+        @rtype: L{SatelliteSnapshot}
+        """
+        fields = self._asdict()
+        fields.update(params)
+        return(SatelliteSnapshot(sourcefilename=self.sourcefilename, **fields))
+
+    def replace_layer(self, layer_n, **params):
+        """
+        Return a new snapshot, with the given parameters of one layer changed.
+
+        @param layer_n: which layer to change (zero is the core).
+        @type layer_n: int
+        @param params: new values of any of the layer's data attributes,
+        e.g. C{lame_mu=1e7}.
+        @rtype: L{SatelliteSnapshot}
+        """
+        layers = list(self.layers)
+        layers[layer_n] = layers[layer_n]._replace(**params)
+        return(self.replace(layers=tuple(layers)))
+
+    # The derived quantities are calculated, and remembered, just as they are
+    # for a Satellite:
+    __str__         = Satellite.__str__.im_func
+    mass            = Satellite.mass.im_func
+    radius          = Satellite.radius.im_func
+    density         = Satellite.density.im_func
+    surface_gravity = Satellite.surface_gravity.im_func
+    orbit_period    = Satellite.orbit_period.im_func
+    mean_motion     = Satellite.mean_motion.im_func
+
+# end class SatelliteSnapshot }}}
+
 class LoveNum(object): #
     """A container class for the complex Love numbers: h2, k2, and l2.
 
@@ -829,6 +1074,444 @@ class LoveNum(object): #
 
 # end class LoveNum
 
+class LoveCache(object): #{{{
+    """
+    A persistent, on-disk store of previously calculated Love numbers.
+
+    Calculating Love numbers means running an external program, which is by
+    far the most expensive part of creating a L{StressDef} object, and sweeps
+    through NSR periods tend to repeat exactly the same calculations from one
+    run to the next.  A L{LoveCache} remembers the results, keyed by a hash of
+    the complete input to the Love number code (see
+    L{StressDef.love_input}), so that anything which could affect the Love
+    numbers also changes the key.
+
+    The Love numbers are kept in an SQLite database, which may safely be
+    shared by several processes at once.  Each lookup or store opens its own
+    short lived connection, so the cache may also be used from processes
+    forked after it was created.
+
+    The cache used by L{StressDef.calcLove} is L{love_cache}, which is created
+    from the C{SATSTRESS_LOVE_CACHE} environment variable if it is set, and
+    may also be set using L{set_love_cache}.
+
+    @ivar filename: the path to the SQLite database holding the cache.
+    @type filename: str
+    @ivar timeout: how long to wait for another process to release its lock
+    on the database before giving up [s].
+    @type timeout: float
+    """
+
+    def __init__(self, filename, timeout=60.0):
+        """
+        Open (and if necessary, create) a Love number cache.
+
+        @param filename: the path to the SQLite database holding the cache.
+        @type filename: str
+        @param timeout: how long to wait for a lock on the database [s].
+        @type timeout: float
+        """
+        self.filename = os.path.abspath(os.path.expanduser(filename))
+        self.timeout  = timeout
+
+        conn = self.connect()
+        try:
+            conn.execute("""CREATE TABLE IF NOT EXISTS love (key TEXT PRIMARY KEY,
+                                h2_real REAL, h2_imag REAL,
+                                k2_real REAL, k2_imag REAL,
+                                l2_real REAL, l2_imag REAL)""")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def connect(self):
+        """Return a new connection to the cache database."""
+        import sqlite3
+        return(sqlite3.connect(self.filename, timeout=self.timeout))
+
+    def key(self, love_input, solver):
+        """
+        Calculate the cache key corresponding to a Love number calculation.
+
+        @param love_input: the complete input to the Love number code.
+        @type love_input: str
+        @param solver: a string identifying the Love number code.
+        @type solver: str
+        @return: a hexadecimal SHA-1 hash of the solver and its input.
+        @rtype: str
+        """
+        import hashlib
+        return(hashlib.sha1("%s\n%s" % (solver, love_input)).hexdigest())
+
+    def get(self, key):
+        """
+        Look up the Love numbers stored under key.
+
+        @return: the cached Love numbers, or None if there aren't any.
+        @rtype: L{LoveNum}
+        """
+        conn = self.connect()
+        try:
+            row = conn.execute("""SELECT h2_real, h2_imag, k2_real, k2_imag, l2_real, l2_imag
+                                  FROM love WHERE key = ?""", (key,)).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            return(None)
+        return(LoveNum(*row))
+
+    def put(self, key, love):
+        """
+        Store the L{LoveNum} love under key.  If another process has already
+        stored the same calculation, its result is replaced (they should be
+        identical anyway).
+        """
+        conn = self.connect()
+        try:
+            conn.execute("""INSERT OR REPLACE INTO love VALUES (?, ?, ?, ?, ?, ?, ?)""",\
+                         (key, love.h2.real, love.h2.imag, love.k2.real, love.k2.imag,\
+                               love.l2.real, love.l2.imag))
+            conn.commit()
+        finally:
+            conn.close()
+
+# end class LoveCache }}}
+
+def set_love_cache(filename):
+    """
+    Set the L{LoveCache} used in calculating Love numbers.
+
+    @param filename: the path to the cache database, or None to disable
+    caching.
+    @type filename: str
+    @return: the new cache, or None.
+    @rtype: L{LoveCache}
+    """
+    global love_cache
+    if filename is None:
+        love_cache = None
+    else:
+        love_cache = LoveCache(filename)
+    return(love_cache)
+
+love_cache = None
+if os.environ.get('SATSTRESS_LOVE_CACHE'):
+    set_love_cache(os.environ['SATSTRESS_LOVE_CACHE'])
+
+# Which Love number code L{StressDef.calcLove} uses: 'lovenum' for the NumPy
+# translation of John Wahr's code in L{lovenum}, or 'external' to run the
+# original Fortran program.
+love_solver = os.environ.get('SATSTRESS_LOVE_SOLVER', 'lovenum')
+
+class LoveTable(object): #{{{
+    """
+    An interpolation table of the Love numbers of a particular satellite
+    structure, as a function of S{Delta} in the surface ice layer.
+
+    For a given satellite structure, the Love numbers vary smoothly with the
+    logarithm of S{Delta} (which for a given structure is proportional to the
+    forcing period), so sweeps through many NSR periods needn't solve for the
+    Love numbers at each one.  Instead, the Love numbers are calculated once
+    at a set of nodes spanning the requested range of S{Delta}, using
+    L{lovenum.love_numbers}, and are interpolated with a cubic spline in
+    log10(S{Delta}).
+
+    The nodes are chosen adaptively.  Starting from a coarse, evenly spaced
+    set, the Love numbers are also calculated at the midpoint of every
+    interval, and compared to the values interpolated from the existing
+    nodes.  Wherever the relative error in h2, k2, or l2 exceeds the
+    tolerance, the midpoint becomes a new node, and the two new intervals are
+    checked in turn.  Because the spline error falls rapidly as the nodes are
+    refined, the error of the finished table is generally much smaller than
+    the tolerance.
+
+    Tables are built on demand by L{StressDef.calcLoveTable}, and kept in
+    L{love_tables}, so that each structure only needs its table built once.
+
+    @ivar love_params: the parameters of the satellite structure, as returned
+    by L{StressDef.love_params}, with the forcing period replaced by None.
+    @type love_params: tuple
+    @ivar tol: the maximum relative error allowed in the interpolated Love
+    numbers.
+    @type tol: float
+    @ivar error: the largest relative error actually found in checking the
+    table against exact solutions.
+    @type error: float
+    @ivar log_delta: the nodes of the table, in log10(S{Delta}).
+    @type log_delta: numpy.ndarray
+    @ivar h2: the Love number h2 at each of the nodes.
+    @type h2: numpy.ndarray
+    @ivar k2: the Love number k2 at each of the nodes.
+    @type k2: numpy.ndarray
+    @ivar l2: the Love number l2 at each of the nodes.
+    @type l2: numpy.ndarray
+    """
+
+    def __init__(self, love_params, tol=1e-4, delta_min=1e-4, delta_max=1e6, max_nodes=4097):
+        """
+        Build the interpolation table.
+
+        @param love_params: the parameters of the satellite structure, as
+        returned by L{StressDef.love_params}.  The forcing period is ignored.
+        @type love_params: tuple
+        @param tol: the maximum relative error allowed in the interpolated
+        Love numbers.
+        @type tol: float
+        @param delta_min: the smallest S{Delta} the table covers.
+        @type delta_min: float
+        @param delta_max: the largest S{Delta} the table covers.
+        @type delta_max: float
+        @param max_nodes: the largest number of nodes the table may have.
+        @type max_nodes: int
+        @raise LoveTableToleranceError: if the tolerance cannot be met using
+        max_nodes nodes.
+        """
+        from scipy.interpolate import CubicSpline
+
+        self.love_params = love_params[:1] + (None,) + love_params[2:]
+        self.tol = tol
+
+        # S{Delta} in the surface layer is proportional to the forcing period:
+        E_ice, nu_ice, visc_upper = love_params[7], love_params[8], love_params[2]
+        self.period_per_delta = 2.0*scipy.pi*visc_upper*2.0*(1.0+nu_ice)/E_ice/86400.0
+
+        log_delta = numpy.linspace(numpy.log10(delta_min), numpy.log10(delta_max),\
+                                   2*int(numpy.ceil(numpy.log10(delta_max/delta_min)))+1)
+        love = self.solve(log_delta)
+
+        # Which intervals between the nodes have yet to be checked:
+        unchecked = numpy.ones(len(log_delta)-1, dtype=bool)
+        self.error = 0.0
+
+        while unchecked.any():
+            if len(log_delta) + unchecked.sum() > max_nodes:
+                raise LoveTableToleranceError(self, max_nodes)
+
+            mid = (log_delta[:-1][unchecked] + log_delta[1:][unchecked])/2.0
+            exact = self.solve(mid)
+            err = numpy.max([ numpy.abs(CubicSpline(log_delta, v)(mid) - x)/numpy.abs(x) for v, x in zip(love, exact) ], axis=0)
+            self.error = max([self.error,] + list(err[err <= tol]))
+
+            # Insert the midpoints as new nodes.  Each checked interval
+            # becomes two, which need checking again only if the midpoint
+            # failed:
+            idx = numpy.searchsorted(log_delta, mid)
+            log_delta = numpy.insert(log_delta, idx, mid)
+            love = [ numpy.insert(v, idx, x) for v, x in zip(love, exact) ]
+            new_idx = idx + numpy.arange(len(idx))
+            unchecked = numpy.zeros(len(log_delta)-1, dtype=bool)
+            unchecked[new_idx[err > tol]-1] = True
+            unchecked[new_idx[err > tol]] = True
+
+        self.log_delta = log_delta
+        self.h2, self.k2, self.l2 = love
+        self.splines = [ CubicSpline(log_delta, v) for v in love ]
+
+    def solve(self, log_delta):
+        """
+        Calculate the Love numbers exactly at the given values of
+        log10(S{Delta}), using L{lovenum.love_numbers}.
+
+        @return: h2, k2, and l2.
+        @rtype: tuple of numpy.ndarray
+        """
+        periods = self.period_per_delta*10.0**numpy.asarray(log_delta)
+        return(lovenum.love_numbers(*(self.love_params[:1] + (periods,) + self.love_params[2:])))
+
+    def covers(self, delta):
+        """Return True if delta lies within the range covered by the table."""
+        return(self.log_delta[0] <= numpy.log10(delta) <= self.log_delta[-1])
+
+    def love(self, delta):
+        """
+        Interpolate the Love numbers at the given S{Delta}.
+
+        @param delta: S{Delta} in the surface layer.
+        @type delta: float
+        @rtype: L{LoveNum}
+        """
+        h2, k2, l2 = [ complex(s(numpy.log10(delta))) for s in self.splines ]
+        return(LoveNum(h2.real, h2.imag, k2.real, k2.imag, l2.real, l2.imag))
+
+# end class LoveTable }}}
+
+# The L{LoveTable}s built so far, keyed by the satellite structure (see
+# L{LoveTable.love_params}) and the tolerance.
+love_tables = {}
+
+# The Love numbers calculated so far, keyed by the L{SatelliteSnapshot} they
+# were calculated for, the forcing frequency, the tolerance and the solver
+# (see L{StressDef.calcLove}).
+love_memo = {}
+
+def love_scratch_dir(): #{{{
+    """
+    Choose where to create the temporary directories in which the external
+    Love number code is run: in memory (C{/dev/shm}) if possible, since the
+    code does little but read and write small files, and otherwise wherever
+    the C{tempfile} module would put them.
+    """
+    import tempfile
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return('/dev/shm')
+    return(tempfile.gettempdir())
+#}}}
+
+def run_love_external(love_input, scratch=None): #{{{
+    """
+    Run John Wahr's Love number code (C{calcLoveWahr4Layer}) once, waiting
+    for it to finish, and return the Love numbers it calculates.
+
+    The code reads C{in.love} and writes C{out.love} in its working
+    directory, so each run is given its own temporary directory (named
+    lovetmp-XXXXXX) within scratch, which is deleted afterwards.  Several
+    runs may therefore safely go on at once.
+
+    We need to be reasonably sure that the Love number code is actually in
+    the PATH.  If the package has been installed in the normal way, (using
+    setup.py) then we're fine (the Love number code ought to have been
+    installed elsewhere on the system), but if we're in the code repository,
+    or if we're just doing the tests pre-installation, then the code is in a
+    funny spot, so that spot is added to the PATH the code is run with.
+    Unfortunately, this will only work on Unix machines...
+
+    @param love_input: the contents of C{in.love} (see
+    L{StressDef.love_input}).
+    @type love_input: str
+    @param scratch: the directory in which to create the temporary
+    directory, defaulting to L{love_scratch_dir}().
+    @type scratch: str
+    @rtype: L{LoveNum}
+    @raise ExternalLoveCodeError: if the code fails, or doesn't produce any
+    output.
+    """
+    import tempfile
+    import shutil
+    import subprocess
+
+    if scratch is None:
+        scratch = love_scratch_dir()
+
+    env = dict(os.environ)
+    env['PATH'] += ":%s/love/john_wahr" % (os.path.dirname(os.path.abspath(__file__)),)
+
+    lovetmp = tempfile.mkdtemp(prefix="lovetmp-", dir=scratch)
+    try:
+        love_infile = open(os.path.join(lovetmp, "in.love"), 'w')
+        love_infile.write(love_input)
+        love_infile.close()
+
+        try:
+            proc = subprocess.Popen(['calcLoveWahr4Layer'], cwd=lovetmp, env=env,\
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        except OSError, e:
+            raise ExternalLoveCodeError(love_input, None, str(e))
+        output = proc.communicate()[0]
+
+        try:
+            # take the last line of the output file, and split() it by
+            # whitespace:
+            luv = open(os.path.join(lovetmp, "out.love"), 'r').readlines()[-1].strip().split()
+            # extract those fields that correspond to the love numbers
+            (h2_real, h2_imag, k2_real, k2_imag, l2_real, l2_imag) = luv[3:5]+luv[6:8]+luv[9:11]
+            love = LoveNum(float(h2_real), float(h2_imag), float(k2_real), float(k2_imag), float(l2_real), float(l2_imag))
+        except (IOError, IndexError, ValueError):
+            raise ExternalLoveCodeError(love_input, proc.returncode, output)
+
+    finally:
+        shutil.rmtree(lovetmp, ignore_errors=True)
+
+    return(love)
+#}}}
+
+class LoveRunner(object): #{{{
+    """
+    Runs John Wahr's external Love number code for many inputs at once.
+
+    Each calculation is a separate process (see L{run_love_external}), and at
+    most L{processes} of them are run at a time.  Threads are used to keep
+    the processes going, since they spend all their time waiting.  Results
+    already in the L{love_cache} aren't re-calculated, and new results are
+    added to it.
+
+    The inputs are the contents of the C{in.love} files (see
+    L{StressDef.love_input}), already rendered for each satellite and forcing
+    period.  At present only L{calc_love_batch} (and so an
+    L{EnsembleStressCalc}) uses a L{LoveRunner}, when L{love_solver} is
+    C{'external'}.  The sweeps through forcing periods in L{gridcalc} and
+    L{nsrhist} still calculate their Love numbers one period at a time, as
+    each L{StressDef} is created.
+
+    @ivar processes: the largest number of copies of the Love number code to
+    run at once.
+    @type processes: int
+    @ivar scratch: the directory in which the temporary directories are
+    created.
+    @type scratch: str
+    """
+
+    def __init__(self, processes=None, scratch=None):
+        """
+        @param processes: the largest number of copies of the Love number
+        code to run at once, defaulting to the number of CPUs.
+        @type processes: int
+        @param scratch: the directory in which to run the Love number code,
+        defaulting to L{love_scratch_dir}().
+        @type scratch: str
+        """
+        import multiprocessing
+
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        if scratch is None:
+            scratch = love_scratch_dir()
+
+        self.processes = processes
+        self.scratch   = scratch
+
+    def run_one(self, love_input):
+        """Calculate the Love numbers for one input, using the cache."""
+        if love_cache is not None:
+            cache_key = love_cache.key(love_input, 'calcLoveWahr4Layer')
+            cached_love = love_cache.get(cache_key)
+            if cached_love is not None:
+                return(cached_love)
+
+        love = run_love_external(love_input, scratch=self.scratch)
+
+        if love_cache is not None:
+            love_cache.put(cache_key, love)
+        return(love)
+
+    def run(self, love_inputs):
+        """
+        Calculate the Love numbers for each of the inputs.
+
+        @param love_inputs: the contents of C{in.love} for each calculation
+        (see L{StressDef.love_input}).
+        @type love_inputs: sequence of str
+        @return: the Love numbers, in the same order as the inputs.
+        @rtype: list of L{LoveNum}
+        @raise ExternalLoveCodeError: if any of the calculations fails.
+        """
+        from multiprocessing.pool import ThreadPool
+
+        love_inputs = list(love_inputs)
+        if len(love_inputs) == 0:
+            return([])
+
+        pool = ThreadPool(min(self.processes, len(love_inputs)))
+        try:
+            results = pool.map(self.run_one, love_inputs, chunksize=1)
+        finally:
+            pool.terminate()
+            pool.join()
+
+        return(results)
+
+# end class LoveRunner }}}
+
 class StressDef(object): #{{{
     """A base class from which particular tidal stress field objects descend.
 
@@ -866,6 +1549,23 @@ class StressDef(object): #{{{
     @cvar dependson: the set of input parameters (as represented by the strings
     used to define them in input files) upon which the stress field depends.
     @type dependson: set
+    @ivar coeffs: the frequency-dependent coefficients used by the stress
+    tensor components, as calculated by L{StressDef.calc_coeffs}.  Access them
+    via L{StressDef.coefficients}, which keeps them up to date.
+    @type coeffs: dict
+    @ivar coeffs_params: the L{Satellite.revision} of the satellite at the
+    time L{coeffs} was calculated.
+    @type coeffs_params: int
+    @ivar love_tol: if not None, the Love numbers are interpolated from a
+    L{LoveTable} having this relative tolerance, rather than being solved for
+    exactly.
+    @type love_tol: float
+    @cvar lon_period: the period in longitude with which the stresses repeat
+    at any one time [rad].
+    @type lon_period: float
+    @cvar equator_symmetric: whether the stresses are mirrored across the
+    equator at any one time, with Ttt and Tpp the same and Tpt changing sign.
+    @type equator_symmetric: bool
     
     """
 
@@ -879,6 +1579,12 @@ class StressDef(object): #{{{
                      'LAME_LAMBDA',\
                      'THICKNESS',\
                      'VISCOSITY'])
+    coeffs = None
+    coeffs_params = None
+    love_tol = None
+    # Nothing is known about the symmetry of an arbitrary stress field:
+    lon_period = 2*numpy.pi
+    equator_symmetric = False
 
     # Common StressDef Methods: 
     def __str__(self):
@@ -921,7 +1627,9 @@ class StressDef(object): #{{{
         numbers.
 
         This is a wrapper function, which can be used to call different Love
-        number codes in the future.
+        number codes.  Which one is used is determined by L{love_solver}, unless
+        L{love_tol} is set, in which case the Love numbers are interpolated
+        from a L{LoveTable} (see L{calcLoveTable}).
 
         @raise InvalidLoveNumberError: if the magnitude of the imaginary part
         of any Love number is larger than its real part, if the real part is
@@ -941,16 +1649,39 @@ class StressDef(object): #{{{
         # blow up anyway, so for the moment we'll just set the Love numbers to be
         # null, and deal with them appropriately in the stress calculation elsewhere.
 
-        if self.omega == 0.0:
+        # Love numbers already calculated in this process are remembered,
+        # keyed by the (immutable) structure they were calculated for:
+        memo_key = (self.love_satellite(), self.omega, self.love_tol, love_solver)
+        if memo_key in love_memo:
+            self.love = love_memo[memo_key]
+        elif self.omega == 0.0:
             self.calcLoveInfinitePeriod()
-        else:
+        elif self.love_tol is not None:
+            self.calcLoveTable()
+        elif love_solver == 'external':
             self.calcLoveWahr4LayerExternal()
-        
-        # Do a little sanity checking on the Love numbers to make sure that we have
-        # realistic values:
-        # - Imaginary parts should always have smaller magnitudes than real parts
-        # - Real parts should be greater than zero
-        # - Imaginary parts should be less than zero
+        else:
+            self.calcLoveWahr4LayerNumpy()
+        love_memo[memo_key] = self.love
+        self.check_love()
+
+        # The coefficients depend on the Love numbers, so they need to be
+        # re-calculated the next time they're used:
+        self.coeffs_params = None
+
+    # end calcLove()
+
+    def check_love(self): #
+        """
+        Make sure that the Love numbers are realistic:
+
+          - Imaginary parts should always have smaller magnitudes than real
+            parts
+          - Real parts should be greater than zero
+          - Imaginary parts should be less than zero
+
+        @raise InvalidLoveNumberError: if they aren't.
+        """
         if (abs(self.love.h2.real) < abs(self.love.h2.imag)) or\
            (abs(self.love.l2.real) < abs(self.love.l2.imag)) or\
            (self.love.h2.real < 0) or\
@@ -959,7 +1690,7 @@ class StressDef(object): #{{{
            ((self.love.l2.imag*-1j).real > 0):
             raise InvalidLoveNumberError(self)
 
-    # end calcLove()
+    # end check_love()
 
     def calcLoveInfinitePeriod(self): # 
         """
@@ -974,6 +1705,79 @@ class StressDef(object): #{{{
         # Yes, I know this actually corresponds to a rigid body.
         self.love = LoveNum(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
         
+    def calcLoveTable(self): #
+        """Interpolate the Love numbers from the L{LoveTable} for this
+        satellite's structure, building the table first if necessary.
+
+        Tables are kept in L{love_tables}, keyed on everything which goes into
+        the Love number calculation except the forcing period, and on
+        L{love_tol}.  If S{Delta} lies outside the range covered by the table,
+        the Love numbers are solved for exactly instead.
+
+        @raise LoveExcessiveDeltaError: if L{StressDef.Delta}() > 10^9 for
+        either of the ice layers.
+        """
+        for layer_n in (-1, -2):
+            if self.Delta(layer_n) > 1e9:
+                raise LoveExcessiveDeltaError(self, layer_n)
+
+        table = self.love_table()
+        if table.covers(self.Delta()):
+            self.love = table.love(self.Delta())
+        elif love_solver == 'external':
+            self.calcLoveWahr4LayerExternal()
+        else:
+            self.calcLoveWahr4LayerNumpy()
+
+    # end calcLoveTable()
+
+    def love_table(self): #
+        """Return the L{LoveTable} for this satellite's structure and
+        L{love_tol} (see L{calcLoveTable}), building it if necessary."""
+        love_params = self.love_params()
+        table_key = (love_params[:1] + love_params[2:], self.love_tol)
+        if table_key not in love_tables:
+            # Don't extend the table beyond where the Love number code is
+            # reliable in the lower ice layer:
+            delta_max = min(1e6, 1e9*self.Delta(-1)/self.Delta(-2))
+            love_tables[table_key] = LoveTable(love_params, tol=self.love_tol, delta_max=delta_max)
+        return(love_tables[table_key])
+
+    # end love_table()
+
+    def calcLoveWahr4LayerNumpy(self): #
+        """Use the NumPy translation of John Wahr's Love number code
+        (L{lovenum.love_numbers}) to calculate h, k, and l.
+
+        The satellite must satisfy the same restrictions as it does for
+        L{calcLoveWahr4LayerExternal}, and the results are the same, to within
+        the rounding error of the single precision Fortran code (see
+        L{lovenum}), but no external program is run, and no temporary files
+        are written.
+
+        @raise LoveExcessiveDeltaError: if L{StressDef.Delta}() > 10^9 for
+        either of the ice layers.
+        """
+        for layer_n in (-1, -2):
+            if self.Delta(layer_n) > 1e9:
+                raise LoveExcessiveDeltaError(self, layer_n)
+
+        love_params = self.love_params()
+        if love_cache is not None:
+            cache_key = love_cache.key(repr(love_params), 'lovenum')
+            cached_love = love_cache.get(cache_key)
+            if cached_love is not None:
+                self.love = cached_love
+                return
+
+        h2, k2, l2 = lovenum.love_numbers(*love_params)
+        self.love = LoveNum(h2.real, h2.imag, k2.real, k2.imag, l2.real, l2.imag)
+
+        if love_cache is not None:
+            love_cache.put(cache_key, self.love)
+
+    # end calcLoveWahr4LayerNumpy()
+
     def calcLoveWahr4LayerExternal(self): #
         """Use John Wahr's Love number code to calculate h, k, and l.
         
@@ -990,19 +1794,15 @@ class StressDef(object): #{{{
         this package, allowing more flexibility in the interior structure of
         the satellite.
 
-        A temporary directory named lovetmp-XXXXXXX (where the X's are a random
-        hexadecimal number) is created in the current working directory, within
-        which the Love number code is run.  The directory is deleted
-        immediately following the calculation.
+        The Love number code is run by L{run_love_external}, in a temporary
+        directory which is deleted immediately following the calculation.
+        L{calc_love_batch} runs many such calculations at once using a
+        L{LoveRunner}.
 
         @raise LoveExcessiveDeltaError: if L{StressDef.Delta}() > 10^9 for
         either of the ice layers.
+        @raise ExternalLoveCodeError: if the Love number code fails.
         """
-        # random number generator for creating random temporary filenames:
-        import random
-        # methods for interfacing with the operating system:
-        import os
-
         # make sure that Delta isn't so big that the Love number code will
         # fail.  For John's Love number code, things work up to about Delta =
         # 10^9 Note that we need to check for both of the ice layers.  Negative
@@ -1012,33 +1812,36 @@ class StressDef(object): #{{{
         for layer_n in (-1, -2):
             if self.Delta(layer_n) > 1e9:
                 raise LoveExcessiveDeltaError(self, layer_n)
-       
-        orig_dir = os.getcwd()
-
-        # write an input file that John's Love number code can read
-        # Because we're doing a bunch of stuff outside of this package's
-        # confines here... and we really have no idea what the OS is like
-        # we do this inside a try/except structure... and do our best to
-        # clean up after ourselves.
-        try:
-            lovetmp = "lovetmp-%s" % hex(int(random.random()*2**32))[2:-1]
-            os.mkdir(lovetmp)
-
-            # We need to be reasonably sure that the Love number code is
-            # actually in the current PATH.  If the package has been installed
-            # in the normal way, (using setup.py) then we're fine (the Love
-            # number code ought to have been installed elsewhere on the
-            # system), but if we're in the code repository, or if we're just
-            # doing the tests pre-installation, then the code is in a funny
-            # spot - so let's add that spot to our PATH explicitly here.
-            # Unfortunately, this will only work on Unix machines...
-            dirname = os.path.dirname(os.path.abspath(__file__))
-            os.environ['PATH'] += ":%s/love/john_wahr" % (dirname,)
-
-            os.chdir(lovetmp)
-            love_infile = open("in.love", 'w')
-
-            love_infile.write("""%g		Mean Density of Satellite (g/cm^3)
+
+        # If we've done exactly this calculation before, there's no need to
+        # do it again:
+        love_input = self.love_input()
+        if love_cache is not None:
+            cache_key = love_cache.key(love_input, 'calcLoveWahr4Layer')
+            cached_love = love_cache.get(cache_key)
+            if cached_love is not None:
+                self.love = cached_love
+                return
+
+        self.love = run_love_external(love_input)
+
+        if love_cache is not None:
+            love_cache.put(cache_key, self.love)
+
+    # end calcLoveJohnWahr4Layer()
+
+    def love_input(self): #
+        """
+        Construct the input file for John Wahr's Love number code
+        (calcLoveWahr4Layer), which it reads from C{in.love}.
+
+        This string completely determines the Love numbers the code will
+        calculate, so it is also used to construct L{LoveCache} keys.
+
+        @return: the contents of C{in.love}
+        @rtype: str
+        """
+        return("""%g		Mean Density of Satellite (g/cm^3)
 1		Rheology (1=Maxwell, 0=elastic)
 %g		Forcing period (earth days, 86400 seconds)
 %g		Viscosity of upper ice layer (Pa sec)
@@ -1060,61 +1863,53 @@ class StressDef(object): #{{{
 3		Number of density discontinuities
 154		Node number of innermost boundary
 161		Node number of 2nd innermost boundary
-163		Node number of 3rd innermost boundary""" % (self.satellite.density()/1000.0,\
-                                                    self.forcing_period()/86400,\
-                                                    self.satellite.layers[3].viscosity,\
-                                                    self.satellite.layers[2].viscosity,\
-                                                    self.satellite.layers[0].youngs_modulus(),\
-                                                    self.satellite.layers[0].poissons_ratio(),\
-                                                    self.satellite.layers[0].density/1000.0,\
-                                                    self.satellite.layers[3].youngs_modulus(),\
-                                                    self.satellite.layers[3].poissons_ratio(),\
-                                                    self.satellite.layers[3].density/1000.0,\
-                                                    self.satellite.layers[1].thickness/1000.0,\
-                                                    self.satellite.layers[1].density/1000.0,\
-                                                    self.satellite.layers[1].p_wave_velocity(),\
-                                                    self.satellite.radius()/1000.0,\
-                                                    self.satellite.layers[3].thickness/1000.0,\
-                                                    self.satellite.layers[2].thickness/1000.0) )
-
-            love_infile.close()
-
-            # Actually call the code (it looks at in.love and writes to out.love
-            # in our current working directory)
-            os.popen('calcLoveWahr4Layer')
-
-            # read in the output file that it creates
-            # take the last line and strip() off the newline at the end
-            # then split() it by whitespace
-            luv = open("out.love", 'r').readlines()[-1].strip().split()
-            # extract those fields that correspond to the love numbers
-            (h2_real, h2_imag, k2_real, k2_imag, l2_real, l2_imag) = luv[3:5]+luv[6:8]+luv[9:11]
-            # generate a LoveNum Object made of our new love numbers, and return it.
-            self.love = LoveNum(float(h2_real), float(h2_imag), float(k2_real), float(k2_imag), float(l2_real), float(l2_imag))
+163		Node number of 3rd innermost boundary""" % self.love_params())
 
-        except:
-            # If the above attemped to run the love2 program did cause some
-            # kind of error, we should just raise the exception up the chain.
-            raise
+    # end love_input()
 
-        finally:
-            # Get back to our original working directory, cleanup after the
-            # love2 program.  We need to do these things even if our Love number
-            # calculation failed somehow...
-            os.chdir(orig_dir)
-            try:
-                os.remove(os.path.join(lovetmp, "in.love"))
-                os.remove(os.path.join(lovetmp, "out.love"))
-                os.remove(os.path.join(lovetmp, "out.model"))
-                os.rmdir(lovetmp)
-            except OSError:
-                # If the Love number calculation DID fail, then the
-                # above attempt to get rid of the files associated with it
-                # will probably raise exceptions (directory not found, etc)
-                # and that's okay - we just do nothing.
-                pass
+    def love_params(self): #
+        """
+        Collect the parameters which determine the Love numbers, in the order
+        and units expected by John Wahr's Love number code (see L{love_input}),
+        and by L{lovenum.love_numbers}.
+
+        @return: mean density [g/cm^3], forcing period [days], upper and
+        lower ice viscosities [Pa s], Young's modulus [Pa], Poisson's ratio
+        and density [g/cm^3] of the core, and of the ice, ocean thickness
+        [km], density [g/cm^3] and P-wave velocity, satellite radius [km], and
+        upper and lower ice thicknesses [km].
+        @rtype: tuple
+        """
+        sat = self.love_satellite()
+        return((sat.density()/1000.0,\
+                self.forcing_period()/86400,\
+                sat.layers[3].viscosity,\
+                sat.layers[2].viscosity,\
+                sat.layers[0].youngs_modulus(),\
+                sat.layers[0].poissons_ratio(),\
+                sat.layers[0].density/1000.0,\
+                sat.layers[3].youngs_modulus(),\
+                sat.layers[3].poissons_ratio(),\
+                sat.layers[3].density/1000.0,\
+                sat.layers[1].thickness/1000.0,\
+                sat.layers[1].density/1000.0,\
+                sat.layers[1].p_wave_velocity(),\
+                sat.radius()/1000.0,\
+                sat.layers[3].thickness/1000.0,\
+                sat.layers[2].thickness/1000.0))
+
+    # end love_params()
+
+    def love_satellite(self): #
+        """
+        Return the satellite structure to be used in calculating the Love
+        numbers, as a L{SatelliteSnapshot}.  This is just a snapshot of the
+        satellite, unless the forcing requires the structure to be altered
+        (see L{NSR.love_satellite}).
 
-    # end calcLoveJohnWahr4Layer()
+        @rtype: L{SatelliteSnapshot}
+        """
+        return(self.satellite.snapshot())
 
     def Delta(self, layer_n=-1):
         """
@@ -1234,6 +2029,101 @@ class StressDef(object): #{{{
         """
         return(self.mu_twiddle()*(self.alpha()*(self.love.h2-3.0*self.love.l2)+self.love.l2))
 
+    def calc_coeffs(self):
+        """
+        Calculate the frequency-dependent coefficients that appear in the
+        expressions for the stress tensor components.
+
+        These are the complex coefficients S{beta}1, S{gamma}1, S{beta}2,
+        S{gamma}2 and S{Gamma} (see Wahr et al. 2008), along with the
+        potential constant Z, and the satellite's surface gravity and radius.
+        If the forcing period is infinite, all of the stresses relax away, and
+        all of the coefficients are zero.
+
+        @return: a dictionary of coefficients, with keys C{b1}, C{g1}, C{b2},
+        C{g2}, C{Gamma}, C{Z}, C{g}, and C{R}.
+        @rtype: dict
+        """
+        if numpy.all(self.omega == 0.0):
+            return(dict(b1=0.0, g1=0.0, b2=0.0, g2=0.0, Gamma=0.0, Z=0.0,\
+                        g=self.satellite.surface_gravity(), R=self.satellite.radius()))
+
+        return(dict(b1    = self.b1(),\
+                    g1    = self.g1(),\
+                    b2    = self.b2(),\
+                    g2    = self.g2(),\
+                    Gamma = self.Gamma(),\
+                    Z     = self.Z(),\
+                    g     = self.satellite.surface_gravity(),\
+                    R     = self.satellite.radius()))
+
+    def coefficients(self):
+        """
+        Return the frequency-dependent coefficients of the stress field (see
+        L{calc_coeffs}), re-calculating them only if the satellite has changed
+        (see L{Satellite.revision}) since they were last calculated, or if the
+        Love numbers have been re-calculated.
+
+        Evaluating these coefficients requires walking the satellite's layers
+        several times, so caching them makes the evaluation of the stresses at
+        a single point much cheaper.
+
+        @return: a dictionary of coefficients, as described in L{calc_coeffs}.
+        @rtype: dict
+        """
+        params = self.satellite.revision
+        if self.coeffs is None or params != self.coeffs_params:
+            # Plain Python numbers make single point calculations (see
+            # L{StressCalc.point_tensor}) much faster than NumPy scalars do:
+            self.coeffs = dict([ (k, numpy.asarray(v).item()) for k, v in self.calc_coeffs().items() ])
+            self.coeffs_params = params
+        return(self.coeffs)
+
+    def amplitudes(self, trig, coeffs=None):
+        """
+        Calculate the complex amplitudes of the three stress tensor components.
+
+        A stress field having a single forcing frequency S{omega} can be
+        written as C{T = Re(A*exp(1j*omega*t))}, where the complex amplitude
+        C{A} depends only on location.  Writing the stresses this way allows
+        L{StressCalc} to evaluate the trigonometric functions of location
+        (see L{trig_terms}) and time only once, no matter how many stress
+        fields or tensor components are being calculated.
+
+        In the base class, this method returns None, in which case
+        L{StressCalc} falls back on the L{Ttt}, L{Tpt} and L{Tpp} methods.
+
+        @param trig: trigonometric functions of location, as returned by
+        L{trig_terms}.
+        @type trig: dict
+        @param coeffs: the coefficients to calculate the amplitudes with (see
+        L{calc_coeffs}), if not the stress field's own (see L{coefficients}).
+        L{EnsembleStressCalc} passes arrays of them, one element per member.
+        @type coeffs: dict
+        @return: the complex amplitudes (Att, Apt, App) of the S{tau}_S{theta}S{theta},
+        S{tau}_S{phi}S{theta} and S{tau}_S{phi}S{phi} components of the stress tensor.
+        @rtype: tuple
+        """
+        return(None)
+
+    def amplitude_gradients(self, trig):
+        """
+        Calculate the derivatives of the complex amplitudes (see
+        L{amplitudes}) with respect to co-latitude and longitude.
+
+        In the base class, this method returns None, and L{StressCalc} cannot
+        calculate the gradients of the stresses.
+
+        @param trig: trigonometric functions of location, as returned by
+        L{trig_terms}, along with sin(theta) (C{sintheta}) and sin(2*theta)
+        (C{sin2theta}).
+        @type trig: dict
+        @return: the derivatives of (Att, Apt, App) with respect to
+        S{theta}, and then with respect to S{phi}.
+        @rtype: tuple of tuples
+        """
+        return(None)
+
     # end Common StressDef Methods 
 
     def Ttt(self, theta, phi, t):
@@ -1310,7 +2200,12 @@ class NSR(StressDef): #{{{
     discussion of this stress field in in Wahr et al. (2008).
     """
 
-    def __init__(self, satellite):
+    # The stresses depend on longitude only through 2*phi, Ttt and Tpp on
+    # co-latitude only through cos(2*theta), and Tpt through cos(theta):
+    lon_period = numpy.pi
+    equator_symmetric = True
+
+    def __init__(self, satellite, love_tol=None):
         """Initialize the definition of the stresses due to NSR of the ice shell.
         
         The forcing frequency S{omega} is the frequency with which a point on
@@ -1330,6 +2225,9 @@ class NSR(StressDef): #{{{
 
         @param satellite: the satellite to which the stress is being applied.
         @type satellite: L{Satellite}
+        @param love_tol: if given, interpolate the Love numbers from a
+        L{LoveTable} with this relative tolerance (see L{StressDef.love_tol}).
+        @type love_tol: float
         @return: an object defining the NSR stresses for a particular satellite.
         @rtype: L{NSR}
 
@@ -1337,23 +2235,39 @@ class NSR(StressDef): #{{{
 
         self.__name__ = 'NSR'
         self.satellite = satellite
-        # Set the core's shear modulus to be low, so we get a core that responds to
-        # the NSR forcing nearly as a fluid:
-        self.satellite.layers[0].lame_mu = self.satellite.layers[0].lame_mu/1000
-
-        # For NSR, the forcing period is only half the NSR period (or the forcing
-        # frequency is twice the NSR frequency) because the shell goes through an
-        # an entire oscillation in half a rotation.  That's why this has 4*pi instead
-        # of only 2*pi.
-        self.omega = 4.0*scipy.pi/self.satellite.nsr_period
+        self.love_tol = love_tol
+
+        # See forcing_frequency() for why this is twice the NSR frequency:
+        self.omega = self.forcing_frequency()
         self.calcLove()
 
-        # Restore the satellite's core to normal...
-        self.satellite.layers[0].lame_mu = self.satellite.layers[0].lame_mu*1000
+        # Note that we don't use |= here, as that would alter the set
+        # belonging to the StressDef class, which all other StressDefs share.
+        self.dependson = self.dependson | set(['PLANET_MASS',\
+                                               'ORBIT_SEMIMAJOR_AXIS',\
+                                               'NSR_PERIOD'])
+
+    def forcing_frequency(self):
+        """
+        Calculate the NSR forcing frequency S{omega} from the satellite's NSR
+        period.
+
+        For NSR, the forcing period is only half the NSR period (or the
+        forcing frequency is twice the NSR frequency) because the shell goes
+        through an entire oscillation in half a rotation.
+        """
+        return(4.0*scipy.pi/self.satellite.nsr_period)
+
+    def love_satellite(self):
+        """
+        Return a L{SatelliteSnapshot} of the satellite, in which the core's
+        shear modulus is set low, so we get a core that responds to the NSR
+        forcing nearly as a fluid.  The satellite itself is not altered.
 
-        self.dependson |= set(['PLANET_MASS',\
-                               'ORBIT_SEMIMAJOR_AXIS',\
-                               'NSR_PERIOD'])
+        @rtype: L{SatelliteSnapshot}
+        """
+        snapshot = self.satellite.snapshot()
+        return(snapshot.replace_layer(0, lame_mu=snapshot.layers[0].lame_mu/1000))
 
     def Ttt(self, theta, phi, t):
         """
@@ -1363,9 +2277,10 @@ class NSR(StressDef): #{{{
         
         if self.omega == 0:
             return(0.0)
-        TttN = (self.b1()-self.g1()*scipy.cos(2.0*theta))*scipy.exp(1j*(2.0*phi+self.omega*t))
+        c = self.coefficients()
+        TttN = (c['b1']-c['g1']*scipy.cos(2.0*theta))*scipy.exp(1j*(2.0*phi+self.omega*t))
         TttN = TttN.real
-        TttN = TttN * (self.Z()/(2.0*self.satellite.surface_gravity()*self.satellite.radius()))
+        TttN = TttN * (c['Z']/(2.0*c['g']*c['R']))
         return(TttN)
 
     def Tpp(self, theta, phi, t):
@@ -1374,9 +2289,10 @@ class NSR(StressDef): #{{{
         """
         if self.omega == 0:
             return(0.0)
-        TppN = (self.b2()-self.g2()*scipy.cos(2.0*theta))*scipy.exp(1j*(2.0*phi+self.omega*t))
+        c = self.coefficients()
+        TppN = (c['b2']-c['g2']*scipy.cos(2.0*theta))*scipy.exp(1j*(2.0*phi+self.omega*t))
         TppN = TppN.real
-        TppN = TppN * (self.Z()/(2.0*self.satellite.surface_gravity()*self.satellite.radius()))
+        TppN = TppN * (c['Z']/(2.0*c['g']*c['R']))
         return(TppN)
 
     def Tpt(self, theta, phi, t):
@@ -1387,11 +2303,46 @@ class NSR(StressDef): #{{{
         
         if self.omega == 0:
             return(0.0)
-        TptN = self.Gamma()*1j*scipy.exp(1j*(2.0*phi+self.omega*t))*scipy.cos(theta)
+        c = self.coefficients()
+        TptN = c['Gamma']*1j*scipy.exp(1j*(2.0*phi+self.omega*t))*scipy.cos(theta)
         TptN = TptN.real
-        TptN = TptN * (2.0*self.Z()/(self.satellite.surface_gravity()*self.satellite.radius()))
+        TptN = TptN * (2.0*c['Z']/(c['g']*c['R']))
         return(TptN)
 
+    def amplitudes(self, trig, coeffs=None):
+        """
+        Calculates the complex amplitudes of the NSR stress tensor components.
+        See L{StressDef.amplitudes}.
+        """
+        c = coeffs
+        if c is None:
+            c = self.coefficients()
+        scale = c['Z']/(2.0*c['g']*c['R'])
+        exp2phi = trig['cos2phi'] + 1j*trig['sin2phi']
+
+        AttN = ((c['b1']-c['g1']*trig['cos2theta'])*scale)*exp2phi
+        AppN = ((c['b2']-c['g2']*trig['cos2theta'])*scale)*exp2phi
+        AptN = ((4.0j*scale*c['Gamma'])*trig['costheta'])*exp2phi
+        return(AttN, AptN, AppN)
+
+    def amplitude_gradients(self, trig):
+        """
+        Calculates the derivatives of the complex amplitudes of the NSR stress
+        tensor components.  See L{StressDef.amplitude_gradients}.
+        """
+        AttN, AptN, AppN = self.amplitudes(trig)
+
+        c = self.coefficients()
+        scale = c['Z']/(2.0*c['g']*c['R'])
+        exp2phi = trig['cos2phi'] + 1j*trig['sin2phi']
+
+        dAttN_dtheta = ((2.0*c['g1']*scale)*trig['sin2theta'])*exp2phi
+        dAppN_dtheta = ((2.0*c['g2']*scale)*trig['sin2theta'])*exp2phi
+        dAptN_dtheta = ((-4.0j*scale*c['Gamma'])*trig['sintheta'])*exp2phi
+
+        # The amplitudes depend on longitude only through exp(2j*phi):
+        return((dAttN_dtheta, dAptN_dtheta, dAppN_dtheta), (2.0j*AttN, 2.0j*AptN, 2.0j*AppN))
+
 #}}} end class NSR
 
 class Diurnal(StressDef): #{{{
@@ -1403,24 +2354,33 @@ class Diurnal(StressDef): #{{{
     discussion of this stress field in in Wahr et al. (2008).
     """
 
-    def __init__(self, satellite):
+    # As with L{NSR}, the stresses depend on longitude only through 2*phi, and
+    # are mirrored across the equator:
+    lon_period = numpy.pi
+    equator_symmetric = True
+
+    def __init__(self, satellite, love_tol=None):
         """
         Sets the object's satellite and omega attributes; calculates Love numbers.
 
         @param satellite: the satellite to which the stress is being applied.
         @type satellite: L{Satellite}
+        @param love_tol: if given, interpolate the Love numbers from a
+        L{LoveTable} with this relative tolerance (see L{StressDef.love_tol}).
+        @type love_tol: float
         @return: an object defining the NSR stresses for a particular satellite.
         @rtype: L{NSR}
         """
 
         self.__name__ = 'Diurnal'
         self.satellite = satellite
-        self.omega = self.satellite.mean_motion()
+        self.love_tol = love_tol
+        self.omega = self.forcing_frequency()
         self.calcLove()
 
-        self.dependson |= set(['ORBIT_ECCENTRICITY',\
-                               'ORBIT_SEMIMAJOR_AXIS',\
-                               'PLANET_MASS'])
+        self.dependson = self.dependson | set(['ORBIT_ECCENTRICITY',\
+                                               'ORBIT_SEMIMAJOR_AXIS',\
+                                               'PLANET_MASS'])
 
     def Ttt(self, theta, phi, t):
         """
@@ -1428,22 +2388,24 @@ class Diurnal(StressDef): #{{{
         stress tensor.
         """
         
-        Ttt1 = 3.0*(self.b1()-self.g1()*scipy.cos(2.0*theta))*scipy.exp(1j*self.omega*t)*scipy.cos(2.0*phi)
-        Ttt2 = -1.0*(self.b1()+3.0*self.g1()*scipy.cos(2.0*theta))*scipy.exp(1j*self.omega*t)
-        Ttt3 = -4.0*(self.b1()-self.g1()*scipy.cos(2.0*theta))*1j*scipy.exp(1j*self.omega*t)*scipy.sin(2.0*phi)
+        c = self.coefficients()
+        Ttt1 = 3.0*(c['b1']-c['g1']*scipy.cos(2.0*theta))*scipy.exp(1j*self.omega*t)*scipy.cos(2.0*phi)
+        Ttt2 = -1.0*(c['b1']+3.0*c['g1']*scipy.cos(2.0*theta))*scipy.exp(1j*self.omega*t)
+        Ttt3 = -4.0*(c['b1']-c['g1']*scipy.cos(2.0*theta))*1j*scipy.exp(1j*self.omega*t)*scipy.sin(2.0*phi)
         TttD = Ttt1 + Ttt2 + Ttt3
-        TttD = TttD.real*self.satellite.orbit_eccentricity*self.Z()/(2.0*self.satellite.surface_gravity()*self.satellite.radius())
+        TttD = TttD.real*self.satellite.orbit_eccentricity*c['Z']/(2.0*c['g']*c['R'])
         return(TttD)
 
     def Tpp(self, theta, phi, t):
         """
         Calculates the S{tau}_S{phi}S{phi} (east-west) component of the stress tensor.
         """
-        Tpp1 = 3.0*(self.b2()-self.g2()*scipy.cos(2.0*theta))*scipy.exp(1j*self.omega*t)*scipy.cos(2.0*phi)
-        Tpp2 = -1.0*(self.b2()+3.0*self.g2()*scipy.cos(2.0*theta))*scipy.exp(1j*self.omega*t)
-        Tpp3 = -4.0*(self.b2()-self.g2()*scipy.cos(2.0*theta))*1j*scipy.exp(1j*self.omega*t)*scipy.sin(2.0*phi)
+        c = self.coefficients()
+        Tpp1 = 3.0*(c['b2']-c['g2']*scipy.cos(2.0*theta))*scipy.exp(1j*self.omega*t)*scipy.cos(2.0*phi)
+        Tpp2 = -1.0*(c['b2']+3.0*c['g2']*scipy.cos(2.0*theta))*scipy.exp(1j*self.omega*t)
+        Tpp3 = -4.0*(c['b2']-c['g2']*scipy.cos(2.0*theta))*1j*scipy.exp(1j*self.omega*t)*scipy.sin(2.0*phi)
         TppD = Tpp1 + Tpp2 + Tpp3
-        TppD = TppD.real*self.satellite.orbit_eccentricity*self.Z()/(2.0*self.satellite.surface_gravity()*self.satellite.radius())
+        TppD = TppD.real*self.satellite.orbit_eccentricity*c['Z']/(2.0*c['g']*c['R'])
         return(TppD)
 
     def Tpt(self, theta, phi, t):
@@ -1451,14 +2413,70 @@ class Diurnal(StressDef): #{{{
         Calculates the S{tau}_S{phi}S{theta} (off-diagonal) component of the
         stress tensor.
         """
-        Tpt1 = -4.0*self.Gamma()*1j*scipy.exp(1j*(self.omega*t))*scipy.cos(theta)*scipy.cos(2.0*phi)
-        Tpt2 = -3.0*self.Gamma()*scipy.exp(1j*self.omega*t)*scipy.cos(theta)*scipy.sin(2.0*phi)
+        c = self.coefficients()
+        Tpt1 = -4.0*c['Gamma']*1j*scipy.exp(1j*(self.omega*t))*scipy.cos(theta)*scipy.cos(2.0*phi)
+        Tpt2 = -3.0*c['Gamma']*scipy.exp(1j*self.omega*t)*scipy.cos(theta)*scipy.sin(2.0*phi)
         TptD = Tpt1 + Tpt2
-        TptD = TptD.real*2.0*self.satellite.orbit_eccentricity*self.Z()/(self.satellite.surface_gravity()*self.satellite.radius())
+        TptD = TptD.real*2.0*self.satellite.orbit_eccentricity*c['Z']/(c['g']*c['R'])
         return(TptD)
 
+    def forcing_frequency(self):
+        """The Diurnal forcing frequency S{omega} is the satellite's orbital
+        mean motion."""
+        return(self.satellite.mean_motion())
+
+    def calc_coeffs(self):
+        """
+        In addition to the coefficients common to all stress fields (see
+        L{StressDef.calc_coeffs}), the Diurnal stresses depend on the orbital
+        eccentricity, C{e}.
+        """
+        coeffs = StressDef.calc_coeffs(self)
+        coeffs['e'] = self.satellite.orbit_eccentricity
+        return(coeffs)
+
+    def amplitudes(self, trig, coeffs=None):
+        """
+        Calculates the complex amplitudes of the Diurnal stress tensor
+        components.  See L{StressDef.amplitudes}.
+        """
+        c = coeffs
+        if c is None:
+            c = self.coefficients()
+        scale = c['e']*c['Z']/(2.0*c['g']*c['R'])
+        phi_part = 3.0*trig['cos2phi'] - 4.0j*trig['sin2phi']
+
+        AttD = ((c['b1']-c['g1']*trig['cos2theta'])*scale)*phi_part - (c['b1']+3.0*c['g1']*trig['cos2theta'])*scale
+        AppD = ((c['b2']-c['g2']*trig['cos2theta'])*scale)*phi_part - (c['b2']+3.0*c['g2']*trig['cos2theta'])*scale
+        AptD = ((4.0*scale*c['Gamma'])*trig['costheta'])*(-4.0j*trig['cos2phi'] - 3.0*trig['sin2phi'])
+        return(AttD, AptD, AppD)
+
+    def amplitude_gradients(self, trig):
+        """
+        Calculates the derivatives of the complex amplitudes of the Diurnal
+        stress tensor components.  See L{StressDef.amplitude_gradients}.
+        """
+        c = self.coefficients()
+        scale = c['e']*c['Z']/(2.0*c['g']*c['R'])
+        phi_part = 3.0*trig['cos2phi'] - 4.0j*trig['sin2phi']
+        dphi_part = -6.0*trig['sin2phi'] - 8.0j*trig['cos2phi']
+        theta_part = trig['sin2theta']*(phi_part + 3.0)
+
+        dAttD_dtheta = (2.0*c['g1']*scale)*theta_part
+        dAppD_dtheta = (2.0*c['g2']*scale)*theta_part
+        dAptD_dtheta = ((-4.0*scale*c['Gamma'])*trig['sintheta'])*(-4.0j*trig['cos2phi'] - 3.0*trig['sin2phi'])
+
+        dAttD_dphi = ((c['b1']-c['g1']*trig['cos2theta'])*scale)*dphi_part
+        dAppD_dphi = ((c['b2']-c['g2']*trig['cos2theta'])*scale)*dphi_part
+        dAptD_dphi = ((4.0*scale*c['Gamma'])*trig['costheta'])*(8.0j*trig['sin2phi'] - 6.0*trig['cos2phi'])
+
+        return((dAttD_dtheta, dAptD_dtheta, dAppD_dtheta), (dAttD_dphi, dAptD_dphi, dAppD_dphi))
+
 #}}} end class Diurnal
 
+# The values which L{StressCalc.principal_components} can calculate:
+PRINCIPAL_OUTPUTS = ('tens_mag', 'tens_az', 'comp_mag', 'comp_az', 'stress_diff')
+
 class StressCalc(object): #{{{
     """
     An object which calculates the stresses on the surface of a L{Satellite}
@@ -1467,6 +2485,9 @@ class StressCalc(object): #{{{
     @ivar stresses: a list of L{StressDef} objects, corresponding to the stresses which are to
     be included in the calculations done by the L{StressCalc} object.
     @type stresses: list
+    @ivar global_means: memoized results of L{mean_global_stressmag} and
+    L{mean_global_stressdiff}, keyed by their arguments and L{cache_key}.
+    @type global_means: dict
     """
 
     def __init__(self, stressdefs):
@@ -1482,6 +2503,34 @@ class StressCalc(object): #{{{
         """
 
         self.stresses = stressdefs
+        self.global_means = {}
+
+    def snapshot(self): #{{{2
+        """
+        Return a copy of the L{StressCalc} which is independent of any
+        L{Satellite} object, and is cheap to pickle and ship to other
+        processes.
+
+        Each stress field is copied, with its satellite replaced by a
+        L{SatelliteSnapshot}, and its coefficients calculated in advance, so
+        that nothing (in particular, not the Love numbers) needs to be
+        re-calculated when the copy is used.
+
+        @rtype: L{StressCalc}
+        """
+        import copy
+
+        stresses = []
+        for stress in self.stresses:
+            frozen = copy.copy(stress)
+            frozen.satellite = stress.satellite.snapshot()
+            frozen.coeffs = stress.coefficients()
+            frozen.coeffs_params = frozen.satellite.revision
+            stresses.append(frozen)
+
+        return(StressCalc(stresses))
+
+    #}}}2 end snapshot
 
     def tensor(self, theta, phi, t): #{{{2
         """
@@ -1502,79 +2551,1705 @@ class StressCalc(object): #{{{
 
         """
 
-        # First calculate all of the stresses, at all locations:
-        Ttt = numpy.array( [ stress.Ttt(theta, phi, t) for stress in self.stresses ] )
-        Tpt = numpy.array( [ stress.Tpt(theta, phi, t) for stress in self.stresses ] )
-        Tpp = numpy.array( [ stress.Tpp(theta, phi, t) for stress in self.stresses ] )
-
-        # Now, if there are multiple stresses (e.g. NSR and Diurnal), sum
-        # across them to get the total stress from all fields:
-        Ttt = Ttt.sum(axis=0)
-        Tpt = Tpt.sum(axis=0)
-        Tpp = Tpp.sum(axis=0)
-
-        return(Ttt,Tpt,Tpp)
+        # The output arrays, into which each of the stress fields will add its
+        # contribution:
+        shape = numpy.broadcast(theta, phi, t).shape
+        Ttt = numpy.zeros(shape)
+        Tpt = numpy.zeros(shape)
+        Tpp = numpy.zeros(shape)
+
+        # The trigonometric functions of location, and the complex exponential
+        # of time for each forcing frequency, are shared by all the stresses,
+        # so we only calculate them once:
+        trig = trig_terms(theta, phi)
+        expwt = {}
+
+        for stress in self.stresses:
+            amps = stress.amplitudes(trig)
+            if amps is None:
+                Ttt += stress.Ttt(theta, phi, t)
+                Tpt += stress.Tpt(theta, phi, t)
+                Tpp += stress.Tpp(theta, phi, t)
+                continue
+
+            if stress.omega not in expwt:
+                expwt[stress.omega] = numpy.exp(1j*stress.omega*numpy.asarray(t))
+
+            Att, Apt, App = amps
+            Ttt += (Att*expwt[stress.omega]).real
+            Tpt += (Apt*expwt[stress.omega]).real
+            Tpp += (App*expwt[stress.omega]).real
+
+        # Indexing with an empty tuple turns zero dimensional arrays back into
+        # scalars, and leaves everything else alone:
+        return(Ttt[()],Tpt[()],Tpp[()])
 
     # }}}2 end tensor
 
-    def principal_components(self, theta, phi, t): #{{{2
+    def point_tensor(self, theta, phi, t): #{{{2
         """
-        Calculates the principal components of the surface stresses and returns
-        them as a tuple: (tens_mag, tens_az, comp_mag, comp_az), i.e. the
-        magnitudes and azimuths (orientation as an angle clockwise from north)
-        for the more tensile (more positive) and less tensile (more
-        compressive, more negative) stresses.  Azimuths are in radians, always
-        between 0 and pi, and are always separated by pi/2 radians.
+        Calculate the stress tensor at a single point and time, returning the
+        components (Ttt, Tpt, Tpp) as plain floats.
 
+        This gives the same result as L{tensor}, but avoids the overhead of
+        NumPy, which dominates the cost of calculating the stresses at a
+        single point.  It is intended for use where the points can only be
+        visited one at a time, e.g. when tracing a lineament across the
+        surface (see L{lineament.lingen_nsr}).
+
+        @param theta: the co-latitude of the point [rad].
+        @type theta: float
+        @param phi: the east-positive longitude of the point [rad].
+        @type phi: float
+        @param t: the time since pericenter [s].
+        @type t: float
+        @return: (Ttt, Tpt, Tpp)
+        @rtype: tuple of float
         """
-        Ttt, Tpt, Tpp = self.tensor(theta,phi,t)
+        theta, phi, t = float(theta), float(phi), float(t)
+        trig = dict(theta     = theta,\
+                    phi       = phi,\
+                    costheta  = math.cos(theta),\
+                    cos2theta = math.cos(2.0*theta),\
+                    cos2phi   = math.cos(2.0*phi),\
+                    sin2phi   = math.sin(2.0*phi))
+
+        Ttt = Tpt = Tpp = 0.0
+        for stress in self.stresses:
+            amps = stress.amplitudes(trig)
+            if amps is None:
+                Ttt += float(stress.Ttt(theta, phi, t))
+                Tpt += float(stress.Tpt(theta, phi, t))
+                Tpp += float(stress.Tpp(theta, phi, t))
+                continue
+
+            Att, Apt, App = amps
+            if t != 0.0:
+                expwt = cmath.exp(1j*stress.omega*t)
+                Att, Apt, App = Att*expwt, Apt*expwt, App*expwt
+            Ttt += Att.real
+            Tpt += Apt.real
+            Tpp += App.real
+
+        return(Ttt, Tpt, Tpp)
+
+    #}}}2 end point_tensor
+
+    def tensor_grid(self, thetas, phis, times): #{{{2
+        """
+        Calculates surface stresses on a regular grid of co-latitudes,
+        longitudes and times, and returns the three elements of the membrane
+        stress tensor (Ttt,Tpt,Tpp), each as an array having the shape
+        (len(times), len(thetas), len(phis)).
+
+        Every term in the L{NSR} and L{Diurnal} stress fields is a product of
+        functions of co-latitude, longitude, and time alone, so the
+        trigonometric functions are evaluated only once along each of the
+        three axes, and the output cube is formed by broadcasting them
+        together, instead of evaluating them at every point in a meshgrid.
+
+        Where the grid includes points which the symmetries of the stress
+        fields make redundant (see L{grid_symmetry}), e.g. both hemispheres
+        of the satellite, the stresses are calculated only at the distinct
+        points, and copied to the rest.
+
+        @param thetas: the co-latitudes of the grid [rad].
+        @type thetas: numpy.ndarray
+        @param phis: the east-positive longitudes of the grid [rad].
+        @type phis: numpy.ndarray
+        @param times: the times of the grid, in seconds elapsed since
+        pericenter [s].
+        @type times: numpy.ndarray
+        @return: The 3 elements of the symmetric 2x2 membrane stress tensor S{tau}
+        @rtype: tuple of numpy.ndarray
+
+        """
+
+        symmetry = self.grid_symmetry(thetas, phis)
+
+        thetas = symmetry.thetas.reshape(1,-1,1)
+        phis   = symmetry.phis.reshape(1,1,-1)
+        times  = numpy.atleast_1d(times).reshape(-1,1,1)
+
+        # L{tensor} broadcasts its inputs against each other, and the
+        # trigonometric functions it evaluates (see L{trig_terms}) keep the
+        # shapes of their arguments, so all we need to do is lay the three
+        # axes out along different dimensions:
+        Ttt, Tpt, Tpp = self.tensor(thetas, phis, times)
+
+        return(symmetry.expand(Ttt), symmetry.expand(Tpt, parity=-1), symmetry.expand(Tpp))
+
+    # }}}2 end tensor_grid
+
+    def grid_symmetry(self, thetas, phis): #{{{2
+        """
+        Work out which points of a grid of co-latitudes and longitudes are
+        made redundant by the symmetries shared by all of the stress fields
+        (see L{StressDef.lon_period} and L{StressDef.equator_symmetric}).
+
+        The L{NSR} and L{Diurnal} stresses repeat every 180 degrees of
+        longitude, and are mirrored across the equator, so on a global grid
+        only a quarter of the points need be calculated.
+
+        @param thetas: the co-latitudes of the grid [rad].
+        @type thetas: numpy.ndarray
+        @param phis: the east-positive longitudes of the grid [rad].
+        @type phis: numpy.ndarray
+        @rtype: L{GridSymmetry}
+        """
+        lon_period = max([ stress.lon_period for stress in self.stresses ] + [numpy.pi])
+        equator_symmetric = numpy.all([ stress.equator_symmetric for stress in self.stresses ])
+        return(GridSymmetry(thetas, phis, lon_period=lon_period, equator_symmetric=equator_symmetric))
+
+    # }}}2 end grid_symmetry
+
+    def harmonics(self, theta, phi): #{{{2
+        """
+        Calculates the complex amplitudes of the surface stresses, grouped by
+        forcing frequency.
+
+        Each of the tidal stress fields is of the form C{Re(A*exp(1j*omega*t))}
+        (see L{StressDef.amplitudes}), so once the amplitudes C{A} have been
+        calculated at a set of locations, the stresses at any time can be
+        found with a single complex multiplication, using
+        L{tensor_from_harmonics}.  This makes sweeping through many times at
+        the same locations (e.g. over the course of an orbit) much cheaper
+        than calling L{tensor} repeatedly.
+
+        Stress fields sharing the same forcing frequency are summed together.
+
+        @param theta: the co-latitude(s) of the point(s) at which to calculate
+        the stress amplitudes [rad].
+        @type theta: float or numpy.ndarray
+        @param phi: the east-positive longitude(s) of the point(s) at which to
+        calculate the stress amplitudes [rad].
+        @type phi: float or numpy.ndarray
+        @return: a dictionary mapping each forcing frequency S{omega} [rad/s]
+        to a tuple of complex amplitudes (Att,Apt,App).
+        @rtype: dict
+
+        @raise NoStressAmplitudesError: if one of the stress fields does not
+        provide its complex amplitudes.
+        """
+
+        trig = trig_terms(theta, phi)
+        harmonics = {}
+
+        for stress in self.stresses:
+            amps = stress.amplitudes(trig)
+            if amps is None:
+                raise NoStressAmplitudesError(stress)
+
+            if stress.omega in harmonics:
+                Att, Apt, App = harmonics[stress.omega]
+                harmonics[stress.omega] = (Att+amps[0], Apt+amps[1], App+amps[2])
+            else:
+                harmonics[stress.omega] = tuple(amps)
 
-        eigval_A, theta_A, phi_A, eigval_B, theta_B, phi_B = eigen2(Ttt, Tpt, Tpp)
+        return(harmonics)
 
-        az_A = numpy.mod(numpy.arctan2(phi_A,-theta_A), numpy.pi)
-        az_B = numpy.mod(numpy.arctan2(phi_B,-theta_B), numpy.pi)
+    # }}}2 end harmonics
 
-        tens_mag = numpy.where(eigval_A >  eigval_B, eigval_A, eigval_B)
-        tens_az  = numpy.where(eigval_A >  eigval_B, az_A, az_B)
-        comp_mag = numpy.where(eigval_A <= eigval_B, eigval_A, eigval_B)
-        comp_az  = numpy.where(eigval_A <= eigval_B, az_A, az_B)
+    def tensor_from_harmonics(self, harmonics, t, derivative=0): #{{{2
+        """
+        Calculates surface stresses from the complex amplitudes returned by
+        L{harmonics}, and returns them as the elements of the membrane stress
+        tensor: (Ttt,Tpt,Tpp).
+
+        The time is broadcast against the shape of the amplitudes, so a whole
+        orbit's worth of stresses on a (lat, lon) grid can be had at once by
+        passing in C{times[:,numpy.newaxis,numpy.newaxis]}.
+
+        The rate of change of the stresses is also easily had, since the
+        derivative of C{Re(A*exp(1j*omega*t))} with respect to time is just
+        C{Re(1j*omega*A*exp(1j*omega*t))}.
+
+        @param harmonics: complex stress amplitudes, as returned by
+        L{harmonics}.
+        @type harmonics: dict
+        @param t: the time(s) in seconds elapsed since pericenter, at which to
+        calculate the stresses [s].
+        @type t: float or numpy.ndarray
+        @param derivative: which time derivative of the stresses to
+        calculate, by default the stresses themselves [Pa/s^n].
+        @type derivative: int
+        @return: The 3 elements of the symmetric 2x2 membrane stress tensor S{tau}
+        @rtype: tuple
+        """
 
-        return(tens_mag, tens_az, comp_mag, comp_az)
+        Ttt = 0.0
+        Tpt = 0.0
+        Tpp = 0.0
+        for omega, (Att, Apt, App) in harmonics.items():
+            expwt = numpy.exp(1j*omega*numpy.asarray(t))
+            if derivative != 0:
+                expwt = expwt*(1j*omega)**derivative
+            Ttt = Ttt + (Att*expwt).real
+            Tpt = Tpt + (Apt*expwt).real
+            Tpp = Tpp + (App*expwt).real
+
+        return(Ttt,Tpt,Tpp)
+
+    # }}}2 end tensor_from_harmonics
+
+    def principal_components(self, theta, phi, t, outputs=None, out=None): #{{{2
+        """
+        Calculates the principal components of the surface stresses and returns
+        them as a tuple: (tens_mag, tens_az, comp_mag, comp_az), i.e. the
+        magnitudes and azimuths (orientation as an angle clockwise from north)
+        for the more tensile (more positive) and less tensile (more
+        compressive, more negative) stresses.  Azimuths are in radians, always
+        between 0 and pi, and are always separated by pi/2 radians.
+
+        Callers needing only some of these values may ask for them by name,
+        using outputs, and only the work needed to calculate those values is
+        done.  As well as the four above, C{stress_diff}, the difference
+        between the more and less tensile stresses, is available.  For
+        example, C{principal_components(theta, phi, t, ('tens_mag',
+        'comp_az'))} returns only those two arrays, and
+        C{principal_components(theta, phi, t, 'stress_diff')} returns a single
+        array.
+
+        The principal components are calculated directly from the stress
+        tensor S{tau}: the magnitudes are M{m +/- r}, where M{m} is the mean of
+        the normal stresses and M{r} is the radius of Mohr's circle, and the
+        more tensile stress lies at an angle of half M{arctan2(2 Tpt, Ttt-Tpp)}
+        from the co-latitude direction.
+
+        @param theta: the co-latitude(s) at which to calculate the stresses [rad].
+        @param phi: the east-positive longitude(s) [rad].
+        @param t: the time(s) since pericenter [s].
+        @param outputs: the name, or a sequence of the names, of the values
+        to calculate, from L{PRINCIPAL_OUTPUTS}.  By default, all of
+        (tens_mag, tens_az, comp_mag, comp_az) are returned.
+        @type outputs: str or sequence of str
+        @param out: arrays into which to write the results, having the shape
+        that theta, phi and t broadcast to: one array if outputs is a single
+        name, otherwise a sequence with one array (or None) for each output.
+        @return: an array for each of the requested outputs, or a single
+        array if outputs is a single name.
+        @raise InvalidPrincipalOutputError: if an unknown output is requested.
+        """
+        if outputs is None:
+            outputs = ('tens_mag', 'tens_az', 'comp_mag', 'comp_az')
+
+        single = isinstance(outputs, basestring)
+        if single:
+            outputs = (outputs,)
+            out = (out,)
+        elif out is None:
+            out = (None,)*len(outputs)
+
+        for name in outputs:
+            if name not in PRINCIPAL_OUTPUTS:
+                raise InvalidPrincipalOutputError(name)
+
+        Ttt, Tpt, Tpp = self.tensor(theta,phi,t)
+
+        # Half the difference of the normal stresses, which both the radius of
+        # Mohr's circle and the azimuths require:
+        half_diff = 0.5*(Ttt - Tpp)
+
+        results = {}
+        for name, o in zip(outputs, out):
+            if name == 'stress_diff':
+                results[name] = numpy.multiply(numpy.hypot(half_diff, Tpt), 2.0, o)
+
+            elif name in ('tens_mag', 'comp_mag'):
+                if 'radius' not in results:
+                    results['radius'] = numpy.hypot(half_diff, Tpt)
+                    results['mean']   = 0.5*(Ttt + Tpp)
+                if name == 'tens_mag':
+                    results[name] = numpy.add(results['mean'], results['radius'], o)
+                else:
+                    results[name] = numpy.subtract(results['mean'], results['radius'], o)
+
+            elif name in ('tens_az', 'comp_az'):
+                # The azimuth of the more tensile stress, measured clockwise
+                # from north (the negative co-latitude direction):
+                az = numpy.multiply(numpy.arctan2(Tpt, half_diff, o), -0.5, o)
+                if name == 'comp_az':
+                    az = numpy.add(az, 0.5*numpy.pi, o)
+                results[name] = numpy.mod(az, numpy.pi, o)
+
+        if single:
+            return(results[outputs[0]])
+        return(tuple([ results[name] for name in outputs ]))
 
     #}}}2 end principal_components
 
+    def point_principal_components(self, theta, phi, t): #{{{2
+        """
+        Calculate the principal components of the stresses at a single point
+        and time, returning (tens_mag, tens_az, comp_mag, comp_az) as plain
+        floats.  This is the single point equivalent of
+        L{principal_components}, using L{point_tensor}.
+
+        @param theta: the co-latitude of the point [rad].
+        @type theta: float
+        @param phi: the east-positive longitude of the point [rad].
+        @type phi: float
+        @param t: the time since pericenter [s].
+        @type t: float
+        @rtype: tuple of float
+        """
+        Ttt, Tpt, Tpp = self.point_tensor(theta, phi, t)
+
+        half_diff = 0.5*(Ttt - Tpp)
+        radius    = math.hypot(half_diff, Tpt)
+        mean      = 0.5*(Ttt + Tpp)
+        tens_az   = (-0.5*math.atan2(Tpt, half_diff)) % math.pi
+        comp_az   = (tens_az + 0.5*math.pi) % math.pi
+
+        return(mean+radius, tens_az, mean-radius, comp_az)
+
+    #}}}2 end point_principal_components
+
+    def tensor_gradient(self, theta, phi, t): #{{{2
+        """
+        Calculates the derivatives of the elements of the surface stress
+        tensor (Ttt,Tpt,Tpp) with respect to co-latitude and longitude.
+
+        The stress fields are simple trigonometric functions of location, so
+        their derivatives are found analytically (see
+        L{StressDef.amplitude_gradients}), at little more cost than the
+        stresses themselves.
+
+        @param theta: the co-latitude(s) at which to calculate the gradients [rad].
+        @param phi: the east-positive longitude(s) [rad].
+        @param t: the time(s) since pericenter [s].
+        @return: the derivatives of (Ttt,Tpt,Tpp) with respect to S{theta}
+        [Pa/rad], and then with respect to S{phi} [Pa/rad].
+        @rtype: tuple of tuples
+        @raise NoStressAmplitudesError: if one of the stress fields does not
+        provide the derivatives of its amplitudes.
+        """
+        trig = trig_terms(theta, phi)
+        trig['sintheta']  = numpy.sin(theta)
+        trig['sin2theta'] = numpy.sin(2.0*theta)
+
+        dT_dtheta = [0.0, 0.0, 0.0]
+        dT_dphi   = [0.0, 0.0, 0.0]
+        for stress in self.stresses:
+            grads = stress.amplitude_gradients(trig)
+            if grads is None:
+                raise NoStressAmplitudesError(stress)
+
+            expwt = numpy.exp(1j*stress.omega*numpy.asarray(t))
+            for dT, dA in zip((dT_dtheta, dT_dphi), grads):
+                for n in range(3):
+                    dT[n] = dT[n] + (dA[n]*expwt).real
+
+        return(tuple(dT_dtheta), tuple(dT_dphi))
+
+    #}}}2 end tensor_gradient
+
+    def principal_gradients(self, theta, phi, t): #{{{2
+        """
+        Calculates the derivatives of the principal components of the
+        surface stresses (see L{principal_components}) with respect to
+        co-latitude and longitude.
+
+        These follow from the gradients of the stress tensor (see
+        L{tensor_gradient}) and the expressions for the principal components
+        in terms of the tensor, and so are undefined where the stresses are
+        isotropic.
+
+        @param theta: the co-latitude(s) at which to calculate the gradients [rad].
+        @param phi: the east-positive longitude(s) [rad].
+        @param t: the time(s) since pericenter [s].
+        @return: the derivatives of each of (tens_mag, tens_az, comp_mag,
+        comp_az), as pairs: first with respect to S{theta}, and then with
+        respect to S{phi} [Pa/rad or rad/rad].
+        @rtype: tuple of tuples
+        @raise NoStressAmplitudesError: if one of the stress fields does not
+        provide the derivatives of its amplitudes.
+        """
+        Ttt, Tpt, Tpp = self.tensor(theta, phi, t)
+        half_diff = 0.5*(Ttt - Tpp)
+        radius_sq = half_diff**2 + Tpt**2
+        radius = numpy.sqrt(radius_sq)
+
+        tens_mag, tens_az = [], []
+        comp_mag, comp_az = [], []
+        for dTtt, dTpt, dTpp in self.tensor_gradient(theta, phi, t):
+            dmean = 0.5*(dTtt + dTpp)
+            dhalf_diff = 0.5*(dTtt - dTpp)
+            dradius = (half_diff*dhalf_diff + Tpt*dTpt)/radius
+            # The azimuth is -arctan2(Tpt, half_diff)/2:
+            daz = -0.5*(half_diff*dTpt - Tpt*dhalf_diff)/radius_sq
+            tens_mag.append(dmean + dradius)
+            comp_mag.append(dmean - dradius)
+            tens_az.append(daz)
+            comp_az.append(daz)
+
+        return(tuple(tens_mag), tuple(tens_az), tuple(comp_mag), tuple(comp_az))
+
+    #}}}2 end principal_gradients
+
+    def point_principal_gradients(self, theta, phi, t): #{{{2
+        """
+        Calculate the derivatives of the principal components of the stresses
+        at a single point and time with respect to co-latitude and longitude,
+        returning them as plain floats.  This is the single point equivalent
+        of L{principal_gradients}, avoiding the overhead of NumPy, for use
+        where points are visited one at a time (see
+        L{lineament.lingen_nsr}).
+
+        @param theta: the co-latitude of the point [rad].
+        @type theta: float
+        @param phi: the east-positive longitude of the point [rad].
+        @type phi: float
+        @param t: the time since pericenter [s].
+        @type t: float
+        @return: the derivatives of each of (tens_mag, tens_az, comp_mag,
+        comp_az), as pairs: first with respect to S{theta}, and then with
+        respect to S{phi}.
+        @rtype: tuple of tuples of float
+        @raise NoStressAmplitudesError: if one of the stress fields does not
+        provide its amplitudes, or their derivatives.
+        """
+        theta, phi, t = float(theta), float(phi), float(t)
+        trig = dict(theta     = theta,\
+                    phi       = phi,\
+                    costheta  = math.cos(theta),\
+                    cos2theta = math.cos(2.0*theta),\
+                    cos2phi   = math.cos(2.0*phi),\
+                    sin2phi   = math.sin(2.0*phi),\
+                    sintheta  = math.sin(theta),\
+                    sin2theta = math.sin(2.0*theta))
+
+        T  = [0.0, 0.0, 0.0]
+        dT = [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
+        for stress in self.stresses:
+            amps = stress.amplitudes(trig)
+            grads = stress.amplitude_gradients(trig)
+            if amps is None or grads is None:
+                raise NoStressAmplitudesError(stress)
+
+            expwt = cmath.exp(1j*stress.omega*t) if t != 0.0 else 1.0
+            for n in range(3):
+                T[n] += (amps[n]*expwt).real
+                dT[0][n] += (grads[0][n]*expwt).real
+                dT[1][n] += (grads[1][n]*expwt).real
+
+        Ttt, Tpt, Tpp = T
+        half_diff = 0.5*(Ttt - Tpp)
+        radius_sq = half_diff*half_diff + Tpt*Tpt
+        radius = math.sqrt(radius_sq)
+
+        tens_mag, tens_az = [], []
+        comp_mag, comp_az = [], []
+        for dTtt, dTpt, dTpp in dT:
+            dmean = 0.5*(dTtt + dTpp)
+            dhalf_diff = 0.5*(dTtt - dTpp)
+            dradius = (half_diff*dhalf_diff + Tpt*dTpt)/radius
+            daz = -0.5*(half_diff*dTpt - Tpt*dhalf_diff)/radius_sq
+            tens_mag.append(dmean + dradius)
+            comp_mag.append(dmean - dradius)
+            tens_az.append(daz)
+            comp_az.append(daz)
+
+        return(tuple(tens_mag), tuple(tens_az), tuple(comp_mag), tuple(comp_az))
+
+    #}}}2 end point_principal_gradients
+
+    def iter_principal_components(self, theta, phi, t, chunk_size=65536, outputs=None): #{{{2
+        """
+        Calculate the principal components of the stresses in chunks of at
+        most chunk_size points, yielding the results for each chunk in turn.
+
+        theta, phi and t are broadcast against each other as they are by
+        L{principal_components}, but the broadcast inputs are never actually
+        created, so the memory used depends only on chunk_size, not on the
+        total number of points.  The points are visited in the (C) order in
+        which they'd appear in the flattened result.
+
+        @param theta: the co-latitude(s) at which to calculate the stresses [rad].
+        @param phi: the east-positive longitude(s) [rad].
+        @param t: the time(s) since pericenter [s].
+        @param chunk_size: the largest number of points to calculate at once.
+        @type chunk_size: int
+        @param outputs: the values to calculate, as for
+        L{principal_components}.
+        @return: a generator yielding (start, stop, results), where results
+        is what L{principal_components} would return for the points at
+        positions start:stop of the flattened result.
+        """
+        inputs = numpy.broadcast_arrays(theta, phi, t)
+        size = inputs[0].size
+        for start in xrange(0, size, chunk_size):
+            stop = min(start+chunk_size, size)
+            chunk = [ x.flat[start:stop] for x in inputs ]
+            yield(start, stop, self.principal_components(chunk[0], chunk[1], chunk[2], outputs=outputs))
+
+    #}}}2 end iter_principal_components
+
+    def write_principal_components(self, theta, phi, t, out, chunk_size=65536, outputs=None): #{{{2
+        """
+        Calculate the principal components of the stresses chunk by chunk
+        (see L{iter_principal_components}), writing them into the arrays
+        in out as they are calculated.
+
+        The output arrays may be C{numpy.memmap} objects, in which case
+        arbitrarily large calculations can be streamed straight to disk,
+        using only as much memory as one chunk requires.
+
+        @param out: the array (if outputs is a single name) or arrays to
+        write the results into, each having as many elements as theta, phi
+        and t broadcast to.  They are filled in flattened (C) order.
+        @param outputs: the values to calculate, as for
+        L{principal_components}.
+        @return: out
+        """
+        if isinstance(outputs, basestring):
+            arrays = (out,)
+        else:
+            arrays = out
+
+        for start, stop, results in self.iter_principal_components(theta, phi, t, chunk_size=chunk_size, outputs=outputs):
+            if isinstance(outputs, basestring):
+                results = (results,)
+            for array, result in zip(arrays, results):
+                array.flat[start:stop] = result
+
+        return(out)
+
+    #}}}2 end write_principal_components
+
+    def parallel_principal_components(self, theta, phi, t, processes=None, chunk_size=65536, outputs=None): #{{{2
+        """
+        Calculate the principal components of the stresses using a pool of
+        worker processes, each of which calculates chunks of the points (as
+        in L{iter_principal_components}) and writes its results directly into
+        arrays in shared memory.
+
+        The workers are given a L{snapshot} of the L{StressCalc}, so the Love
+        numbers and coefficients aren't re-calculated, and the inputs are
+        passed to them once, when the pool is started, rather than with each
+        chunk.  Starting the pool takes a noticeable fraction of a second, so
+        this is only worthwhile for large numbers of points.
+
+        @param processes: the number of worker processes, defaulting to the
+        number of CPUs.
+        @type processes: int
+        @param chunk_size: the largest number of points a worker calculates at
+        once.
+        @type chunk_size: int
+        @param outputs: the values to calculate, as for
+        L{principal_components}.
+        @return: as for L{principal_components}, with each array having the
+        shape that theta, phi and t broadcast to.  The arrays are backed by
+        shared memory.
+        """
+        import multiprocessing
+        from multiprocessing.sharedctypes import RawArray
+
+        single = isinstance(outputs, basestring)
+        if outputs is None:
+            outputs = ('tens_mag', 'tens_az', 'comp_mag', 'comp_az')
+        elif single:
+            outputs = (outputs,)
+
+        for name in outputs:
+            if name not in PRINCIPAL_OUTPUTS:
+                raise InvalidPrincipalOutputError(name)
+
+        shape = numpy.broadcast(theta, phi, t).shape
+        size = int(numpy.prod(shape))
+        shared = [ RawArray('d', size) for name in outputs ]
+
+        job = (self.snapshot(), (theta, phi, t), outputs, shared)
+        chunks = [ (start, min(start+chunk_size, size)) for start in xrange(0, size, chunk_size) ]
+
+        pool = multiprocessing.Pool(processes, initializer=_parallel_init, initargs=(job,))
+        try:
+            for done in pool.imap_unordered(_parallel_chunk, chunks):
+                pass
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+        results = [ numpy.frombuffer(array, dtype=numpy.float64).reshape(shape) for array in shared ]
+        if single:
+            return(results[0])
+        return(tuple(results))
+
+    #}}}2 end parallel_principal_components
+
+    def orbit_envelope(self, theta, phi, t0=0.0, tensile_str=None, samples=32, tol=1e-9): #{{{2
+        """
+        Calculates the extremes of the surface stresses over one orbit, and
+        when they occur, at each of the given points.
+
+        The results are returned as a dictionary of arrays, having the shape
+        that theta and phi broadcast to:
+
+          - B{C{max_tens}}: the largest value of the more tensile principal
+            stress (tens_mag) during the orbit [Pa].
+
+          - B{C{max_tens_time}}: the time at which it occurs [s].
+
+          - B{C{min_comp}}: the smallest (most compressive) value of the less
+            tensile principal stress (comp_mag) during the orbit [Pa].
+
+          - B{C{min_comp_time}}: the time at which it occurs [s].
+
+          - B{C{az_sweep}}: the range of azimuths through which the more
+            tensile stress turns during the orbit, between 0 and pi [rad].
+            This is pi where the stresses rotate all the way around.
+
+          - B{C{fail_time}}: the first time at which the more tensile stress
+            reaches the tensile strength, or NaN if it never does [s].
+
+        Rather than sampling the orbit finely, the stresses are calculated
+        at only a few orbital phases (see L{harmonics}) to bracket the
+        extremes, which are then found by a vectorized Newton's method, using
+        the analytic time derivatives of the stresses
+        (L{tensor_from_harmonics}), and the time of failure by bisection.
+        Features of the stresses narrower than an orbital period divided by
+        samples may be missed, but the slowly varying tidal stresses have
+        no more than a few extremes in an orbit.
+
+        @param theta: the co-latitude(s) of the point(s) [rad].
+        @type theta: float or numpy.ndarray
+        @param phi: the east-positive longitude(s) of the point(s) [rad].
+        @type phi: float or numpy.ndarray
+        @param t0: the time since pericenter at which the orbit begins [s].
+        @type t0: float
+        @param tensile_str: the tensile strength of the surface [Pa],
+        defaulting to that of the satellite's surface layer.
+        @type tensile_str: float
+        @param samples: the number of orbital phases used to bracket the
+        extremes.
+        @type samples: int
+        @param tol: the precision with which times are found, as a fraction
+        of the orbital period.
+        @type tol: float
+        @return: the orbit envelope, as described above.
+        @rtype: dict
+        @raise NoStressAmplitudesError: if one of the stress fields does not
+        provide its complex amplitudes.
+        """
+        if tensile_str is None:
+            tensile_str = self.surface_tensile_str()
+        period = self.stresses[0].satellite.orbit_period()
+
+        theta, phi = numpy.broadcast_arrays(theta, phi)
+        shape = theta.shape
+        harmonics = self.harmonics(theta.ravel(), phi.ravel())
+
+        # The orbital phases at which the stresses are sampled, including
+        # both ends of the orbit:
+        times = t0 + period*numpy.arange(samples+1)/float(samples)
+        Ttt, Tpt, Tpp = self.tensor_from_harmonics(harmonics, times[:,numpy.newaxis])
+        mean  = 0.5*(Ttt + Tpp)
+        half_diff = 0.5*(Ttt - Tpp)
+        radius = numpy.hypot(half_diff, Tpt)
+        # Twice the angle of the more tensile stress from the co-latitude
+        # direction, made continuous through the orbit:
+        angle = numpy.unwrap(numpy.arctan2(Tpt, half_diff), axis=0)
+
+        points = numpy.arange(radius.shape[1])
+        # How many of the sampled peaks to refine, in case the greatest of
+        # them isn't the greatest once refined:
+        candidates = 3
+
+        def derivatives(t):
+            """The mean and Mohr circle terms, and their time derivatives."""
+            terms = []
+            for n in (0, 1, 2):
+                Ttt, Tpt, Tpp = self.tensor_from_harmonics(harmonics, t, derivative=n)
+                terms.append((0.5*(Ttt + Tpp), 0.5*(Ttt - Tpp), Tpt))
+            return(terms)
+
+        def principal_slope(sign):
+            """The slope and curvature of sign*mean + radius."""
+            def slope(t):
+                (m, h, s), (m1, h1, s1), (m2, h2, s2) = derivatives(t)
+                r = numpy.hypot(h, s)
+                r1 = (h*h1 + s*s1)/r
+                r2 = (h1**2 + h*h2 + s1**2 + s*s2 - r1**2)/r
+                return(sign*m1 + r1, sign*m2 + r2)
+            return(slope)
+
+        def angle_slope(sign):
+            """The slope and curvature of sign*arctan2(Tpt, half_diff)."""
+            def slope(t):
+                (m, h, s), (m1, h1, s1), (m2, h2, s2) = derivatives(t)
+                num = h*s1 - s*h1
+                den = h**2 + s**2
+                num1 = h*s2 - s*h2
+                den1 = 2.0*(h*h1 + s*s1)
+                return(sign*num/den, sign*(num1*den - num*den1)/den**2)
+            return(slope)
+
+        def refine(values, slope, value):
+            """
+            Refine the largest few of the local maxima of the sampled values,
+            and return the greatest of the maxima found, and its time.
+            """
+            ahead  = numpy.concatenate((values[1:], values[-1:]))
+            behind = numpy.concatenate((values[:1], values[:-1]))
+            peaks = numpy.where((values >= ahead) & (values >= behind), values, -numpy.inf)
+            ranked = numpy.argsort(-peaks, axis=0)[:candidates]
+            best_k = ranked[0]
+            best, best_t = values[best_k,points], times[best_k]
+            for k in ranked:
+                k = numpy.where(numpy.isfinite(peaks[k,points]), k, best_k)
+                t = _refine_maximum(slope, times[k], times[numpy.maximum(k-1, 0)],\
+                                    times[numpy.minimum(k+1, samples)], tol*period)
+                refined = value(t, k)
+                better = refined > best
+                best   = numpy.where(better, refined, best)
+                best_t = numpy.where(better, t, best_t)
+            return(best, best_t)
+
+        def principal_value(sign):
+            """The value of sign*mean + radius."""
+            def value(t, k):
+                Ttt, Tpt, Tpp = self.tensor_from_harmonics(harmonics, t)
+                return(sign*0.5*(Ttt + Tpp) + numpy.hypot(0.5*(Ttt - Tpp), Tpt))
+            return(value)
+
+        def angle_value(sign):
+            """The value of sign*angle, on the same branch as sample k."""
+            def value(t, k):
+                Ttt, Tpt, Tpp = self.tensor_from_harmonics(harmonics, t)
+                sampled = angle[k,points]
+                refined = numpy.arctan2(Tpt, 0.5*(Ttt - Tpp))
+                return(sign*(sampled + numpy.mod(refined - sampled + numpy.pi, 2.0*numpy.pi) - numpy.pi))
+            return(value)
+
+        envelope = {}
+
+        old_settings = numpy.seterr(divide='ignore', invalid='ignore')
+        try:
+            for name, sign in (('max_tens', 1.0), ('min_comp', -1.0)):
+                extreme, t = refine(sign*mean + radius, principal_slope(sign), principal_value(sign))
+                envelope[name] = sign*extreme
+                envelope[name+'_time'] = t
+
+            sweep = 0.0
+            for sign in (1.0, -1.0):
+                extreme, t = refine(sign*angle, angle_slope(sign), angle_value(sign))
+                sweep = sweep + extreme
+            envelope['az_sweep'] = numpy.minimum(0.5*sweep, numpy.pi)
+
+            # The first sample at or above the tensile strength, if it comes
+            # before the greatest tension, and otherwise the greatest tension,
+            # bounds the time of failure:
+            tens = mean + radius
+            exceeded = tens >= tensile_str
+            first = numpy.where(exceeded.any(axis=0), numpy.argmax(exceeded, axis=0), samples+1)
+            max_time = envelope['max_tens_time']
+            before = numpy.minimum(numpy.floor((max_time - t0)/period*samples).astype(int), samples)
+            hi = numpy.where(first <= before, times[numpy.minimum(first, samples)], max_time)
+            lo = times[numpy.maximum(numpy.minimum(first, before+1) - 1, 0)]
+            failed = envelope['max_tens'] >= tensile_str
+            for n in range(int(numpy.ceil(numpy.log2(1.0/(samples*tol))))):
+                mid = 0.5*(lo + hi)
+                Ttt, Tpt, Tpp = self.tensor_from_harmonics(harmonics, mid)
+                above = 0.5*(Ttt + Tpp) + numpy.hypot(0.5*(Ttt - Tpp), Tpt) >= tensile_str
+                hi = numpy.where(above, mid, hi)
+                lo = numpy.where(above, lo, mid)
+            fail_time = numpy.where(first == 0, t0, hi)
+            envelope['fail_time'] = numpy.where(failed, fail_time, numpy.nan)
+        finally:
+            numpy.seterr(**old_settings)
+
+        for name in envelope:
+            envelope[name] = numpy.reshape(envelope[name], shape)
+
+        return(envelope)
+
+    #}}}2 end orbit_envelope
+
+    def surface_tensile_str(self): #{{{2
+        """
+        The tensile strength of the surface layer of the satellite, above
+        which the surface is taken to fracture [Pa].
+
+        @rtype: float
+        """
+        return(self.stresses[0].satellite.layers[-1].tensile_str)
+
+    #}}}2 end surface_tensile_str
+
+    def cache_key(self): #{{{2
+        """
+        Return a hashable description of everything the stresses calculated
+        by this L{StressCalc} depend on: the kind of each stress field, its
+        forcing frequency, a snapshot of the satellite (see
+        L{Satellite.snapshot}), and its (Love number dependent) coefficients.
+
+        Two calculations having the same key will yield the same stresses, so
+        the key can be used to memoize expensive derived quantities, like
+        L{mean_global_stressdiff}.
+
+        @rtype: tuple
+        """
+        return(tuple([ (stress.__name__, stress.omega, stress.satellite.snapshot(),\
+                        tuple(sorted(stress.coefficients().items()))) for stress in self.stresses ]))
+
+    #}}}2 end cache_key
+
+    def global_mean(self, func, num_samples=10000, time_sec=0.0, outputs=None): #{{{2
+        """
+        Calculate the mean value over the surface of the satellite of some
+        function of the principal components of the stresses at time_sec.
+
+        Rather than averaging over randomly sampled points, the integral is
+        evaluated with a deterministic quadrature rule: Gauss-Legendre in the
+        cosine of the co-latitude (which makes the points area weighted), and
+        the trapezoidal rule in longitude.  The stresses are smooth and
+        periodic in longitude, so the trapezoidal rule converges exponentially
+        there, and for a given number of samples the result is far more
+        accurate than the Monte Carlo estimate, and always the same.
+
+        Several means may be calculated from the same evaluation of the
+        stresses, by having func return a sequence of arrays.
+
+        @param func: a function taking the arrays returned by
+        L{principal_components} for the requested outputs, and returning an
+        array of the same shape, or a sequence of them, to be averaged.
+        @type func: callable
+        @param num_samples: the approximate number of points to use in the
+        quadrature.  The grid has twice as many longitudes as latitudes.
+        @type num_samples: int
+        @param time_sec: time since pericenter at which to evaluate the
+        stresses [s].
+        @type time_sec: float
+        @param outputs: the principal components to calculate, and pass to
+        func (see L{principal_components}).  By default, all four of
+        (tens_mag, tens_az, comp_mag, comp_az).
+        @type outputs: str or sequence of str
+        @return: the area weighted mean of func over the sphere, or a tuple of
+        them if func returns a sequence of arrays.
+        @rtype: float or tuple of float
+        """
+
+        n_theta = max(int(numpy.ceil(numpy.sqrt(num_samples/2.0))), 1)
+        n_phi   = 2*n_theta
+
+        costhetas, weights = numpy.polynomial.legendre.leggauss(n_theta)
+        thetas = numpy.arccos(costhetas)[:,numpy.newaxis]
+        phis   = numpy.linspace(0, 2*numpy.pi, n_phi, endpoint=False)[numpy.newaxis,:]
+
+        pcs = self.principal_components(thetas, phis, time_sec, outputs)
+        if isinstance(outputs, basestring):
+            vals = func(pcs)
+        else:
+            vals = func(*pcs)
+
+        # The Gauss-Legendre weights sum to 2, and the longitudes are equally
+        # weighted:
+        weights = weights[:,numpy.newaxis]
+        if isinstance(vals, numpy.ndarray):
+            return(numpy.sum(weights*vals)/(2.0*n_phi))
+        return(tuple([ numpy.sum(weights*v)/(2.0*n_phi) for v in vals ]))
+
+    #}}}2 end global_mean
+
     def mean_global_stressmag(self, num_samples=10000, time_sec=0.0): #{{{2
         """
         Calculate the stresses on the surface of the satellite at num_samples
-        randomly chosen locations, evenly distributed over the sphere, and
-        return the mean values of both the more and less tensile stresses.
+        locations, evenly distributed over the sphere, and return the mean
+        values of both the more and less tensile stresses.
+
+        Both means are calculated from the same evaluation of the stresses
+        using L{global_mean}, and remembered, so long as the stresses don't
+        change (see L{cache_key}).
 
         """
 
-        rand_thetas, rand_phis = random_loncolatpoints(num_samples)
-        pc = self.principal_components(rand_thetas, rand_phis, time_sec)
+        key = ('stressmag', num_samples, time_sec, self.cache_key())
+        if key not in self.global_means:
+            self.global_means[key] = self.global_mean(lambda tm,cm: (tm,cm), num_samples, time_sec,\
+                                                      outputs=('tens_mag', 'comp_mag'))
 
-        return(pc[0].mean(),pc[2].mean())
+        return(self.global_means[key])
 
     #}}}2 end mean_global_stressmag
 
     def mean_global_stressdiff(self, num_samples=10000, time_sec=0.0): #{{{2
         """
         Calculate the stresses on the surface of the satellite at num_samples
-        randomly chosen locations, evenly distributed over the sphere, and
-        return the mean values of both the more and less tensile stresses.
+        locations, evenly distributed over the sphere, and return the mean
+        value of the difference between the more and less tensile stresses.
+
+        The mean is calculated using L{global_mean}, and remembered, so long
+        as the stresses don't change (see L{cache_key}).  This makes it cheap
+        to call repeatedly, e.g. when normalizing the fits of many lineaments.
 
         """
 
-        rand_thetas, rand_phis = random_loncolatpoints(num_samples)
-        pc = self.principal_components(rand_thetas, rand_phis, time_sec)
+        key = ('stressdiff', num_samples, time_sec, self.cache_key())
+        if key not in self.global_means:
+            self.global_means[key] = self.global_mean(lambda sd: sd, num_samples, time_sec,\
+                                                      outputs='stress_diff')
 
-        return((pc[0]-pc[2]).mean())
+        return(self.global_means[key])
 
     #}}}2 end mean_global_stressdiff
 
 # end class StressCalc #}}}
 
+def ensemble_unsupported(method): #{{{
+    """
+    Replace a method of L{StressCalc} which an L{EnsembleStressCalc} can't
+    provide, with one raising L{EnsembleMethodError}.
+    """
+    name = method.__name__
+    def unsupported(self, *args, **kwargs):
+        raise EnsembleMethodError(name)
+    unsupported.__name__ = name
+    unsupported.__doc__  = """Not available for an ensemble.  Use the
+        L{StressCalc} for one of its members instead (see
+        L{EnsembleStressCalc.member})."""
+    return(unsupported)
+#}}}
+
+class EnsembleStressCalc(StressCalc): #{{{
+    """
+    A L{StressCalc} for an ensemble of satellites subject to the same kinds of
+    stresses, which calculates the stresses on all of the members at once,
+    returning arrays with a leading ensemble axis.
+
+    The Love numbers of all the members are calculated in a single batch
+    (see L{calc_love_batch}), rather than one at a time.  The members'
+    satellites are then stacked into a single L{SatelliteSnapshot} whose
+    parameters are arrays, with one element per member, from which each
+    stress field's coefficients (see L{StressDef.calc_coeffs}) are
+    calculated for every member in one pass, and handed to its
+    L{StressDef.amplitudes}.  No L{StressDef} is constructed for the
+    individual members.  The members are most easily described using
+    L{satellite_ensemble}.
+
+    L{tensor}, L{tensor_grid} and L{principal_components} (including its
+    outputs and out arguments) work as they do for a L{StressCalc}, but
+    their results have an extra leading axis, with one element for each
+    member of the ensemble.  The other L{StressCalc} methods which calculate
+    stresses raise L{EnsembleMethodError}, and should be used on the
+    individual members (see L{member}).
+
+    @ivar satellites: the members of the ensemble.
+    @type satellites: list of L{SatelliteSnapshot}
+    @ivar stressdefs: the L{StressDef} subclasses applied to every member.
+    @type stressdefs: tuple
+    @ivar love_tol: the tolerance with which the Love numbers were
+    interpolated, if they were.
+    @type love_tol: float
+    @ivar ensemble_coeffs: for each stress field, a dictionary holding an
+    array of each of its coefficients, with one element per member.
+    @type ensemble_coeffs: list of dict
+    @ivar ensemble_omegas: for each stress field, an array of the forcing
+    frequencies of the members.
+    @type ensemble_omegas: list of numpy.ndarray
+    """
+
+    def __init__(self, satellites, stressdefs=None, love_tol=None):
+        """
+        Calculate the coefficients of the stress fields for every member of
+        the ensemble.
+
+        @param satellites: the satellites making up the ensemble.
+        @type satellites: sequence of L{Satellite} or L{SatelliteSnapshot}
+        @param stressdefs: the L{StressDef} subclasses to apply to every
+        member, defaulting to L{NSR} and L{Diurnal}.
+        @type stressdefs: sequence
+        @param love_tol: if given, the members interpolate their Love numbers
+        from L{LoveTable}s with this tolerance, instead of solving for them.
+        @type love_tol: float
+        @raise NoStressAmplitudesError: if any of the stress fields does not
+        provide complex amplitudes.
+        """
+        if stressdefs is None:
+            stressdefs = (NSR, Diurnal)
+
+        self.satellites = [ satellite.snapshot() for satellite in satellites ]
+        self.stressdefs = tuple(stressdefs)
+        self.love_tol = love_tol
+        stacked_satellite = stack_satellites(self.satellites)
+
+        self.stresses = []
+        self.ensemble_coeffs = []
+        self.ensemble_omegas = []
+        for stressdef in self.stressdefs:
+            loves = calc_love_batch(stressdef, self.satellites, love_tol=love_tol)
+            h2, k2, l2 = [ numpy.array([ getattr(love, name) for love in loves ]) for name in ('h2', 'k2', 'l2') ]
+
+            # A stress field for the whole ensemble at once:
+            stress = stressdef.__new__(stressdef)
+            stress.__name__ = stressdef.__name__
+            stress.satellite = stacked_satellite
+            stress.love_tol = love_tol
+            stress.love = LoveNum(h2.real, h2.imag, k2.real, k2.imag, l2.real, l2.imag)
+            stress.omega = stress.forcing_frequency()
+
+            # Members with infinite forcing periods have no stresses, but
+            # would make the coefficients of the rest blow up, so they are
+            # given a nominal frequency, and their coefficients set to zero:
+            relaxed = stress.omega == 0.0
+            stress.omega = numpy.where(relaxed, 1.0, stress.omega)
+            coeffs = stress.calc_coeffs()
+            for key in ('b1', 'g1', 'b2', 'g2', 'Gamma', 'Z'):
+                coeffs[key] = numpy.where(relaxed, 0.0, coeffs[key])
+            stress.omega = numpy.where(relaxed, 0.0, stress.omega)
+
+            if stress.amplitudes(trig_terms(0.0, 0.0), coeffs) is None:
+                raise NoStressAmplitudesError(stress)
+
+            self.stresses.append(stress)
+            self.ensemble_coeffs.append(coeffs)
+            self.ensemble_omegas.append(stress.omega)
+
+        self.global_means = {}
+
+    def member(self, n): #{{{2
+        """
+        Return an ordinary L{StressCalc} for member n of the ensemble.  Its
+        Love numbers have already been calculated.
+
+        @param n: the index of the member.
+        @type n: int
+        @rtype: L{StressCalc}
+        """
+        return(StressCalc([ stressdef(self.satellites[n], love_tol=self.love_tol) for stressdef in self.stressdefs ]))
+
+    #}}}2 end member
+
+    def tensor(self, theta, phi, t): #{{{2
+        """
+        Calculates the surface stresses on every member of the ensemble.  See
+        L{StressCalc.tensor}.
+
+        @return: (Ttt, Tpt, Tpp), each with the shape that theta, phi and t
+        broadcast to, preceded by the ensemble axis.
+        @rtype: tuple of numpy.ndarray
+        """
+        shape = numpy.broadcast(theta, phi, t).shape
+        expand = (len(self.satellites),) + (1,)*len(shape)
+
+        Ttt = numpy.zeros(expand[:1] + shape)
+        Tpt = numpy.zeros(expand[:1] + shape)
+        Tpp = numpy.zeros(expand[:1] + shape)
+
+        trig = trig_terms(theta, phi)
+        for stress, coeffs, omega in zip(self.stresses, self.ensemble_coeffs, self.ensemble_omegas):
+            Att, Apt, App = stress.amplitudes(trig, dict([ (key, value.reshape(expand)) for key, value in coeffs.items() ]))
+            expwt = numpy.exp(1j*omega.reshape(expand)*numpy.asarray(t))
+            Ttt += (Att*expwt).real
+            Tpt += (Apt*expwt).real
+            Tpp += (App*expwt).real
+
+        return(Ttt, Tpt, Tpp)
+
+    #}}}2 end tensor
+
+    # These all assume that the stresses have a single value at each point
+    # and time, or that the stress fields belong to a single satellite:
+    snapshot                      = ensemble_unsupported(StressCalc.snapshot)
+    point_tensor                  = ensemble_unsupported(StressCalc.point_tensor)
+    harmonics                     = ensemble_unsupported(StressCalc.harmonics)
+    tensor_from_harmonics         = ensemble_unsupported(StressCalc.tensor_from_harmonics)
+    point_principal_components    = ensemble_unsupported(StressCalc.point_principal_components)
+    tensor_gradient               = ensemble_unsupported(StressCalc.tensor_gradient)
+    principal_gradients           = ensemble_unsupported(StressCalc.principal_gradients)
+    point_principal_gradients     = ensemble_unsupported(StressCalc.point_principal_gradients)
+    iter_principal_components     = ensemble_unsupported(StressCalc.iter_principal_components)
+    write_principal_components    = ensemble_unsupported(StressCalc.write_principal_components)
+    parallel_principal_components = ensemble_unsupported(StressCalc.parallel_principal_components)
+    orbit_envelope                = ensemble_unsupported(StressCalc.orbit_envelope)
+    surface_tensile_str           = ensemble_unsupported(StressCalc.surface_tensile_str)
+    cache_key                     = ensemble_unsupported(StressCalc.cache_key)
+    global_mean                   = ensemble_unsupported(StressCalc.global_mean)
+    mean_global_stressmag         = ensemble_unsupported(StressCalc.mean_global_stressmag)
+    mean_global_stressdiff        = ensemble_unsupported(StressCalc.mean_global_stressdiff)
+
+# end class EnsembleStressCalc #}}}
+
+class StressAtlas(StressCalc): #{{{
+    """
+    A precalculated table of the surface stresses due to a L{StressCalc} at
+    a single time, which can stand in for the L{StressCalc} wherever only
+    the stresses at that time, and the tensile strength of the surface (see
+    L{surface_tensile_str}), are wanted, as in the lineament work, which
+    looks only at the NSR stresses at t=0.
+
+    All of the stress fields defined here are of degree two, and so at any
+    one time their stresses repeat every 180 degrees of longitude, and are
+    mirrored across the equator (with a change in the sign of Tpt), so the
+    table need only cover a quarter of the surface.  Stress fields without
+    those symmetries (see L{StressDef.lon_period} and
+    L{StressDef.equator_symmetric}) can't be tabulated.  The three components of
+    the stress tensor, which unlike the principal stresses and their
+    azimuths are smooth everywhere, are interpolated with cubic splines,
+    and the principal components are calculated from them as usual (see
+    L{StressCalc.principal_components}).
+
+    An atlas may be saved to a file, and loaded with L{load_stress_atlas},
+    in which case its table is memory mapped from the file, so that any
+    number of processes may share a single copy of it.  Such an atlas is
+    pickled by file name, for use with e.g.
+    L{StressCalc.parallel_principal_components}.  A loaded atlas has only
+    the table and the tensile strength, and not the original stress fields
+    or the satellite (its C{stresses} are empty), so anything else about
+    them must be had from the L{StressCalc}.
+
+    @ivar t: the time at which the stresses are tabulated [s].
+    @type t: float
+    @ivar spacing: the spacing of the table in co-latitude and longitude
+    [rad].
+    @type spacing: float
+    @ivar error: an estimate of the largest error in the interpolated stress
+    tensor components: twice the largest error found when the atlas was
+    created, at the centers of the table's cells, where the error is
+    largest, and at random points spread over the whole surface [Pa].  The
+    factor of two is a safety margin, not the result of an analysis, so this
+    isn't a strict bound.  The error in the principal stresses is up to
+    M{(1+sqrt(2))} times as large.
+    @type error: float
+    @ivar tensile_str: the tensile strength of the satellite's surface
+    layer [Pa].
+    @type tensile_str: float
+    @ivar filename: the file from which the atlas was loaded, if any.
+    @type filename: str
+    """
+
+    # How many extra rows and columns of the table lie outside the area which
+    # it covers, so that the splines are well behaved at the edges:
+    pad = 8
+
+    def __init__(self, stresscalc, t=0.0, spacing=numpy.radians(0.5), num_checks=10000): #{{{2
+        """
+        Calculate the stresses due to stresscalc on a regular grid, and the
+        splines which interpolate them.
+
+        @param stresscalc: the stresses to tabulate.
+        @type stresscalc: L{StressCalc}
+        @param t: the time at which to tabulate the stresses [s].
+        @type t: float
+        @param spacing: the largest acceptable spacing of the table [rad].
+        The actual spacing divides 90 degrees evenly.
+        @type spacing: float
+        @param num_checks: the number of randomly placed points at which the
+        error in the interpolation is checked.
+        @type num_checks: int
+        @raise StressAtlasSymmetryError: if any of the stress fields doesn't
+        repeat every 180 degrees of longitude, or isn't mirrored across the
+        equator.
+        """
+        import scipy.ndimage
+
+        for stress in stresscalc.stresses:
+            if stress.lon_period != numpy.pi or not stress.equator_symmetric:
+                raise StressAtlasSymmetryError(stress)
+
+        self.stresses = stresscalc.stresses
+        self.global_means = {}
+        self.filename = None
+        self.t = float(t)
+        self.tensile_str = stresscalc.surface_tensile_str()
+
+        num_cells = int(numpy.ceil(0.5*numpy.pi/spacing))
+        self.spacing = 0.5*numpy.pi/num_cells
+        self.theta0 = -self.pad*self.spacing
+        self.phi0 = -self.pad*self.spacing
+
+        thetas = self.theta0 + self.spacing*numpy.arange(num_cells+1 + 2*self.pad)
+        phis = self.phi0 + self.spacing*numpy.arange(2*num_cells+1 + 2*self.pad)
+        table = stresscalc.tensor(thetas[:,numpy.newaxis], phis[numpy.newaxis,:], self.t)
+        self.coeffs = numpy.array([ scipy.ndimage.spline_filter(numpy.asarray(T, dtype=numpy.float64), order=3) for T in table ])
+
+        # Check the interpolation half way between the rows and columns of
+        # the table, and at random points:
+        mid_thetas = 0.5*self.spacing*(2*numpy.arange(num_cells)+1)
+        mid_phis = 0.5*self.spacing*(2*numpy.arange(2*num_cells)+1)
+        rand_phis, rand_thetas = random_loncolatpoints(num_checks)
+        max_error = 0.0
+        for theta, phi in ((mid_thetas[:,numpy.newaxis], mid_phis[numpy.newaxis,:]), (rand_thetas, rand_phis)):
+            exact = stresscalc.tensor(theta, phi, self.t)
+            interpolated = self.tensor(theta, phi, self.t)
+            for T_exact, T_interp in zip(exact, interpolated):
+                max_error = max(max_error, float(numpy.abs(T_interp - T_exact).max()))
+        self.error = 2.0*max_error
+
+    #}}}2 end __init__
+
+    def __reduce_ex__(self, protocol):
+        if self.filename is None:
+            return(object.__reduce_ex__(self, protocol))
+        return(load_stress_atlas, (self.filename,))
+
+    def save(self, filename): #{{{2
+        """
+        Save the atlas to a file, from which it may be loaded (and shared by
+        many processes) using L{load_stress_atlas}.
+
+        The file is a NumPy C{.npy} file, holding a single array, the first
+        few elements of which describe the table, and the rest of which are
+        the table itself.
+
+        @param filename: the path of the file to write.
+        @type filename: str
+        """
+        header = numpy.array([ self.coeffs.shape[1], self.coeffs.shape[2], self.theta0,\
+                               self.phi0, self.spacing, self.t, self.error, self.tensile_str ])
+        numpy.save(filename, numpy.concatenate((header, self.coeffs.ravel())))
+
+    #}}}2 end save
+
+    def snapshot(self): #{{{2
+        """The atlas never changes, so it serves as its own snapshot (see
+        L{StressCalc.snapshot})."""
+        return(self)
+
+    #}}}2 end snapshot
+
+    def surface_tensile_str(self): #{{{2
+        """The tensile strength recorded when the atlas was made (see
+        L{StressCalc.surface_tensile_str})."""
+        return(self.tensile_str)
+
+    #}}}2 end surface_tensile_str
+
+    def cache_key(self): #{{{2
+        """Atlases are identified by their table (see
+        L{StressCalc.cache_key})."""
+        return(('StressAtlas', self.coeffs.shape, self.theta0, self.phi0, self.spacing, self.t, self.error, self.tensile_str))
+
+    #}}}2 end cache_key
+
+    def check_time(self, t):
+        """Make sure that the stresses are wanted at the tabulated time."""
+        if numpy.any(numpy.asarray(t) != self.t):
+            raise StressAtlasTimeError(self, t)
+
+    def tensor(self, theta, phi, t): #{{{2
+        """
+        Interpolates the surface stresses from the table.  See
+        L{StressCalc.tensor}.
+
+        @raise StressAtlasTimeError: if t isn't the time at which the
+        stresses are tabulated.
+        """
+        import scipy.ndimage
+
+        self.check_time(t)
+        theta, phi = numpy.broadcast_arrays(numpy.asarray(theta, dtype=numpy.float64),\
+                                            numpy.asarray(phi, dtype=numpy.float64))
+
+        # Fold the points into the quarter of the surface that the table
+        # covers:
+        south = theta > 0.5*numpy.pi
+        rows = (numpy.where(south, numpy.pi-theta, theta) - self.theta0)/self.spacing
+        cols = (numpy.mod(phi, numpy.pi) - self.phi0)/self.spacing
+        coords = numpy.array([ rows.ravel(), cols.ravel() ])
+
+        Ttt, Tpt, Tpp = [ scipy.ndimage.map_coordinates(coeffs, coords, order=3, prefilter=False).reshape(theta.shape)\
+                          for coeffs in self.coeffs ]
+        Tpt = numpy.where(south, -Tpt, Tpt)
+
+        if Ttt.ndim == 0:
+            return(Ttt[()], Tpt[()], Tpp[()])
+        return(Ttt, Tpt, Tpp)
+
+    #}}}2 end tensor
+
+    def point_tensor(self, theta, phi, t): #{{{2
+        """
+        Interpolates the stresses at a single point from the table.  See
+        L{StressCalc.point_tensor}.
+
+        @raise StressAtlasTimeError: if t isn't the time at which the
+        stresses are tabulated.
+        """
+        if t != self.t:
+            raise StressAtlasTimeError(self, t)
+
+        theta, phi = float(theta), float(phi)
+        south = theta > 0.5*math.pi
+        if south:
+            theta = math.pi - theta
+        row = (theta - self.theta0)/self.spacing
+        col = (phi % math.pi - self.phi0)/self.spacing
+        i, j = int(math.floor(row)), int(math.floor(col))
+
+        # The cubic B-spline weights of the four nearest rows and columns:
+        weights = []
+        for u in (row - i, col - j):
+            v = 1.0 - u
+            weights.append((v*v*v/6.0, (3.0*u*u*(u - 2.0) + 4.0)/6.0,\
+                            (3.0*u*(1.0 + u - u*u) + 1.0)/6.0, u*u*u/6.0))
+        row_weights, col_weights = weights
+
+        Ttt, Tpt, Tpp = numpy.dot(numpy.dot(self.coeffs[:,i-1:i+3,j-1:j+3], col_weights), row_weights).tolist()
+        if south:
+            Tpt = -Tpt
+        return(Ttt, Tpt, Tpp)
+
+    #}}}2 end point_tensor
+
+    def harmonics(self, theta, phi):
+        """An atlas only knows the stresses at one time, so it can't
+        provide their amplitudes."""
+        raise StressAtlasTimeError(self, None)
+
+    def tensor_gradient(self, theta, phi, t):
+        """
+        The gradients of the stresses are calculated from the original
+        stress fields (see L{StressCalc.tensor_gradient}).
+
+        @raise StressAtlasTimeError: if t isn't the time at which the
+        stresses are tabulated.
+        @raise StressAtlasGradientError: if the atlas was loaded from a
+        file, and so doesn't have the original stress fields.
+        """
+        self.check_time(t)
+        if len(self.stresses) == 0:
+            raise StressAtlasGradientError(self)
+        return(StressCalc.tensor_gradient(self, theta, phi, t))
+
+    def point_principal_gradients(self, theta, phi, t):
+        """See L{tensor_gradient}."""
+        self.check_time(t)
+        if len(self.stresses) == 0:
+            raise StressAtlasGradientError(self)
+        return(StressCalc.point_principal_gradients(self, theta, phi, t))
+
+# end class StressAtlas #}}}
+
+class GridSymmetry(object): #{{{
+    """
+    The distinct points of a grid of co-latitudes and longitudes, given that
+    the stresses on it repeat with some period in longitude, and may be
+    mirrored across the equator.  See L{StressCalc.grid_symmetry}.
+
+    Anything calculated on the grid of distinct points (L{thetas} by
+    L{phis}), with those as its last two axes, can then be copied out to the
+    whole grid using L{expand}.
+
+    @ivar thetas: the distinct co-latitudes, all in the northern hemisphere
+    if the stresses are mirrored across the equator [rad].
+    @type thetas: numpy.ndarray
+    @ivar phis: the distinct longitudes, within one period [rad].
+    @type phis: numpy.ndarray
+    @ivar theta_index: the index into L{thetas} of each of the grid's
+    co-latitudes.
+    @type theta_index: numpy.ndarray
+    @ivar phi_index: the index into L{phis} of each of the grid's
+    longitudes.
+    @type phi_index: numpy.ndarray
+    @ivar mirrored: whether each of the grid's co-latitudes is a reflection
+    of the corresponding one in L{thetas}.
+    @type mirrored: numpy.ndarray
+    """
+
+    def __init__(self, thetas, phis, lon_period=2*numpy.pi, equator_symmetric=False):
+        """
+        @param thetas: the co-latitudes of the grid [rad].
+        @type thetas: numpy.ndarray
+        @param phis: the east-positive longitudes of the grid [rad].
+        @type phis: numpy.ndarray
+        @param lon_period: the period in longitude of the stresses [rad].
+        @type lon_period: float
+        @param equator_symmetric: whether the stresses are mirrored across
+        the equator.
+        @type equator_symmetric: bool
+        """
+        thetas = numpy.atleast_1d(numpy.asarray(thetas, dtype=numpy.float64))
+        phis   = numpy.atleast_1d(numpy.asarray(phis, dtype=numpy.float64))
+
+        if equator_symmetric:
+            self.mirrored = thetas > 0.5*numpy.pi
+            thetas = numpy.where(self.mirrored, numpy.pi - thetas, thetas)
+        else:
+            self.mirrored = numpy.zeros(thetas.shape, dtype=bool)
+
+        self.thetas, self.theta_index = self.distinct(thetas)
+        self.phis, self.phi_index = self.distinct(numpy.mod(phis, lon_period))
+
+    def distinct(self, values):
+        """
+        Find the distinct values along one of the grid's axes, ignoring the
+        rounding error in e.g. the co-latitudes of opposite hemispheres.
+        """
+        junk, first, index = numpy.unique(numpy.round(values, 12), return_index=True, return_inverse=True)
+        return(values[first], index)
+
+    def expand(self, field, parity=1):
+        """
+        Copy a field calculated on the distinct points out to the whole grid.
+
+        @param field: the field, the last two axes of which correspond to
+        L{thetas} and L{phis}.
+        @type field: numpy.ndarray
+        @param parity: -1 if the field changes sign across the equator, as
+        Tpt does, or 1 if it does not.
+        @type parity: int
+        @return: the field on the whole grid.
+        @rtype: numpy.ndarray
+        """
+        field = numpy.asarray(field)
+        # Copy the points out in one go, using their positions in the
+        # flattened (thetas, phis) grid:
+        flat_index = self.theta_index[:,numpy.newaxis]*len(self.phis) + self.phi_index[numpy.newaxis,:]
+        field = field.reshape(field.shape[:-2] + (-1,)).take(flat_index, axis=-1)
+        if parity < 0 and self.mirrored.any():
+            field *= numpy.where(self.mirrored, -1.0, 1.0)[:,numpy.newaxis]
+        return(field)
+
+# end class GridSymmetry #}}}
+
+def load_stress_atlas(filename, mmap_mode='r'): #{{{
+    """
+    Load a L{StressAtlas} saved by L{StressAtlas.save}.
+
+    By default the table is memory mapped from the file, rather than read
+    in, so that loading is nearly instantaneous, and processes using the
+    same file share a single copy of it.
+
+    @param filename: the path of the file from which to load the atlas.
+    @type filename: str
+    @param mmap_mode: how to memory map the file (see C{numpy.load}), or
+    None to read it in.
+    @type mmap_mode: str
+    @rtype: L{StressAtlas}
+    """
+    contents = numpy.load(filename, mmap_mode=mmap_mode)
+    num_rows, num_cols, theta0, phi0, spacing, t, error, tensile_str = [ float(x) for x in contents[:8] ]
+
+    atlas = StressAtlas.__new__(StressAtlas)
+    atlas.stresses = []
+    atlas.global_means = {}
+    atlas.filename = os.path.abspath(filename)
+    atlas.theta0, atlas.phi0, atlas.spacing, atlas.t, atlas.error = theta0, phi0, spacing, t, error
+    atlas.tensile_str = tensile_str
+    # A plain array, rather than a numpy.memmap, which is slow to slice,
+    # but still backed by the file:
+    atlas.coeffs = numpy.asarray(contents[8:]).reshape((3, int(num_rows), int(num_cols)))
+    return(atlas)
+#}}}
+
+def calc_love_batch(stressdef, satellites, love_tol=None): #{{{
+    """
+    Calculate the Love numbers which the L{StressDef} subclass stressdef
+    requires for each of the satellites, all at once, using
+    L{lovenum.love_numbers}, or if L{love_solver} is C{'external'}, running
+    the Fortran code concurrently with a L{LoveRunner}.  If love_tol is
+    given, they are interpolated from L{LoveTable}s instead, wherever the
+    tables cover them (see L{StressDef.calcLoveTable}).
+
+    The results are put in L{love_memo}, so that subsequently constructing
+    stressdef for any of the satellites finds its Love numbers already
+    calculated.
+
+    @param stressdef: a subclass of L{StressDef}, e.g. L{NSR}.
+    @param satellites: the satellites.
+    @type satellites: sequence of L{SatelliteSnapshot}
+    @param love_tol: the tolerance of the L{LoveTable}s to interpolate the
+    Love numbers from, if any (see L{StressDef.love_tol}).
+    @type love_tol: float
+    @return: the Love numbers for each of the satellites.
+    @rtype: list of L{LoveNum}
+    @raise LoveExcessiveDeltaError: if L{StressDef.Delta}() > 10^9 for
+    either of the ice layers of any of the satellites.
+    @raise InvalidLoveNumberError: if any of the Love numbers are
+    unrealistic (see L{StressDef.check_love}).
+    """
+    memo_keys = []
+    batch = {}
+    for satellite in satellites:
+        # A stress field which hasn't been initialized, and so hasn't
+        # calculated its Love numbers yet:
+        stress = stressdef.__new__(stressdef)
+        stress.__name__ = stressdef.__name__
+        stress.satellite = satellite
+        stress.love_tol = love_tol
+        stress.omega = stress.forcing_frequency()
+
+        memo_key = (stress.love_satellite(), stress.omega, love_tol, love_solver)
+        memo_keys.append(memo_key)
+        if memo_key in love_memo or memo_key in batch:
+            continue
+        if stress.omega == 0.0:
+            stress.calcLoveInfinitePeriod()
+            love_memo[memo_key] = stress.love
+            continue
+
+        for layer_n in (-1, -2):
+            if stress.Delta(layer_n) > 1e9:
+                raise LoveExcessiveDeltaError(stress, layer_n)
+        if love_tol is not None:
+            table = stress.love_table()
+            if table.covers(stress.Delta()):
+                stress.love = table.love(stress.Delta())
+                stress.check_love()
+                love_memo[memo_key] = stress.love
+                continue
+        batch[memo_key] = stress
+
+    new_keys = batch.keys()
+    if love_solver == 'external':
+        loves = LoveRunner().run([ batch[key].love_input() for key in new_keys ])
+    elif len(new_keys) > 0:
+        h2, k2, l2 = lovenum.love_numbers(*numpy.transpose([ batch[key].love_params() for key in new_keys ]))
+        loves = [ LoveNum(h.real, h.imag, k.real, k.imag, l.real, l.imag) for h, k, l in\
+                  zip(numpy.atleast_1d(h2), numpy.atleast_1d(k2), numpy.atleast_1d(l2)) ]
+    else:
+        loves = []
+
+    for memo_key, love in zip(new_keys, loves):
+        batch[memo_key].love = love
+        batch[memo_key].check_love()
+        love_memo[memo_key] = love
+
+    return([ love_memo[memo_key] for memo_key in memo_keys ])
+#}}}
+
+def satellite_ensemble(satellite, **params): #{{{
+    """
+    Construct an ensemble of satellites, identical to satellite except for
+    the given parameters, for use with L{EnsembleStressCalc}.
+
+    The parameters are named as they are in the satellite input file (see
+    L{Satellite.__init__} and L{SatLayer.__init__}), e.g.::
+
+        satellite_ensemble(europa, NSR_PERIOD=periods, THICKNESS_3=thicknesses)
+
+    Their values are broadcast against each other, so that one or more of
+    them may be single numbers.  Note that the members are not checked for
+    physical reasonableness in the way that a L{Satellite} read from a file
+    is.
+
+    @param satellite: the satellite on which the ensemble is based.
+    @type satellite: L{Satellite} or L{SatelliteSnapshot}
+    @param params: arrays of values of the satellite parameters to vary.
+    @return: one snapshot for each member of the ensemble.
+    @rtype: list of L{SatelliteSnapshot}
+    @raise EnsembleParamError: if a parameter isn't one that can be varied.
+    """
+    base = satellite.snapshot()
+    layer_params = '|'.join([ field.upper() for field in SatLayerSnapshot._fields if field != 'layer_id' ])
+
+    names = sorted(params.keys())
+    values = numpy.broadcast_arrays(*[ numpy.atleast_1d(params[name]) for name in names ])
+
+    changes = []
+    for name in names:
+        match = re.match('^(%s)_(\d+)$' % (layer_params,), name)
+        if match and int(match.group(2)) < base.num_layers:
+            changes.append((int(match.group(2)), match.group(1).lower()))
+        elif name.lower() in SatelliteSnapshot._fields and name not in ('SYSTEM_ID', 'LAYERS'):
+            changes.append((None, name.lower()))
+        else:
+            raise EnsembleParamError(name)
+
+    members = []
+    for i in range(len(values[0])):
+        member = base
+        for (layer_n, attr), vals in zip(changes, values):
+            if layer_n is None:
+                member = member.replace(**{attr: float(vals[i])})
+            else:
+                member = member.replace_layer(layer_n, **{attr: float(vals[i])})
+        members.append(member)
+
+    return(members)
+#}}}
+
+def stack_satellites(satellites): #{{{
+    """
+    Combine the members of an ensemble of satellites into a single
+    L{SatelliteSnapshot}, each of whose numerical parameters is an array
+    holding that parameter for every member, so that the derived quantities
+    of all of the members (e.g. L{Satellite.radius}) are calculated at once.
+    The identifiers of the first member are used.
+
+    The stacked snapshot is only good for calculating with.  It can't be
+    hashed, or compared with other snapshots.
+
+    @param satellites: the members of the ensemble, all having the same
+    number of layers.
+    @type satellites: sequence of L{SatelliteSnapshot}
+    @rtype: L{SatelliteSnapshot}
+    """
+    base = satellites[0]
+
+    layers = []
+    for layer_n in range(base.num_layers):
+        values = numpy.array([ satellite.layers[layer_n][1:] for satellite in satellites ], dtype=numpy.float64)
+        layers.append(SatLayerSnapshot(base.layers[layer_n].layer_id, *values.T))
+
+    values = numpy.array([ satellite[1:5] for satellite in satellites ], dtype=numpy.float64)
+    return(SatelliteSnapshot(base.system_id, *(list(values.T) + [layers,]), sourcefilename=base.sourcefilename))
+#}}}
+
+# The work shared by the worker processes of
+# L{StressCalc.parallel_principal_components}, set by L{_parallel_init}:
+_parallel_job = None
+
+def _parallel_init(job): #{{{
+    """
+    Set up a worker process for L{StressCalc.parallel_principal_components},
+    broadcasting the inputs and wrapping the shared output arrays.
+    """
+    global _parallel_job
+    stresscalc, inputs, outputs, shared = job
+    _parallel_job = (stresscalc,\
+                     numpy.broadcast_arrays(*inputs),\
+                     outputs,\
+                     [ numpy.frombuffer(array, dtype=numpy.float64) for array in shared ])
+#}}}
+
+def _parallel_chunk(chunk): #{{{
+    """
+    Calculate the principal components for the points at positions
+    start:stop of the flattened inputs, in a worker process, writing them into
+    the shared output arrays.
+    """
+    start, stop = chunk
+    stresscalc, inputs, outputs, arrays = _parallel_job
+    theta, phi, t = [ x.flat[start:stop] for x in inputs ]
+    results = stresscalc.principal_components(theta, phi, t, outputs=outputs)
+    for array, result in zip(arrays, results):
+        array[start:stop] = result
+    return(stop-start)
+#}}}
+
+def _refine_maximum(slope, t, lo, hi, tol, maxiter=50): #{{{
+    """
+    Find the maxima of functions of time, each of which lies between lo and
+    hi, starting from t, by Newton's method on the slope, falling back on
+    bisection wherever Newton's method would leave the bracket or head
+    towards a minimum.  Used by L{StressCalc.orbit_envelope}.
+
+    @param slope: a function returning the first and second time
+    derivatives of the functions at the given times.
+    @param tol: how closely the times of the maxima are to be found [s].
+    @return: the times of the maxima.
+    @rtype: numpy.ndarray
+    """
+    for n in range(maxiter):
+        d1, d2 = slope(t)
+        # The maximum lies ahead wherever the function is rising:
+        rising = d1 > 0.0
+        lo = numpy.where(rising, t, lo)
+        hi = numpy.where(rising, hi, t)
+        newton = t - d1/d2
+        inside = (d2 < 0.0) & (newton >= lo) & (newton <= hi)
+        new_t = numpy.where(inside, newton, 0.5*(lo + hi))
+        done = numpy.all(numpy.abs(new_t - t) <= tol)
+        t = new_t
+        if done:
+            break
+    return(t)
+#}}}
+
 def random_loncolatpoints(N): #{{{
     """
     Generate N evenly distributed random points on a sphere.
@@ -1792,6 +4467,40 @@ FORCING_PERIOD = infinity
        self.stress.__name__,\
        self.stress.satellite.sourcefilename))
 
+class LoveTableToleranceError(Error):
+    """Raised when a L{LoveTable} cannot meet its tolerance without using
+    an excessive number of nodes."""
+    def __init__(self, table, max_nodes):
+        self.table = table
+        self.max_nodes = max_nodes
+
+    def __str__(self):
+        return("""
+Unable to interpolate the Love numbers to within a relative error of %g using
+fewer than %d nodes.  Either increase the tolerance, or calculate the Love
+numbers exactly, without a tolerance.
+""" % (self.table.tol, self.max_nodes))
+
+class ExternalLoveCodeError(Error):
+    """Raised when John Wahr's external Love number code fails to run, or
+    fails to produce any output."""
+    def __init__(self, love_input, returncode, output):
+        self.love_input = love_input
+        self.returncode = returncode
+        self.output = output
+
+    def __str__(self):
+        return("""
+The external Love number code (calcLoveWahr4Layer) failed, with exit status %s
+and output:
+
+%s
+
+Its input (in.love) was:
+
+%s
+""" % (self.returncode, self.output, self.love_input))
+
 class GravitationallyUnstableSatelliteError(InvalidSatelliteParamError):
     """
     Raised if the density of layers is found not to decrease as you move toward the
@@ -1896,4 +4605,116 @@ specified in the input file:
 
 %s
 """ % (self.badparam, self.badparam, float(self.sat.satParams[self.badparam]), self.sat.sourcefilename))
+
+class StressCalcError(Error):
+    """Base class for errors within L{StressCalc} calculations."""
+
+class NoStressAmplitudesError(StressCalcError):
+    """
+    Raised when the complex stress amplitudes are requested from a
+    L{StressCalc} containing a stress field which does not provide them (see
+    L{StressDef.amplitudes}).
+    """
+    def __init__(self, stress):
+        self.stress = stress
+
+    def __str__(self):
+        return("""
+The %s stress field does not provide complex stress amplitudes, so it cannot
+be represented as a set of harmonics.  Use StressCalc.tensor() instead.
+""" % (self.stress.__name__,))
+
+class InvalidPrincipalOutputError(StressCalcError):
+    """
+    Raised when L{StressCalc.principal_components} is asked for an output it
+    doesn't know how to calculate.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return("""
+Unknown principal component output: %s
+
+The available outputs are: %s
+""" % (self.name, ', '.join(PRINCIPAL_OUTPUTS)))
+
+class EnsembleParamError(StressCalcError):
+    """
+    Raised when L{satellite_ensemble} is asked to vary a parameter which it
+    doesn't recognize.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return("""
+Unknown or invalid ensemble parameter: %s
+
+Parameters should be named as they are in the satellite input file, e.g.
+NSR_PERIOD, ORBIT_ECCENTRICITY, or THICKNESS_3 (the thickness of layer 3).
+""" % (self.name,))
+
+class EnsembleMethodError(StressCalcError):
+    """
+    Raised when an L{EnsembleStressCalc} is asked for something which it can
+    only provide for its individual members.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return("""
+EnsembleStressCalc.%s() is not available for a whole ensemble.  Use the
+StressCalc for one of its members instead, e.g. ensemble.member(0).%s().
+""" % (self.name, self.name))
+
+class StressAtlasTimeError(StressCalcError):
+    """Raised when a L{StressAtlas} is asked for the stresses at a time other
+    than that at which they are tabulated."""
+    def __init__(self, atlas, t):
+        self.atlas = atlas
+        self.t = t
+
+    def __str__(self):
+        return("""
+A StressAtlas only knows the stresses at t = %g s, and so cannot provide them
+at any other time, or their amplitudes.  Use a StressCalc instead.
+""" % (self.atlas.t,))
+
+class StressAtlasSymmetryError(StressCalcError):
+    """Raised when a L{StressAtlas} is asked to tabulate a stress field which
+    doesn't have the symmetries the table relies on."""
+    def __init__(self, stress):
+        self.stress = stress
+
+    def __str__(self):
+        if self.stress.equator_symmetric:
+            mirrored = "are"
+        else:
+            mirrored = "are not"
+        return("""
+A StressAtlas only tabulates a quarter of the surface, and so can only hold
+stresses which repeat every 180 degrees of longitude, and are mirrored across
+the equator.  The %s stresses repeat every %g degrees of longitude, and %s
+mirrored across the equator.  Use a StressCalc instead.
+""" % (self.stress.__class__.__name__, numpy.degrees(self.stress.lon_period), mirrored))
+
+class StressAtlasGradientError(StressCalcError):
+    """Raised when a L{StressAtlas} loaded from a file is asked for the
+    gradients of the stresses, which are calculated from the original stress
+    fields."""
+    def __init__(self, atlas):
+        self.atlas = atlas
+
+    def __str__(self):
+        return("""
+The gradients of the stresses in a StressAtlas are calculated from the
+original stress fields, but the atlas loaded from:
+
+%s
+
+only has their tabulated values.  Use the StressCalc the atlas was made from,
+or an atlas made from it in this process, instead.
+""" % (self.atlas.filename,))
 #}}}
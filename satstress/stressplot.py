@@ -50,29 +50,27 @@ def scalar_grid(stresscalc=None,\
     """
     # TODO: need to add a scale bar to the RHS of the plot.
 
-    calc_phis, calc_thetas = np.meshgrid(np.linspace(min_lon, max_lon, nlons), (np.pi/2.0)-np.linspace(min_lat, max_lat, nlats))
-    calc_phis   = np.ravel(calc_phis)
-    calc_thetas = np.ravel(calc_thetas)
+    # The stresses are separable in latitude and longitude, so rather than
+    # building a meshgrid, we let StressCalc broadcast the two axes together:
+    calc_phis   = np.linspace(min_lon, max_lon, nlons)
+    calc_thetas = (np.pi/2.0)-np.linspace(min_lat, max_lat, nlats)
 
     # some of the possible fields are easier to compute with the principal
-    # components:
+    # components, which need only be calculated at the points of the grid that
+    # the symmetries of the stresses don't make redundant, since their
+    # magnitudes are the same at all of the equivalent points:
     if field=='tens' or field=='comp' or field=='w_stress':
-        tens_mag, tens_az, comp_mag, comp_az = stresscalc.principal_components(calc_thetas, calc_phis, time_t)
-        if nlons > 0 and nlats > 0:
-            tens_mag = tens_mag.reshape(nlats, nlons)
-            comp_mag = comp_mag.reshape(nlats, nlons)
-            comp_az = comp_az.reshape(nlats, nlons)
-            tens_az = tens_az.reshape(nlats, nlons)
+        symmetry = stresscalc.grid_symmetry(calc_thetas, calc_phis)
+        tens_mag, comp_mag = [ symmetry.expand(mag) for mag in\
+                               stresscalc.principal_components(symmetry.thetas[:,np.newaxis],\
+                                                               symmetry.phis[np.newaxis,:],\
+                                                               time_t, ('tens_mag', 'comp_mag')) ]
         if field=='w_stress':
             w_stress = (tens_mag - comp_mag)/stresscalc.mean_global_stressdiff()
 
     # Or if people want to see the raw tensor components we can do that too:
     if field=='Ttt' or field=='Tpt' or field=='Tpp':
-        Ttt, Tpt, Tpp = stresscalc.tensor(calc_thetas, calc_phis, time_t)
-        if nlons > 0 and nlats > 0:
-            Ttt = Ttt.reshape(nlats, nlons)
-            Tpt = Tpt.reshape(nlats, nlons)
-            Tpp = Tpp.reshape(nlats, nlons)
+        Ttt, Tpt, Tpp = [ T[0] for T in stresscalc.tensor_grid(calc_thetas, calc_phis, time_t) ]
     
     # Now we need to display the results of our calculations, For a gridded
     # calculation, we can just show a raster with imshow()
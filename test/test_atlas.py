@@ -0,0 +1,87 @@
+#!python
+"""Check that a L{StressAtlas} stands in for the L{StressCalc} it was made
+from.
+
+Tabulates the L{NSR} stresses on Europa, and checks that the stresses
+interpolated from the atlas are within its stated error of the exact ones,
+at random points over the whole surface.  The atlas is then saved and loaded
+again, and the loaded atlas must give exactly the same stresses, and the same
+tensile strength of the surface (see L{StressCalc.surface_tensile_str}), as
+the original.  The original atlas provides the gradients of the stresses,
+but the loaded one doesn't have the stress fields they're calculated from,
+and must raise L{StressAtlasGradientError}, even at the atlas's own time.
+Finally, tabulating stresses which don't repeat every 180 degrees of longitude
+must raise L{StressAtlasSymmetryError}.
+
+C{test_atlas.py} is called from the C{satstress Makefile}, when one does
+C{make test}.
+
+"""
+import sys
+import os
+import shutil
+import tempfile
+import numpy
+from satstress import satstress
+
+def main():
+    test_satellite = os.path.join("input", "Europa.satellite")
+    the_sat = satstress.Satellite(open(test_satellite,'r'))
+    the_sat.layers[-1].tensile_str = 1e5
+    nsr_stresses = satstress.StressCalc([satstress.NSR(the_sat),])
+    atlas = satstress.StressAtlas(nsr_stresses, spacing=numpy.radians(2.0))
+    print "Atlas spacing = %g degrees, error = %g Pa" % (numpy.degrees(atlas.spacing), atlas.error)
+
+    lons, colats = satstress.random_loncolatpoints(1000)
+    exact = numpy.array(nsr_stresses.tensor(colats, lons, 0.0))
+    interpolated = numpy.array(atlas.tensor(colats, lons, 0.0))
+    max_error = numpy.abs(interpolated - exact).max()
+    print "Largest interpolation error = %g Pa" % (max_error,)
+    passed = max_error <= atlas.error
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        atlas_file = os.path.join(tmpdir, "atlas.npy")
+        atlas.save(atlas_file)
+        loaded = satstress.load_stress_atlas(atlas_file)
+        loaded_diff = numpy.abs(numpy.array(loaded.tensor(colats, lons, 0.0)) - interpolated).max()
+        print "Loaded - original atlas = %g Pa" % (loaded_diff,)
+        print "Tensile strength: StressCalc = %g Pa, loaded atlas = %g Pa" %\
+              (nsr_stresses.surface_tensile_str(), loaded.surface_tensile_str())
+        passed = passed and loaded_diff == 0.0 and\
+                 loaded.surface_tensile_str() == nsr_stresses.surface_tensile_str()
+
+        gradient_diff = numpy.abs(numpy.array(atlas.tensor_gradient(colats, lons, 0.0)) -\
+                                  numpy.array(nsr_stresses.tensor_gradient(colats, lons, 0.0))).max()
+        print "Original atlas - StressCalc gradients = %g Pa/rad" % (gradient_diff,)
+        passed = passed and gradient_diff == 0.0
+        for method in (loaded.tensor_gradient, loaded.point_principal_gradients):
+            try:
+                method(0.5, 0.5, loaded.t)
+            except satstress.StressAtlasGradientError:
+                print "Loaded atlas %s raised StressAtlasGradientError" % (method.__name__,)
+            else:
+                print "Loaded atlas %s did not raise StressAtlasGradientError" % (method.__name__,)
+                passed = False
+    finally:
+        shutil.rmtree(tmpdir)
+
+    asymmetric = satstress.NSR(the_sat)
+    asymmetric.lon_period = 2*numpy.pi
+    try:
+        satstress.StressAtlas(satstress.StressCalc([asymmetric,]), spacing=numpy.radians(10.0))
+    except satstress.StressAtlasSymmetryError, e:
+        print "Tabulating asymmetric stresses raised StressAtlasSymmetryError:%s" % (e,)
+    else:
+        print "Tabulating asymmetric stresses did not raise StressAtlasSymmetryError"
+        passed = False
+
+    if not passed:
+        print("\nTest failed.  :(\n")
+        sys.exit(1)
+
+    print("\nTest passed! :)\n")
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
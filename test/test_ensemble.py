@@ -0,0 +1,76 @@
+#!python
+"""Check that an L{EnsembleStressCalc} gives the same stresses as a
+L{StressCalc} for each of its members.
+
+Builds an ensemble of Europas with a range of NSR periods (including an
+infinite one, which has no NSR stresses) and ice shell thicknesses, both
+solving for the Love numbers and interpolating them from tables, and
+compares the stresses and principal components calculated for the whole
+ensemble with those calculated one member at a time, by L{StressCalc}
+objects constructed in the usual way.  Also checks that asking the ensemble
+for something it can only provide for individual members raises
+L{EnsembleMethodError}.
+
+C{test_ensemble.py} is called from the C{satstress Makefile}, when one does
+C{make test}.
+
+"""
+import sys
+import os
+import numpy
+from satstress import satstress
+
+def main():
+    test_satellite = os.path.join("input", "Europa.satellite")
+    the_sat = satstress.Satellite(open(test_satellite,'r'))
+
+    nsr_periods = numpy.concatenate((numpy.logspace(5, 12, 11), [numpy.inf,]))
+    thicknesses = numpy.linspace(0.5, 1.5, len(nsr_periods))*the_sat.layers[-1].thickness
+    satellites = satstress.satellite_ensemble(the_sat, NSR_PERIOD=nsr_periods, THICKNESS_3=thicknesses)
+
+    lons, colats = satstress.random_loncolatpoints(100)
+    t = numpy.linspace(0, the_sat.orbit_period(), 100)
+
+    passed = True
+    for love_tol in (None, 1e-5):
+        ensemble = satstress.EnsembleStressCalc(satellites, love_tol=love_tol)
+        ens_tensor = numpy.array(ensemble.tensor(colats, lons, t))
+        ens_pc = numpy.array(ensemble.principal_components(colats, lons, t))
+
+        # So that the members calculate their own Love numbers:
+        satstress.love_memo.clear()
+
+        for n, satellite in enumerate(satellites):
+            member = satstress.StressCalc([satstress.NSR(satellite, love_tol=love_tol),\
+                                           satstress.Diurnal(satellite, love_tol=love_tol)])
+            tensor = numpy.array(member.tensor(colats, lons, t))
+            pc = numpy.array(member.principal_components(colats, lons, t))
+
+            tensor_diff = numpy.abs(ens_tensor[:,n] - tensor).max()/numpy.abs(tensor).max()
+            mag_diff = numpy.abs(ens_pc[[0,2],n] - pc[[0,2]]).max()/numpy.abs(pc[[0,2]]).max()
+            print "love_tol = %s, NSR_PERIOD = %g, THICKNESS_3 = %g: relative differences %g (tensor), %g (principal)" %\
+                  (love_tol, satellite.nsr_period, satellite.layers[-1].thickness, tensor_diff, mag_diff)
+            if tensor_diff > 1e-12 or mag_diff > 1e-12:
+                passed = False
+
+    for method, args in ((ensemble.point_tensor, (0.1, 0.2, 0.0)),\
+                         (ensemble.harmonics, (0.1, 0.2)),\
+                         (ensemble.orbit_envelope, (0.1, 0.2)),\
+                         (ensemble.mean_global_stressdiff, ())):
+        try:
+            method(*args)
+        except satstress.EnsembleMethodError:
+            print "%s raised EnsembleMethodError" % (method.__name__,)
+        else:
+            print "%s did not raise EnsembleMethodError" % (method.__name__,)
+            passed = False
+
+    if not passed:
+        print("\nTest failed.  :(\n")
+        sys.exit(1)
+
+    print("\nTest passed! :)\n")
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!python
+"""Check that L{gridcalc} writes the same stresses however the netCDF file is
+laid out, and that an interrupted calculation can be resumed.
+
+For each of a series of L{NetCDFOutput} layouts (a classic netCDF3 file, and
+netCDF4 files chunked, compressed and packed in various ways), a small
+L{GridCalc} of the L{Diurnal} and L{NSR} stresses on Europa is written out in
+one go.  It is then written again, and interrupted part way through by
+clearing the record of which slabs have been written and scribbling over
+those slabs, as if the run had died before they reached the disk, and the
+calculation is resumed.  Finally it is written by two worker processes.  The
+resumed file, and the one written in parallel, must hold exactly the same
+values as the uninterrupted one.
+
+The stresses in the files which aren't packed must be the stresses
+calculated in memory (see L{GridCalc.compute}), rounded to single precision,
+at the same coordinates.  The stresses in the packed files must be within
+the C{packing_error}
+recorded in each stress variable of the stresses calculated in memory, and
+that error must be no larger than the one asked for.  Quantizing the stresses
+with a packing error too small for single precision floats to hold must
+raise L{PackingRangeError}.
+
+Requires the netCDF3 module, without which the test is skipped, and the
+netCDF4 module, without which only the netCDF3 file is checked.
+
+C{test_gridcalc.py} is called from the C{satstress Makefile}, when one does
+C{make test}.
+
+"""
+import sys
+import os
+import shutil
+import tempfile
+import StringIO
+import numpy
+from satstress import satstress
+try:
+    from satstress import gridcalc
+except ImportError, missing:
+    gridcalc = None
+try:
+    import netCDF4
+except ImportError:
+    netCDF4 = None
+
+test_grid = """
+GRID_ID = test_gridcalc
+LAT_MIN = -90.0
+LAT_MAX = 90.0
+LAT_NUM = 7
+LON_MIN = 0.0
+LON_MAX = 360.0
+LON_NUM = 13
+ORBIT_MIN = 0.0
+ORBIT_MAX = 360.0
+ORBIT_NUM = 5
+NSR_PERIOD_MIN = 1e5
+NSR_PERIOD_MAX = 1e12
+NSR_PERIOD_NUM = 4
+"""
+
+stress_vars = ('Ttt_Diurnal', 'Tpt_Diurnal', 'Tpp_Diurnal', 'Ttt_NSR', 'Tpt_NSR', 'Tpp_NSR')
+
+def layouts():
+    """The netCDF file layouts to try, keyed by a short description."""
+    if netCDF4 is None:
+        return({ 'netCDF3': gridcalc.NetCDFOutput() })
+    return({ 'netCDF3': gridcalc.NetCDFOutput(),
+             'netCDF4': gridcalc.NetCDFOutput(format='NETCDF4'),
+             'netCDF4 chunked': gridcalc.NetCDFOutput(format='NETCDF4', chunk_slices=3, complevel=9),
+             'netCDF4 quantize': gridcalc.NetCDFOutput(format='NETCDF4', pack='quantize', pack_error=10.0),
+             'netCDF4 i2': gridcalc.NetCDFOutput(format='NETCDF4', pack='i2', pack_error=100.0),
+             'netCDF4 i4': gridcalc.NetCDFOutput(format='NETCDF4', pack='i4', pack_error=1e-3) })
+
+def read_stresses(outfile, output):
+    """Read all the stress variables back from outfile, along with their
+    packing errors, where they have them."""
+    nc_in = output.dataset(outfile, mode='r')
+    stresses = {}
+    packing_errors = {}
+    for name in stress_vars:
+        stresses[name] = numpy.array(nc_in.variables[name][:], dtype=numpy.float64)
+        if 'packing_error' in nc_in.variables[name].ncattrs():
+            packing_errors[name] = nc_in.variables[name].packing_error
+    nc_in.close()
+    return(stresses, packing_errors)
+
+def read_coordinates(outfile, output):
+    """Read the coordinate variables back from outfile."""
+    nc_in = output.dataset(outfile, mode='r')
+    coords = {}
+    for name in ('latitude', 'longitude', 'time', 'nsr_period'):
+        coords[name] = numpy.array(nc_in.variables[name][:])
+    nc_in.close()
+    return(coords)
+
+def interrupt(outfile, output):
+    """
+    Make outfile look like a calculation which was interrupted after writing
+    only the first slab of each of the stresses.
+
+    """
+    nc_out = output.dataset(outfile, mode='a')
+    for stress_name in ('Diurnal', 'NSR'):
+        complete = nc_out.variables[stress_name+'_complete']
+        complete[1:] = numpy.zeros(len(complete)-1, dtype=numpy.int8)
+        for prefix in ('Ttt_', 'Tpt_', 'Tpp_'):
+            var = nc_out.variables[prefix+stress_name]
+            var[1:,:,:] = numpy.ones(var.shape, dtype=var.dtype)[1:]
+    nc_out.close()
+
+def main():
+    if gridcalc is None:
+        print "Skipping test_gridcalc, which needs the netCDF3 module: %s" % (missing,)
+        sys.exit()
+    if netCDF4 is None:
+        print "The netCDF4 module is missing, so only netCDF3 output will be checked."
+
+    test_satellite = os.path.join("input", "Europa.satellite")
+    the_sat = satstress.Satellite(open(test_satellite,'r'))
+    the_grid = gridcalc.Grid(StringIO.StringIO(test_grid), satellite=the_sat)
+    the_gridcalc = gridcalc.GridCalc(the_grid, satstress.StressCalc([satstress.NSR(the_sat), satstress.Diurnal(the_sat)]))
+
+    cube = the_gridcalc.compute()
+
+    tmpdir = tempfile.mkdtemp()
+    passed = True
+    try:
+        for name, output in sorted(layouts().items()):
+            whole_file = os.path.join(tmpdir, "whole.nc")
+            resumed_file = os.path.join(tmpdir, "resumed.nc")
+            parallel_file = os.path.join(tmpdir, "parallel.nc")
+
+            the_gridcalc.write_netcdf(whole_file, output=output)
+            the_gridcalc.write_netcdf(resumed_file, output=output)
+            interrupt(resumed_file, output)
+            the_gridcalc.write_netcdf(resumed_file, output=output, resume=True)
+            the_gridcalc.write_netcdf(parallel_file, output=output, processes=2)
+
+            whole, packing_errors = read_stresses(whole_file, output)
+            resumed = read_stresses(resumed_file, output)[0]
+            parallel = read_stresses(parallel_file, output)[0]
+            for var_name in stress_vars:
+                diff = numpy.abs(whole[var_name]-resumed[var_name]).max()
+                parallel_diff = numpy.abs(whole[var_name]-parallel[var_name]).max()
+                print "%s: %s resumed - whole = %g Pa, parallel - whole = %g Pa" % (name, var_name, diff, parallel_diff)
+                if diff != 0.0 or parallel_diff != 0.0:
+                    passed = False
+
+            if output.pack is None:
+                coords = read_coordinates(whole_file, output)
+                for dim_name in coords:
+                    if numpy.any(coords[dim_name] != cube.variables[dim_name][:]):
+                        print "%s: %s differs from the in memory calculation" % (name, dim_name)
+                        passed = False
+                for var_name in stress_vars:
+                    exact = cube.variables[var_name][:]
+                    error = (numpy.abs(whole[var_name]-exact)/numpy.abs(exact).max()).max()
+                    print "%s: %s relative error = %g" % (name, var_name, error)
+                    if numpy.any(numpy.abs(whole[var_name]-exact) > 2.0**-24*numpy.abs(exact)):
+                        passed = False
+                continue
+            for var_name in stress_vars:
+                packing_error = packing_errors[var_name]
+                error = numpy.abs(whole[var_name]-cube.variables[var_name][:]).max()
+                print "%s: %s packing error = %g Pa, of %g Pa stated, %g Pa requested" %\
+                      (name, var_name, error, packing_error, output.pack_error)
+                if error > packing_error*(1.0+1e-6) or packing_error > output.pack_error:
+                    passed = False
+
+        if netCDF4 is not None:
+            # Stresses of a few MPa are millions of times 1e-6 Pa, too many
+            # for a single precision mantissa:
+            output = gridcalc.NetCDFOutput(format='NETCDF4', pack='quantize', pack_error=1e-6)
+            try:
+                the_gridcalc.write_netcdf(os.path.join(tmpdir, "too_fine.nc"), output=output)
+            except gridcalc.PackingRangeError:
+                print "Quantizing to 1e-6 Pa raised PackingRangeError"
+            else:
+                print "Quantizing to 1e-6 Pa did not raise PackingRangeError"
+                passed = False
+    finally:
+        shutil.rmtree(tmpdir)
+
+    if not passed:
+        print("\nTest failed.  :(\n")
+        sys.exit(1)
+
+    print("\nTest passed! :)\n")
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
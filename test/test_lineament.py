@@ -0,0 +1,95 @@
+#!python
+"""Check that the derivative of the MHD with respect to initiation latitude
+(see L{lineament.mhd_by_lat_gradient}) is right, and that
+L{lineament.vertex_search} can follow it to the best fitting NSR
+doppelganger.
+
+A synthetic NSR feature on Europa serves as the prototype lineament.  The
+derivative of the MHD from it to doppelgangers initiated at a series of
+latitudes must match a finite difference of L{lineament.mhd_by_lat},
+including at a latitude where no fracture forms.  Starting from several
+latitudes, some of which are too close to the equator for a fracture to
+form, the search must find the latitude with the smallest MHD, as found by
+scanning through latitudes, to within the jaggedness of the MHD on the
+scale of the vertex spacing.  Asking L{lineament.best_nsr_init_points} for
+a search method it doesn't know must raise ValueError.
+
+Requires the modules that L{lineament} needs for plotting and for reading
+shapefiles (pylab, basemap and osgeo), without which the test is skipped.
+
+C{test_lineament.py} is called from the C{satstress Makefile}, when one does
+C{make test}.
+
+"""
+import sys
+import os
+import numpy
+from satstress import satstress
+try:
+    from satstress import lineament
+except ImportError, missing:
+    lineament = None
+
+def main():
+    if lineament is None:
+        print "Skipping test_lineament, which needs the modules lineament imports: %s" % (missing,)
+        sys.exit()
+
+    test_satellite = os.path.join("input", "Europa.satellite")
+    the_sat = satstress.Satellite(open(test_satellite,'r'))
+    nsr_stresses = satstress.StressCalc([satstress.NSR(the_sat),])
+
+    proto = lineament.lingen_nsr(nsr_stresses, init_lon=numpy.radians(30.0), init_lat=numpy.radians(20.0), max_length=0.6)
+    ep1_lon, ep1_lat, ep2_lon, ep2_lat = proto.bfgcseg_endpoints()
+    mp_lon, mp_lat = proto.bfgcseg_midpoint()
+    max_length = lineament.spherical_distance(ep1_lon, ep1_lat, ep2_lon, ep2_lat)
+    seg_len, num_subsegs = 0.01, 10
+    args = (mp_lon, nsr_stresses, seg_len, num_subsegs, proto, max_length, 0.0)
+
+    passed = True
+    no_fracture_lat = numpy.radians(5.0)
+    doppel = lineament.lingen_nsr(nsr_stresses, init_lon=mp_lon, init_lat=no_fracture_lat, max_length=max_length)
+    if len(doppel.lons) != 1:
+        print "A fracture formed at %g degrees latitude, where none was expected" % (numpy.degrees(no_fracture_lat),)
+        passed = False
+
+    print "\nMHD derivatives with respect to initiation latitude:"
+    h = 1e-4
+    for lat in numpy.radians([5.0, 10.0, 25.0, 35.0]):
+        value, gradient = lineament.mhd_by_lat_gradient(lat, *args)
+        finite_diff = (lineament.mhd_by_lat(lat+h, *args) - lineament.mhd_by_lat(lat-h, *args))/(2*h)
+        rel_error = abs(gradient[0] - finite_diff)/abs(finite_diff)
+        print "  lat = %5.1f: MHD = %.4f, derivative = %+.4f, finite difference = %+.4f" %\
+              (numpy.degrees(lat), value, gradient[0], finite_diff)
+        passed = passed and rel_error < 0.01
+
+    scan_lats = numpy.radians(numpy.arange(25.0, 30.0, 0.05))
+    scan_mhds = numpy.array([ lineament.mhd_by_lat(lat, *args) for lat in scan_lats ])
+    best_lat = scan_lats[scan_mhds.argmin()]
+    print "\nSmallest MHD in scan = %.4f, at %.2f degrees latitude" % (scan_mhds.min(), numpy.degrees(best_lat))
+
+    for lat0 in (numpy.radians(5.0), numpy.radians(10.0), numpy.radians(15.0), mp_lat):
+        found_lat = lineament.vertex_search(lineament.mhd_by_lat_gradient, lat0, args=args, xtol=0.1*seg_len/num_subsegs)
+        found_mhd = lineament.mhd_by_lat(found_lat, *args)
+        print "  search from %5.2f degrees found MHD = %.4f, at %.2f degrees latitude" %\
+              (numpy.degrees(lat0), found_mhd, numpy.degrees(found_lat))
+        passed = passed and abs(found_lat - best_lat) < numpy.radians(0.25) and found_mhd < scan_mhds.min() + 0.001
+
+    proto.bs = numpy.array([0.0,])
+    try:
+        lineament.best_nsr_init_points(proto, stresscalc=nsr_stresses, method="newton")
+    except ValueError, e:
+        print "\nAn unknown search method raised ValueError: %s" % (e,)
+    else:
+        print "\nAn unknown search method did not raise ValueError"
+        passed = False
+
+    if not passed:
+        print("\nTest failed.  :(\n")
+        sys.exit(1)
+
+    print("\nTest passed! :)\n")
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
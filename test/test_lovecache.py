@@ -0,0 +1,65 @@
+#!python
+"""Check that Love numbers are remembered between runs by a L{LoveCache}.
+
+Solves for the Love numbers of the L{NSR} stresses on Europa with a
+L{LoveCache} in a temporary file, and checks that they're stored in it, that
+another L{LoveCache} opened on the same file finds them, and that they're
+read back from the cache, rather than solved for again, the next time they're
+needed.
+
+C{test_lovecache.py} is called from the C{satstress Makefile}, when one does
+C{make test}.
+
+"""
+import sys
+import os
+import shutil
+import tempfile
+from satstress import satstress
+
+def love_diff(love, exact):
+    """The largest relative difference between two sets of Love numbers."""
+    return(max([ abs(getattr(love, x) - getattr(exact, x))/abs(getattr(exact, x)) for x in ('h2', 'k2', 'l2') ]))
+
+def main():
+    test_satellite = os.path.join("input", "Europa.satellite")
+    the_sat = satstress.Satellite(open(test_satellite,'r'))
+    passed = True
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        cache = satstress.set_love_cache(os.path.join(tmpdir, "love.db"))
+        satstress.love_memo.clear()
+        nsr = satstress.NSR(the_sat)
+        cache_key = cache.key(repr(nsr.love_params()), 'lovenum')
+        reopened = satstress.LoveCache(cache.filename).get(cache_key)
+        if reopened is None:
+            print "The Love numbers weren't stored in the cache"
+            passed = False
+        else:
+            print "Cached - solved Love numbers: %g" % (love_diff(reopened, nsr.love),)
+            passed = passed and love_diff(reopened, nsr.love) == 0.0
+
+        # Store something recognizably different under the same key, to see
+        # whether it's used:
+        altered = satstress.LoveNum(2*nsr.love.h2.real, 2*nsr.love.h2.imag, 2*nsr.love.k2.real,\
+                                    2*nsr.love.k2.imag, 2*nsr.love.l2.real, 2*nsr.love.l2.imag)
+        cache.put(cache_key, altered)
+        satstress.love_memo.clear()
+        from_cache = satstress.NSR(the_sat)
+        print "Love numbers read back from the cache - those stored: %g" % (love_diff(from_cache.love, altered),)
+        passed = passed and love_diff(from_cache.love, altered) == 0.0
+    finally:
+        satstress.set_love_cache(None)
+        satstress.love_memo.clear()
+        shutil.rmtree(tmpdir)
+
+    if not passed:
+        print("\nTest failed.  :(\n")
+        sys.exit(1)
+
+    print("\nTest passed! :)\n")
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!python
+"""Check that the NumPy Love number code gives the same answers as the
+original Fortran code.
+
+Calculates the Diurnal Love numbers of Europa for a range of upper ice shell
+viscosities using both L{lovenum} (all at once) and the external
+C{calcLoveWahr4Layer} program (one at a time), and compares them.  The
+Fortran code works in single precision, so the two are only expected to agree
+to within a part in a few thousand.
+
+The same comparison is made for the NSR Love numbers, and the NSR stresses
+they lead to, over a range of NSR periods.  These agree less well, because
+the single precision rounding error of the Fortran code is much larger for
+NSR forcing: its h2 and l2 are about 0.7% from the NumPy code's, and k2 about
+1.4%, so the NSR stresses differ by up to about 1% (more once they have
+mostly relaxed away, at S{Delta} above a thousand or so, which isn't
+checked).  The test allows them to differ by 2%.  Built in double precision,
+the Fortran code agrees with the NumPy code to a few parts in a million, so
+the difference is the Fortran code's error, not the NumPy code's.
+
+Also checks that the NSR Love numbers interpolated from a L{LoveTable} over a
+range of NSR periods are within the table's tolerance of the exact values.
+
+C{test_lovenum.py} is called from the C{satstress Makefile}, when one does
+C{make test}.
+
+"""
+import sys
+import os
+import numpy
+from satstress import satstress, lovenum
+
+def main():
+    test_satellite = os.path.join("input", "Europa.satellite")
+    the_sat = satstress.Satellite(open(test_satellite,'r'))
+
+    # Collect the Love number parameters for a range of viscosities,
+    # calculating the Love numbers with the Fortran code as we go:
+    satstress.love_solver = 'external'
+    params  = []
+    fortran = []
+    for viscosity in numpy.logspace(12, 22, 11):
+        the_sat.layers[-1].viscosity = viscosity
+        diurnal = satstress.Diurnal(the_sat)
+        params.append(diurnal.love_params())
+        fortran.append((diurnal.love.h2, diurnal.love.k2, diurnal.love.l2))
+
+    # Calculate the same Love numbers all at once with the NumPy code:
+    h2, k2, l2 = lovenum.love_numbers(*numpy.transpose(params))
+
+    for (h2_f, k2_f, l2_f), h2_n, k2_n, l2_n in zip(fortran, h2, k2, l2):
+        print "Fortran: h2 = %s, k2 = %s, l2 = %s" % (h2_f, k2_f, l2_f)
+        print "NumPy:   h2 = %s, k2 = %s, l2 = %s\n" % (h2_n, k2_n, l2_n)
+        for (f, n) in ((h2_f, h2_n), (k2_f, k2_n), (l2_f, l2_n)):
+            if abs(f-n) > 1e-3*abs(f):
+                print("\nTest failed.  :(\n")
+                sys.exit(1)
+
+    # Compare the NSR Love numbers and stresses from the Fortran and NumPy
+    # codes:
+    the_sat = satstress.Satellite(open(test_satellite,'r'))
+    nsr_period = the_sat.nsr_period
+    lons, colats = satstress.random_loncolatpoints(1000)
+    for factor in numpy.logspace(-3, 0, 7):
+        the_sat.nsr_period = nsr_period*factor
+        results = []
+        for solver in ('external', 'lovenum'):
+            satstress.love_solver = solver
+            nsr = satstress.NSR(the_sat)
+            results.append((nsr.love, numpy.array(satstress.StressCalc([nsr,]).tensor(colats, lons, 0.0))))
+        (love_f, stress_f), (love_n, stress_n) = results
+        stress_diff = numpy.abs(stress_n - stress_f).max()/numpy.abs(stress_f).max()
+        print "NSR_PERIOD = %g, Delta = %g" % (the_sat.nsr_period, nsr.Delta())
+        print "Fortran: h2 = %s, k2 = %s, l2 = %s" % (love_f.h2, love_f.k2, love_f.l2)
+        print "NumPy:   h2 = %s, k2 = %s, l2 = %s" % (love_n.h2, love_n.k2, love_n.l2)
+        print "Largest NSR stress difference: %g of the largest stress\n" % (stress_diff,)
+        for (f, n) in ((love_f.h2, love_n.h2), (love_f.k2, love_n.k2), (love_f.l2, love_n.l2)):
+            if abs(f-n) > 2e-2*abs(f):
+                print("\nTest failed.  :(\n")
+                sys.exit(1)
+        if stress_diff > 2e-2:
+            print("\nTest failed.  :(\n")
+            sys.exit(1)
+
+    # Compare interpolated and exact NSR Love numbers:
+    satstress.love_solver = 'lovenum'
+    the_sat = satstress.Satellite(open(test_satellite,'r'))
+    nsr_period = the_sat.nsr_period
+    for factor in numpy.logspace(-3, 1, 9):
+        the_sat.nsr_period = nsr_period*factor
+        exact = satstress.NSR(the_sat).love
+        table = satstress.NSR(the_sat, love_tol=1e-4).love
+        print "NSR_PERIOD = %g" % (the_sat.nsr_period,)
+        print "Exact: h2 = %s, k2 = %s, l2 = %s" % (exact.h2, exact.k2, exact.l2)
+        print "Table: h2 = %s, k2 = %s, l2 = %s\n" % (table.h2, table.k2, table.l2)
+        for (e, t) in ((exact.h2, table.h2), (exact.k2, table.k2), (exact.l2, table.l2)):
+            if abs(e-t) > 1e-4*abs(e):
+                print("\nTest failed.  :(\n")
+                sys.exit(1)
+
+    print("\nTest passed! :)\n")
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!python
+"""Check that Love numbers interpolated from a L{LoveTable} are as accurate
+as the table claims.
+
+For a sweep through NSR periods on Europa, compares the Love numbers of the
+L{NSR} stresses interpolated from a L{LoveTable} with those solved for
+exactly, and checks that they're within the table's tolerance.
+
+C{test_lovetable.py} is called from the C{satstress Makefile}, when one does
+C{make test}.
+
+"""
+import sys
+import os
+import numpy
+from satstress import satstress
+
+def love_diff(love, exact):
+    """The largest relative difference between two sets of Love numbers."""
+    return(max([ abs(getattr(love, x) - getattr(exact, x))/abs(getattr(exact, x)) for x in ('h2', 'k2', 'l2') ]))
+
+def main():
+    test_satellite = os.path.join("input", "Europa.satellite")
+    the_sat = satstress.Satellite(open(test_satellite,'r'))
+    passed = True
+
+    love_tol = 1e-5
+    for nsr_period in the_sat.nsr_period*numpy.logspace(-4, 0, 9):
+        the_sat.nsr_period = nsr_period
+        interpolated = satstress.NSR(the_sat, love_tol=love_tol)
+        exact = satstress.NSR(the_sat)
+        table = interpolated.love_table()
+        diff = love_diff(interpolated.love, exact.love)
+        print "NSR_PERIOD = %g s, Delta = %g: table (%d nodes, error %g) - exact Love numbers = %g" %\
+              (nsr_period, exact.Delta(), len(table.log_delta), table.error, diff)
+        if not table.covers(exact.Delta()) or diff > love_tol or table.error > love_tol:
+            passed = False
+
+    if not passed:
+        print("\nTest failed.  :(\n")
+        sys.exit(1)
+
+    print("\nTest passed! :)\n")
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+#!python
+"""Check that the different ways L{StressCalc} has of calculating the
+stresses all agree with one another.
+
+Using the L{NSR} and L{Diurnal} stresses on Europa, this checks that:
+
+  - the coefficients of each stress field are remembered, and are
+    re-calculated when the satellite changes.
+
+  - the stresses on a grid (L{StressCalc.tensor_grid}) agree with those
+    calculated by L{StressCalc.tensor} at every point of the grid.
+
+  - the stresses calculated from their complex amplitudes (see
+    L{StressCalc.harmonics}) agree with L{StressCalc.tensor}, and their
+    time derivatives agree with finite differences.
+
+  - the global means of the stresses (L{StressCalc.mean_global_stressmag}
+    and L{StressCalc.mean_global_stressdiff}) have converged, and are
+    remembered only until the stresses change.
+
+  - changing the satellite gives it a new revision, and re-calculates its
+    derived quantities.
+
+  - identical satellites have equal snapshots, and a L{StressCalc.snapshot}
+    calculates the same stresses as the original, even once pickled, and
+    keeps calculating them after the satellite changes.
+
+  - any selection of the principal components (see
+    L{StressCalc.principal_components}) gives the same values as
+    calculating all of them, and unknown outputs are refused.
+
+  - the single point calculations (L{StressCalc.point_tensor} and
+    L{StressCalc.point_principal_components}) agree with the vectorized ones.
+
+  - the principal components calculated in chunks, and written into arrays,
+    are identical to those calculated in one go.
+
+  - the principal components calculated by a pool of worker processes are
+    identical to those calculated in one go.
+
+  - the orbit envelope (L{StressCalc.orbit_envelope}) agrees with the
+    stresses sampled finely through the orbit.
+
+  - only the points of a global grid which the symmetries of the stresses
+    make distinct are calculated (see L{StressCalc.grid_symmetry}), and the
+    stresses copied out to the rest of the grid are the same as those
+    calculated there directly.
+
+  - the gradients of the stresses, and of their principal components,
+    agree with finite differences.
+
+C{test_stresscalc.py} is called from the C{satstress Makefile}, when one does
+C{make test}.
+
+"""
+import sys
+import os
+import pickle
+import numpy
+from satstress import satstress
+
+def rel_diff(a, b):
+    """The largest difference between two sets of arrays, relative to the
+    largest magnitude in the second."""
+    a = numpy.array(a, dtype=numpy.float64)
+    b = numpy.array(b, dtype=numpy.float64)
+    return(numpy.abs(a-b).max()/numpy.abs(b).max())
+
+def az_diff(a, b):
+    """The largest difference between two sets of azimuths, which are only
+    defined modulo pi [rad]."""
+    d = numpy.mod(numpy.asarray(a) - numpy.asarray(b), numpy.pi)
+    return(numpy.minimum(d, numpy.pi-d).max())
+
+def check(passed, description, diff, tol):
+    """Print the result of a comparison, and whether it's within tol."""
+    print "%s: %g (tolerance %g)" % (description, diff, tol)
+    return(passed and diff <= tol)
+
+def check_coefficients(the_sat, the_stresses, colats, lons, t):
+    """The coefficients of a stress field (see L{StressDef.coefficients})
+    are calculated once, and again only when the satellite changes."""
+    passed = True
+    diurnal = the_stresses.stresses[1]
+    old_coeffs = diurnal.coefficients()
+    if diurnal.coefficients() is not old_coeffs:
+        print "The Diurnal coefficients were re-calculated although the satellite didn't change"
+        passed = False
+
+    diurnal_stresses = satstress.StressCalc([diurnal,])
+    diurnal_tensor = numpy.array(diurnal_stresses.tensor(colats, lons, t))
+    the_sat.orbit_eccentricity *= 2.0
+    try:
+        if diurnal.coefficients() is old_coeffs:
+            print "The Diurnal coefficients weren't re-calculated when the satellite changed"
+            passed = False
+        # The diurnal stresses are proportional to the eccentricity:
+        passed = check(passed, "Diurnal tensor after doubling eccentricity - twice the original",\
+                       rel_diff(diurnal_stresses.tensor(colats, lons, t), 2.0*diurnal_tensor), 1e-12)
+    finally:
+        the_sat.orbit_eccentricity /= 2.0
+
+    return(passed)
+
+def check_tensor_grid(the_sat, the_stresses, colats, lons, t):
+    """The stresses on a global grid agree with L{StressCalc.tensor}."""
+    grid_thetas = numpy.linspace(0, numpy.pi, 19)
+    grid_phis = numpy.linspace(0, 2*numpy.pi, 37)
+    grid_times = t[:7]
+    grid = the_stresses.tensor_grid(grid_thetas, grid_phis, grid_times)
+    mesh = the_stresses.tensor(grid_thetas[numpy.newaxis,:,numpy.newaxis],\
+                               grid_phis[numpy.newaxis,numpy.newaxis,:],\
+                               grid_times[:,numpy.newaxis,numpy.newaxis])
+    return(check(True, "tensor_grid - tensor", rel_diff(grid, mesh), 1e-12))
+
+def check_harmonics(the_sat, the_stresses, colats, lons, t):
+    """The stresses and their rates of change calculated from the complex
+    amplitudes agree with L{StressCalc.tensor}."""
+    harmonics = the_stresses.harmonics(colats, lons)
+    passed = check(True, "Harmonics - tensor",\
+                   rel_diff(the_stresses.tensor_from_harmonics(harmonics, t), the_stresses.tensor(colats, lons, t)), 1e-12)
+    dt = 1e-4*the_sat.orbit_period()
+    rate = the_stresses.tensor_from_harmonics(harmonics, t, derivative=1)
+    fd_rate = (numpy.array(the_stresses.tensor(colats, lons, t+dt)) -\
+               numpy.array(the_stresses.tensor(colats, lons, t-dt)))/(2*dt)
+    return(check(passed, "Harmonic time derivative - finite difference", rel_diff(rate, fd_rate), 1e-6))
+
+def check_global_means(the_sat, the_stresses, colats, lons, t):
+    """The global means have converged, agree with each other, and are
+    remembered until the satellite changes."""
+    stressmag = the_stresses.mean_global_stressmag()
+    stressdiff = the_stresses.mean_global_stressdiff()
+    print "Mean global stresses: %g Pa (tensile), %g Pa (compressive), %g Pa (difference)" % (stressmag + (stressdiff,))
+    passed = check(True, "Mean stressdiff - difference of mean stressmags", abs(stressdiff - (stressmag[0]-stressmag[1]))/stressdiff, 1e-12)
+    fine_mean = the_stresses.mean_global_stressdiff(num_samples=40000)
+    passed = check(passed, "Mean stressdiff at 10000 - 40000 samples", abs(stressdiff-fine_mean)/fine_mean, 1e-5)
+    if the_stresses.mean_global_stressmag() is not stressmag:
+        print "mean_global_stressmag was not remembered"
+        passed = False
+
+    the_sat.orbit_eccentricity *= 2.0
+    try:
+        changed = the_stresses.mean_global_stressdiff()
+    finally:
+        the_sat.orbit_eccentricity /= 2.0
+    if changed == stressdiff:
+        print "mean_global_stressdiff didn't change with the satellite"
+        passed = False
+
+    return(passed)
+
+def check_revisions(the_sat, the_stresses, colats, lons, t):
+    """Changing the satellite, or one of its layers, gives it a new revision,
+    and its derived quantities are re-calculated."""
+    passed = True
+    revision = the_sat.revision
+    mass = the_sat.mass()
+    if the_sat.revision != revision:
+        print "Calculating the mass of the satellite changed its revision"
+        passed = False
+
+    the_sat.orbit_eccentricity *= 2.0
+    the_sat.orbit_eccentricity /= 2.0
+    if the_sat.revision == revision:
+        print "Changing the satellite didn't change its revision"
+        passed = False
+
+    revision = the_sat.revision
+    the_sat.layers[-1].density *= 2.0
+    try:
+        if the_sat.revision == revision:
+            print "Changing a layer didn't change the satellite's revision"
+            passed = False
+        if the_sat.mass() == mass:
+            print "Changing a layer's density didn't change the mass of the satellite"
+            passed = False
+    finally:
+        the_sat.layers[-1].density /= 2.0
+    passed = check(passed, "Mass after restoring the density - original mass", abs(the_sat.mass()-mass)/mass, 1e-15)
+
+    return(passed)
+
+def check_snapshots(the_sat, the_stresses, colats, lons, t):
+    """Snapshots of satellites are equal when the satellites are, and a
+    snapshot of a L{StressCalc} is independent of its satellite."""
+    passed = True
+    other_sat = satstress.Satellite(open(the_sat.sourcefilename,'r'))
+    if other_sat.snapshot() != the_sat.snapshot() or hash(other_sat.snapshot()) != hash(the_sat.snapshot()):
+        print "Snapshots of identical satellites differ"
+        passed = False
+
+    frozen = the_stresses.snapshot()
+    frozen_tensor = frozen.tensor(colats, lons, t)
+    passed = check(passed, "Snapshot - StressCalc tensor", rel_diff(frozen_tensor, the_stresses.tensor(colats, lons, t)), 0.0)
+    pickled = pickle.loads(pickle.dumps(frozen, pickle.HIGHEST_PROTOCOL))
+    passed = check(passed, "Pickled - original snapshot tensor", rel_diff(pickled.tensor(colats, lons, t), frozen_tensor), 0.0)
+
+    snapshot = the_sat.snapshot()
+    the_sat.orbit_eccentricity *= 2.0
+    try:
+        if the_sat.snapshot() == snapshot:
+            print "Changing the satellite didn't change its snapshot"
+            passed = False
+        passed = check(passed, "Snapshot tensor after the satellite changed",\
+                       rel_diff(frozen.tensor(colats, lons, t), frozen_tensor), 0.0)
+    finally:
+        the_sat.orbit_eccentricity /= 2.0
+
+    return(passed)
+
+def check_principal_outputs(the_sat, the_stresses, colats, lons, t):
+    """Selected principal components are the same as when all of them are
+    calculated."""
+    passed = True
+    pc = the_stresses.principal_components(colats, lons, t)
+    for name, value in zip(('tens_mag', 'tens_az', 'comp_mag', 'comp_az'), pc):
+        out = numpy.empty(value.shape)
+        single = the_stresses.principal_components(colats, lons, t, name, out=out)
+        if single is not out or numpy.any(single != value):
+            print "principal_components(%s) differs from all of the outputs" % (name,)
+            passed = False
+    stress_diff = the_stresses.principal_components(colats, lons, t, 'stress_diff')
+    passed = check(passed, "stress_diff - (tens_mag - comp_mag)", rel_diff(stress_diff, pc[0]-pc[2]), 1e-12)
+    # Names may be unicode as well as plain strings:
+    unicode_diff = the_stresses.principal_components(colats, lons, t, u'stress_diff')
+    if numpy.any(unicode_diff != stress_diff):
+        print "principal_components(u'stress_diff') differs from principal_components('stress_diff')"
+        passed = False
+    tm, ca = the_stresses.principal_components(colats, lons, t, ('tens_mag', 'comp_az'))
+    if numpy.any(tm != pc[0]) or numpy.any(ca != pc[3]):
+        print "principal_components(('tens_mag', 'comp_az')) differs from all of the outputs"
+        passed = False
+    try:
+        the_stresses.principal_components(colats, lons, t, 'tens_magnitude')
+    except satstress.InvalidPrincipalOutputError:
+        print "Unknown output raised InvalidPrincipalOutputError"
+    else:
+        print "Unknown output did not raise InvalidPrincipalOutputError"
+        passed = False
+
+    return(passed)
+
+def check_single_points(the_sat, the_stresses, colats, lons, t):
+    """The single point calculations agree with the vectorized ones."""
+    tensor = numpy.array(the_stresses.tensor(colats, lons, t))
+    pc = numpy.array(the_stresses.principal_components(colats, lons, t))
+    point_tensor = numpy.array([ the_stresses.point_tensor(*x) for x in zip(colats, lons, t) ]).T
+    point_pc = numpy.array([ the_stresses.point_principal_components(*x) for x in zip(colats, lons, t) ]).T
+    passed = check(True, "Point - vectorized tensor", rel_diff(point_tensor, tensor), 1e-12)
+    passed = check(passed, "Point - vectorized principal magnitudes", rel_diff(point_pc[[0,2]], pc[[0,2]]), 1e-12)
+    return(check(passed, "Point - vectorized principal azimuths", az_diff(point_pc[[1,3]], pc[[1,3]]), 1e-9))
+
+def check_chunked(the_sat, the_stresses, colats, lons, t):
+    """Principal components calculated chunk by chunk over a (time, point)
+    grid are identical to those calculated in one go."""
+    grid_args = (colats[numpy.newaxis,:], lons[numpy.newaxis,:], t[:50,numpy.newaxis])
+    whole = the_stresses.principal_components(*grid_args)
+    written = tuple([ numpy.empty(x.shape) for x in whole ])
+    the_stresses.write_principal_components(*grid_args, out=written, chunk_size=999)
+    passed = check(True, "Written in chunks - whole principal components", rel_diff(written, whole), 0.0)
+    tens_mag = numpy.empty(whole[0].shape)
+    the_stresses.write_principal_components(*grid_args, out=tens_mag, chunk_size=999, outputs=u'tens_mag')
+    return(check(passed, "Written in chunks - whole tens_mag", rel_diff(tens_mag, whole[0]), 0.0))
+
+def check_parallel(the_sat, the_stresses, colats, lons, t):
+    """Principal components calculated in parallel over a (time, point) grid
+    are identical to those calculated in one go."""
+    grid_args = (colats[numpy.newaxis,:], lons[numpy.newaxis,:], t[:50,numpy.newaxis])
+    whole = the_stresses.principal_components(*grid_args)
+    parallel = the_stresses.parallel_principal_components(*grid_args, processes=2, chunk_size=999)
+    passed = check(True, "Parallel - whole principal components", rel_diff(parallel, whole), 0.0)
+    parallel_diff = the_stresses.parallel_principal_components(*grid_args, processes=2, chunk_size=999, outputs='stress_diff')
+    return(check(passed, "Parallel - whole stress_diff", rel_diff(parallel_diff, whole[0]-whole[2]), 1e-12))
+
+def check_orbit_envelope(the_sat, the_stresses, colats, lons, t):
+    """The orbit envelope agrees with the stresses sampled every 1/4000 of
+    an orbit."""
+    passed = True
+    env_colats, env_lons = colats[:50], lons[:50]
+    fine_t = numpy.linspace(0, the_sat.orbit_period(), 4001)[:,numpy.newaxis]
+    fine_tens, fine_comp = the_stresses.principal_components(env_colats, env_lons, fine_t, ('tens_mag', 'comp_mag'))
+    tensile_str = 0.5*(fine_tens.min() + fine_tens.max())
+    envelope = the_stresses.orbit_envelope(env_colats, env_lons, tensile_str=tensile_str)
+    passed = check(passed, "Envelope max_tens - finely sampled", rel_diff(envelope['max_tens'], fine_tens.max(axis=0)), 1e-6)
+    passed = check(passed, "Envelope min_comp - finely sampled", rel_diff(envelope['min_comp'], fine_comp.min(axis=0)), 1e-6)
+    if numpy.any(envelope['max_tens'] < fine_tens.max(axis=0)) or numpy.any(envelope['min_comp'] > fine_comp.min(axis=0)):
+        print "Envelope extremes are not as extreme as the sampled stresses"
+        passed = False
+    at_max = the_stresses.principal_components(env_colats, env_lons, envelope['max_tens_time'], 'tens_mag')
+    passed = check(passed, "tens_mag at max_tens_time - max_tens", rel_diff(at_max, envelope['max_tens']), 1e-12)
+
+    fails = numpy.isfinite(envelope['fail_time'])
+    if numpy.any(fails != (fine_tens.max(axis=0) >= tensile_str)):
+        print "Envelope fail_time disagrees with the sampled stresses about which points fail"
+        passed = False
+    # Points which are already failing at the start of the orbit fail then,
+    # and the rest when the stress reaches the tensile strength:
+    at_start = fails & (fine_tens[0] >= tensile_str)
+    if numpy.any(envelope['fail_time'][at_start] != 0.0):
+        print "Envelope fail_time isn't the start of the orbit where the surface is already failing"
+        passed = False
+    later = fails & ~at_start
+    at_fail = the_stresses.principal_components(env_colats[later], env_lons[later], envelope['fail_time'][later], 'tens_mag')
+    print "Points failing: %d at the start of the orbit, %d later, of %d" % (at_start.sum(), later.sum(), fails.size)
+    passed = passed and later.any() and at_start.any()
+    return(check(passed, "tens_mag at fail_time - tensile strength", numpy.abs(at_fail-tensile_str).max()/tensile_str, 1e-6))
+
+def check_grid_symmetry(the_sat, the_stresses, colats, lons, t):
+    """A quarter of a global grid is distinct, and the stresses copied to the
+    rest of it are right."""
+    grid_thetas = numpy.linspace(0, numpy.pi, 19)
+    grid_phis = numpy.linspace(0, 2*numpy.pi, 37)
+    symmetry = the_stresses.grid_symmetry(grid_thetas, grid_phis)
+    print "Distinct grid points: %d of %d" % (symmetry.thetas.size*symmetry.phis.size, grid_thetas.size*grid_phis.size)
+    passed = symmetry.thetas.size == 10 and symmetry.phis.size == 18
+
+    distinct = the_stresses.tensor(symmetry.thetas[:,numpy.newaxis], symmetry.phis[numpy.newaxis,:], t[3])
+    expanded = (symmetry.expand(distinct[0]), symmetry.expand(distinct[1], parity=-1), symmetry.expand(distinct[2]))
+    direct = the_stresses.tensor(grid_thetas[:,numpy.newaxis], grid_phis[numpy.newaxis,:], t[3])
+    return(check(passed, "Expanded - directly calculated grid", rel_diff(expanded, direct), 1e-12))
+
+def check_gradients(the_sat, the_stresses, colats, lons, t):
+    """The analytic spatial gradients agree with central differences."""
+    h = 1e-6
+    dT_dtheta, dT_dphi = the_stresses.tensor_gradient(colats, lons, t)
+    fd_dtheta = (numpy.array(the_stresses.tensor(colats+h, lons, t)) - numpy.array(the_stresses.tensor(colats-h, lons, t)))/(2*h)
+    fd_dphi = (numpy.array(the_stresses.tensor(colats, lons+h, t)) - numpy.array(the_stresses.tensor(colats, lons-h, t)))/(2*h)
+    passed = check(True, "Tensor gradient - finite difference", rel_diff((dT_dtheta, dT_dphi), (fd_dtheta, fd_dphi)), 1e-7)
+
+    pc_grads = the_stresses.principal_gradients(colats, lons, t)
+    pc_plus = [ numpy.array(the_stresses.principal_components(colats+h, lons, t)),\
+                numpy.array(the_stresses.principal_components(colats, lons+h, t)) ]
+    pc_minus = [ numpy.array(the_stresses.principal_components(colats-h, lons, t)),\
+                 numpy.array(the_stresses.principal_components(colats, lons-h, t)) ]
+    for n, name in ((0, 'tens_mag'), (2, 'comp_mag')):
+        for axis in (0, 1):
+            fd = (pc_plus[axis][n] - pc_minus[axis][n])/(2*h)
+            passed = check(passed, "%s gradient %d - finite difference" % (name, axis), rel_diff(pc_grads[n][axis], fd), 1e-6)
+    point_grads = numpy.array([ the_stresses.point_principal_gradients(*x) for x in zip(colats, lons, t) ])
+    return(check(passed, "Point - vectorized principal gradients",\
+                 rel_diff(numpy.rollaxis(point_grads, 0, 3)[[0,2]], numpy.array(pc_grads)[[0,2]]), 1e-12))
+
+def main():
+    test_satellite = os.path.join("input", "Europa.satellite")
+    the_sat = satstress.Satellite(open(test_satellite,'r'))
+    the_stresses = satstress.StressCalc([satstress.NSR(the_sat), satstress.Diurnal(the_sat)])
+
+    lons, colats = satstress.random_loncolatpoints(200)
+    t = numpy.linspace(0, the_sat.orbit_period(), 200)
+
+    passed = True
+    passed = check_coefficients(the_sat, the_stresses, colats, lons, t) and passed
+    passed = check_tensor_grid(the_sat, the_stresses, colats, lons, t) and passed
+    passed = check_harmonics(the_sat, the_stresses, colats, lons, t) and passed
+    passed = check_global_means(the_sat, the_stresses, colats, lons, t) and passed
+    passed = check_revisions(the_sat, the_stresses, colats, lons, t) and passed
+    passed = check_snapshots(the_sat, the_stresses, colats, lons, t) and passed
+    passed = check_principal_outputs(the_sat, the_stresses, colats, lons, t) and passed
+    passed = check_single_points(the_sat, the_stresses, colats, lons, t) and passed
+    passed = check_chunked(the_sat, the_stresses, colats, lons, t) and passed
+    passed = check_parallel(the_sat, the_stresses, colats, lons, t) and passed
+    passed = check_orbit_envelope(the_sat, the_stresses, colats, lons, t) and passed
+    passed = check_grid_symmetry(the_sat, the_stresses, colats, lons, t) and passed
+    passed = check_gradients(the_sat, the_stresses, colats, lons, t) and passed
+
+    if not passed:
+        print("\nTest failed.  :(\n")
+        sys.exit(1)
+
+    print("\nTest passed! :)\n")
+    sys.exit()
+
+if __name__ == "__main__":
+    main()